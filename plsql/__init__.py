@@ -0,0 +1,31 @@
+import threading
+
+
+def batch(connection=None):
+    """
+    Function to create batch of package calls executed in one round trip,
+    see plsql.runtime.batch. Runtime is imported on use, so import of plsql
+    doesn't need cx_Oracle
+    """
+    from plsql.runtime import batch
+    return batch(connection)
+
+
+class _Packages(object):
+    """
+    Class creates plsql.dynamic.Packages on first access to its attributes
+    """
+    _lock = threading.Lock()
+    _packages = None
+
+    def __getattr__(self, name):
+        if self._packages is None:
+            with self._lock:
+                if self._packages is None:
+                    from plsql.dynamic import Packages
+                    self._packages = Packages()
+        return getattr(self._packages, name)
+
+
+# package classes built on first access, see plsql.dynamic
+packages = _Packages()
@@ -0,0 +1,211 @@
+"""
+asyncio flavour of generated package classes, requires Python 3.5+.
+
+Calls are executed by blocking package classes in a thread pool bounded
+by the size of package connection pool, so the event loop never waits
+for Oracle I/O.
+"""
+import asyncio
+import functools
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+
+from plsql.cursor import Cursor
+
+"""
+Number of worker threads of packages without connection pool. Single
+connection can't run several calls at once
+"""
+DEFAULT_WORKERS = 1
+
+
+class AsyncCursor(object):
+    """
+    Class implements asynchronous wrapper of plsql.cursor.Cursor.
+    Batches of rows are fetched in the package executor:
+
+        async with await package.get_rows() as cursor:
+            async for row in cursor:
+                ...
+    """
+    def __init__(self, cursor, package):
+        """
+        Constructor.
+
+        Parameters:
+        cursor     - plsql.cursor.Cursor
+        package    - async package class running the fetches
+        """
+        self.cursor = cursor
+        self.package = package
+        self._batch = []
+        self._position = 0
+
+    async def fetch_many(self, size=None):
+        """
+        Function to get next batch of rows. Return empty list when there are no more rows
+        """
+        rows = self._batch[self._position:]
+        self._batch = []
+        self._position = 0
+        if size and len(rows) >= size:
+            self._batch = rows[size:]
+            return rows[:size]
+        if rows and not size:
+            return rows
+
+        rows.extend(await self.package.run(self.cursor.fetch_many, size and size - len(rows)))
+        return rows
+
+    async def fetch_all(self):
+        result = []
+
+        batch = await self.fetch_many()
+        while batch:
+            result.extend(batch)
+            batch = await self.fetch_many()
+
+        return result
+
+    async def close(self):
+        await self.package.run(self.cursor.close)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self._position >= len(self._batch):
+            self._batch = await self.package.run(self.cursor.fetch_many)
+            self._position = 0
+            if not self._batch:
+                raise StopAsyncIteration
+
+        row = self._batch[self._position]
+        self._position += 1
+        return row
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+        return False
+
+
+class AsyncCall(object):
+    """
+    Class implements member of async package class. The member is a
+    descriptor calling member of blocking package with the same name
+    """
+    def __init__(self, name):
+        self.name = name
+        self._bound = {}
+
+    def __get__(self, instance, owner):
+        bound = self._bound.get(owner)
+        if bound is None:
+            bound = self._bound[owner] = AsyncBoundCall(getattr(owner.package, self.name), owner)
+        return bound
+
+
+class AsyncBoundCall(object):
+    """
+    Class implements call of package member bound to async package class
+    """
+    def __init__(self, call, package):
+        """
+        Constructor.
+
+        Parameters:
+        call       - plsql.runtime.BoundCall of blocking package
+        package    - async package class
+        """
+        self.call = call
+        self.package = package
+        self.__name__ = call.__name__
+        self.__doc__ = call.__doc__
+
+    async def __call__(self, *args, **kwargs):
+        result = await self.package.run(self.call, *args, **kwargs)
+        if isinstance(result, tuple):
+            return tuple(self.package.wrap(value) for value in result)
+        return self.package.wrap(result)
+
+    async def many(self, rows, batch_size=None):
+        return await self.package.run(self.call.many, rows, batch_size)
+
+    def __repr__(self):
+        return "<async {0}>".format(repr(self.call)[1:-1])
+
+
+class AsyncPackage(object):
+    """
+    Base class of generated async package classes.
+
+    package       - blocking generated package class, its connection or pool is used
+    concurrency   - maximum number of running calls of the package, None means
+                    number of executor threads
+    """
+    package = None
+    concurrency = None
+
+    _lock = threading.RLock()
+
+    @classmethod
+    def executor(cls):
+        """
+        Function to get thread pool of the package. Number of threads is
+        bounded by maximum size of connection pool
+        """
+        with cls._lock:
+            executor = cls.__dict__.get('_executor')
+            if executor is None:
+                pool = getattr(cls.package, 'pool', None)
+                workers = getattr(pool, 'max_size', None) or DEFAULT_WORKERS
+                executor = ThreadPoolExecutor(workers)
+                cls._executor = executor
+            return executor
+
+    @classmethod
+    def semaphore(cls):
+        """
+        Function to get semaphore limiting concurrency of package in running event loop
+        """
+        loop = asyncio.get_event_loop()
+        with cls._lock:
+            semaphores = cls.__dict__.get('_semaphores')
+            if semaphores is None:
+                semaphores = cls._semaphores = weakref.WeakKeyDictionary()
+            semaphore = semaphores.get(loop)
+            if semaphore is None:
+                limit = cls.concurrency or cls.executor()._max_workers
+                semaphore = semaphores[loop] = asyncio.Semaphore(limit)
+            return semaphore
+
+    @classmethod
+    async def run(cls, function, *args, **kwargs):
+        """
+        Function to run blocking function in executor of the package
+        """
+        async with cls.semaphore():
+            loop = asyncio.get_event_loop()
+            return await loop.run_in_executor(cls.executor(), functools.partial(function, *args, **kwargs))
+
+    @classmethod
+    def wrap(cls, value):
+        # Function to make returned cursors asynchronous
+        if isinstance(value, Cursor):
+            return AsyncCursor(value, cls)
+        return value
+
+    @classmethod
+    def shutdown(cls, wait=True):
+        """
+        Function to stop executor threads of the package
+        """
+        with cls._lock:
+            executor = cls.__dict__.get('_executor')
+            cls._executor = None
+        if executor is not None:
+            executor.shutdown(wait)
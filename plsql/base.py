@@ -1,73 +1,178 @@
+import hashlib
+import json
+import logging
+import multiprocessing
 import os
 import re
-from django.template.base import Template
-from django.template.context import Context
-from dbgate import DBA
-from parser import PlSqlParser
-import settings
+from multiprocessing.pool import ThreadPool
+
+from plsql import emitter, settings
+from plsql.dbgate import DBA, ConnectionPool
+from plsql.parser import PlSqlParser, STRING_INDEXES, cx_type
+
+logger = logging.getLogger(__name__)
 
 """
 Oracle user_objects column identifiers
 """
 PACKAGE_NAME = 0
+PACKAGE_LAST_DDL_TIME = 1
+
+"""
+Settings which don't change generated modules, they are not a part of generator hash
+"""
+GENERATION_SETTINGS = ('PLSQL_PACKAGES', 'PLSQL_SCHEMA_ROOT', 'PLSQL_TEMPLATE_DIR',
+                       'PLSQL_GENERATION_WORKERS', 'PLSQL_INCREMENTAL')
 
 """
-Ditionary with dependences between Oracle types and cx_Oracle types
+Compiled templates, dictionary of template path and tuple (modification times, template)
 """
-ORATYPES = {
-    'sys_refcursor' : 'cx_Oracle.CURSOR',
-    'raw'           : 'cx_Oracle.BINARY',
-    'bfile'         : 'cx_Oracle.BFILE',
-    'blob'          : 'cx_Oracle.BLOB',
-    'clob'          : 'cx_Oracle.CLOB',
-    'date'          : 'cx_Oracle.DATETIME',
-    'char'          : 'cx_Oracle.FIXED_CHAR',
-    'nchar'         : 'cx_Oracle.FIXED_UNICODE',
-    'long row'      : 'cx_Oracle.LONG_BINARY',
-    'nclob'         : 'cx_Oracle.NCLOB',
-    'number'        : 'cx_Oracle.NUMBER',
-    'rowid'         : 'cx_Oracle.ROWID',
-    'varchar2'      : 'cx_Oracle.STRING',
-    'timestamp'     : 'cx_Oracle.TIMESTAMP',
-    'nvarchar2'     : 'cx_Oracle.UNICODE',
-}
-
-TEMPLATES_MAP = {
-    'sys_refcursor' : 'cursor',
-    'raw'           : 'generic',
-    'bfile'         : 'generic',
-    'blob'          : 'lob',
-    'clob'          : 'lob',
-    'date'          : 'generic',
-    'char'          : 'generic',
-    'nchar'         : 'generic',
-    'long row'      : 'generic',
-    'nclob'         : 'lob',
-    'number'        : 'generic',
-    'rowid'         : 'generic',
-    'varchar2'      : 'generic',
-    'timestamp'     : 'generic',
-    'nvarchar2'     : 'generic',
-}
-
-
-def render_to_string(template_name, context):
-    """
-    Function to render parts of python module
-    """
-    f = open(settings.PLSQL_TEMPLATE_DIR + '/' + template_name)
-    template_string = f.read()
-    f.close()
-
-    t = Template(template_string, template_string)
-    return t.render(context)
+_templates = {}
+
+"""
+True when Django 1.8+ app registry is loaded by django.setup(), once per process
+"""
+_django_ready = False
+
+def compile_template(template_string):
+    """
+    Function to compile Django template. Django 1.8+ compiles templates by
+    engine without TEMPLATES setting, rendering needs the app registry
+    """
+    global _django_ready
+    try:
+        import django
+        from django.template.engine import Engine
+    except ImportError:
+        from django.template.base import Template
+        return Template(template_string, template_string)
+
+    if not _django_ready:
+        django.setup()
+        _django_ready = True
+    return Engine().from_string(template_string)
+
+def get_template(template_name):
+    """
+    Function to get compiled Django template. Templates are compiled once per
+    process and recompiled when the template or template folder is modified
+    """
+    path = settings.PLSQL_TEMPLATE_DIR + '/' + template_name
+    mtime = (os.path.getmtime(settings.PLSQL_TEMPLATE_DIR), os.path.getmtime(path))
+
+    cached = _templates.get(path)
+    if cached is None or cached[0] != mtime:
+        f = open(path)
+        template_string = f.read()
+        f.close()
+
+        cached = _templates[path] = (mtime, compile_template(template_string))
+
+    return cached[1]
+
+def render_to_string(template_name, context, engine=None):
+    """
+    Function to render parts of python module. With engine 'native'
+    the code is built by plsql.emitter without Django
+
+    Parameters:
+    template_name - template name in settings.PLSQL_TEMPLATE_DIR
+    context       - dictionary of template variables
+    engine        - 'django' or 'native', settings.PLSQL_EMITTER by default
+    """
+    if (engine or settings.PLSQL_EMITTER) == 'native':
+        return emitter.emit(template_name, context)
+
+    from django.template.context import Context
+    return get_template(template_name).render(Context(context))
+
+def get_option(name, package_name, member_name=None, options=None):
+    """
+    Function to get generation option of package or package member
+
+    Parameters:
+    name          - option name, default value is taken from settings.PLSQL_<NAME>
+    package_name  - package name
+    member_name   - function or procedure name
+    options       - dictionary of options like settings.PLSQL_OPTIONS, it can also
+                    keep option values for all packages, settings.PLSQL_OPTIONS by default
+    """
+    if options is None:
+        options = settings.PLSQL_OPTIONS
+
+    keys = [package_name.upper()]
+    if member_name:
+        keys.insert(0, "{0}.{1}".format(package_name, member_name).upper())
+
+    for key in keys:
+        if name in options.get(key, {}):
+            return options[key][name]
+
+    if name in options:
+        return options[name]
+    return getattr(settings, 'PLSQL_' + name.upper())
+
+class UnsupportedType(ValueError):
+    """
+    Exception raised for types of arguments and return values which can't be bound
+    """
+    pass
+
+def is_collection(oratype, collection=None):
+    # Function to check whether type is collection, see type_spec
+    return collection is not None \
+        or oratype.upper() in [name.upper() for name in settings.PLSQL_SQL_COLLECTIONS]
+
+def type_spec(oratype, collection=None, array_size=None):
+    """
+    Function to generate python description of type of argument or return value:
+    cx_Oracle type or collection type of plsql.runtime
+
+    Parameters:
+    oratype    - oracle pl/sql data type
+    collection - collection type of PlSqlParser or DBA.get_arguments, None for other types.
+                 Types listed in settings.PLSQL_SQL_COLLECTIONS are collections too
+    array_size - maximum number of elements of associative arrays
+
+    Raise UnsupportedType for types which can't be bound: unknown types,
+    associative arrays indexed by strings or with unknown type of elements
+    """
+    if not is_collection(oratype, collection):
+        try:
+            return cx_type(oratype)
+        except KeyError:
+            raise UnsupportedType("type {0} is not supported".format(oratype))
+    if collection is None:
+        collection = {'name': oratype, 'collection': 'table'}
+
+    if collection['collection'] == 'index by':
+        if collection.get('index') in STRING_INDEXES:
+            raise UnsupportedType("associative array {0} indexed by {1} can't be bound, only arrays indexed "
+                                  "by pls_integer are supported".format(collection['name'], collection['index']))
+        if not collection.get('element'):
+            raise UnsupportedType("type of elements of associative array {0} is unknown".format(collection['name']))
+        element = type_spec(collection['element'])
+        if collection.get('length'):
+            return "AssociativeArray({0}, {1}, {2})".format(element, array_size, collection['length'])
+        return "AssociativeArray({0}, {1})".format(element, array_size)
+    return "SqlCollection('{0}')".format(collection['name'].upper())
 
 class Package(object):
     """
     Class to represent Oracle package
     """
-    def __init__(self, info):
+    def __init__(self, info, options=None, emitter=None):
+        """
+        Constructor.
+
+        Parameters:
+        info    - row of DBA.get_packages
+        options - dictionary of options like settings.PLSQL_OPTIONS, see get_option
+        emitter - 'django' or 'native', settings.PLSQL_EMITTER by default
+        """
         self.name = info[PACKAGE_NAME]
+        self.options = options
+        self.emitter = emitter
         self.members = []
 
 
@@ -75,6 +180,10 @@ class Package(object):
         # Function to set members of package. Member is one of the next: procedure, function, constant
         self.members = members
 
+    def option(self, name):
+        # Function to get generation option of the package
+        return get_option(name, self.name, options=self.options)
+
 
     def get_py_source(self):
         """
@@ -84,12 +193,38 @@ class Package(object):
         for member in self.members:
             members.append(member.get_py_source())
 
-        return render_to_string("package.html",
-            Context({
-                'package_name' : self.name.lower(),
-                'members' : members
-            })
-        )
+        return render_to_string("package.html", {
+            'package_name' : self.name.lower(),
+            'statement_cache_size' : self.option('statement_cache_size'),
+            'bulk_batch_size' : self.option('bulk_batch_size'),
+            'members' : members
+        }, self.emitter)
+
+    def get_async_py_source(self):
+        """
+        Function to generate python code of asyncio package class, see plsql.aio.
+        Constants are taken from the package class
+        """
+        members = [member.name for member in self.members if isinstance(member, Function)]
+        constants = [member._name for member in self.members if isinstance(member, Constant)]
+
+        return render_to_string("package_async.html", {
+            'package_name' : self.name.lower(),
+            'concurrency' : self.option('concurrency'),
+            'constants' : constants,
+            'members' : members
+        }, self.emitter)
+
+    def get_member_names(self):
+        """
+        Function to get names of members of package class, index of plsql.importer
+        """
+        names = []
+        for member in self.members:
+            name = member._name if isinstance(member, Constant) else member.name
+            if name not in names:
+                names.append(name)
+        return names
 
     def __unicode__(self):
         return "Package {0}.".format(self.name)
@@ -102,7 +237,7 @@ class Function(object):
     """
     Class to generate python function to call Oracle PL/SQL package function
     """
-    def __init__(self, name, oratype, parent):
+    def __init__(self, name, oratype, parent, collection=None):
         """
         Constructor.
 
@@ -110,32 +245,76 @@ class Function(object):
         name       - function name
         oratype    - return type for PL/SQL function
         parent     - package
+        collection - collection type of return value, see type_spec
         """
         self.name = name
         self.oratype = oratype
+        self.collection = collection
         self.arguments = []
         self.parent = parent
 
     def add_argument(self, arg):
         # Function to add argument of function
+        arg.member = self
         self.arguments.append(arg)
 
-    def get_py_source(self):
+    def option(self, name):
+        # Function to get generation option of the member
+        return get_option(name, self.parent.name, self.name, self.parent.options)
+
+    def has_type(self, *oratypes):
+        # Function to check whether return value or any argument has one of types
+        types = [self.oratype] + [arg.oratype for arg in self.arguments]
+        return bool([oratype for oratype in types if oratype and oratype.lower() in oratypes])
+
+    def streams(self):
+        # Function to check whether rows of returned value can be streamed by
+        # table() query: SQL collection, not associative array
+        return bool(self.oratype) and is_collection(self.oratype, self.collection) \
+            and (self.collection or {}).get('collection') != 'index by'
+
+    def cacheable(self):
+        # Function to check whether results can be cached: function with IN arguments
+        # only returning neither cursor nor LOB nor collection
+        return bool(self.oratype) \
+            and self.oratype.lower() not in ('sys_refcursor', 'clob', 'nclob', 'blob') \
+            and not is_collection(self.oratype, self.collection) \
+            and not [arg for arg in self.arguments if arg.mode() != 'in']
+
+    def call_options(self):
         """
-        Function to generate python code
+        Function to generate keyword arguments of call for returned cursors and LOBs
+        and result cache
         """
+        names = []
+        if self.has_type('sys_refcursor') or self.streams():
+            names.extend(['arraysize', 'rows', 'inline_lobs', 'numbers'])
+        if self.has_type('sys_refcursor', 'clob', 'nclob', 'blob') or self.streams():
+            names.append('lob_inline_size')
+        if self.cacheable() and self.option('cache'):
+            names.append('cache')
+
+        return "".join(
+            ", {0}={1!r}".format(name, self.option(name)) for name in names
+        )
 
-        ctx = Context({
+    def get_context(self):
+        """
+        Function to get template context of the member
+        """
+        return {
             'name' : self.name,
             'args' : self.arguments,
-            'return_type' : ORATYPES[self.oratype.lower()],
+            'return_type' : type_spec(self.oratype, self.collection, self.option('array_size')),
             'package_name' : self.parent.name.lower(),
-        })
+            'options' : self.call_options(),
+        }
 
-        return render_to_string(
-            "function_{0}.html".format(TEMPLATES_MAP[self.oratype]),
-            ctx
-        )
+    def get_py_source(self):
+        """
+        Function to generate python code
+        """
+        return render_to_string("function.html", self.get_context(), self.parent.emitter)
 
     def __str__(self):
         return self.__unicode__()
@@ -144,6 +323,32 @@ class Function(object):
         return "Function {0}, oratype = {1}".format(self.name, self.oratype)
 
 
+class TableFunction(Function):
+    """
+    Class to generate python function to query Oracle PL/SQL pipelined function,
+    see plsql.runtime.TableFunctionCall
+    """
+    def streams(self):
+        return True
+
+    def cacheable(self):
+        return False
+
+    def get_context(self):
+        return {
+            'name' : self.name,
+            'args' : self.arguments,
+            'package_name' : self.parent.name.lower(),
+            'options' : self.call_options(),
+        }
+
+    def get_py_source(self):
+        return render_to_string("table_function.html", self.get_context(), self.parent.emitter)
+
+    def __unicode__(self):
+        return "Pipelined function {0}, oratype = {1}".format(self.name, self.oratype)
+
+
 class Procedure(Function):
     """
      Class to generate python function to call Oracle PL/SQL package procedure
@@ -151,14 +356,16 @@ class Procedure(Function):
     def __init__(self, name, parent):
         super(Procedure, self).__init__(name, None, parent)
 
-    def get_py_source(self):
-        ctx = Context({
+    def get_context(self):
+        return {
             'name' : self.name,
             'args' : self.arguments,
             'package_name' : self.parent.name.lower(),
-            })
+            'options' : self.call_options(),
+        }
 
-        source = render_to_string("procedure.html", ctx)
+    def get_py_source(self):
+        source = render_to_string("procedure.html", self.get_context(), self.parent.emitter)
         return source
 
     def __unicode__(self):
@@ -170,7 +377,7 @@ class Argument(object):
     Class to represent argument of function/procedure
     """
     @staticmethod
-    def create(name, type, oratype):
+    def create(name, type, oratype, collection=None):
         """
         Factory method to create appropriate argument
 
@@ -178,146 +385,392 @@ class Argument(object):
         name - argument name
         type - argument type ( in, out, in out or None)
         oratype - oracle pl/sql data type
+        collection - collection type of argument, see type_spec
         """
-        if oratype in ('clob', 'nclob'):
-            return ClobArgument(name, type, oratype)
-        elif oratype in ('sys_refcursor'):
-            return CursorArgument(name, type, oratype)
-        else:
-            return Argument(name, type, oratype)
+        return Argument(name, type, oratype, collection)
 
-    def __init__(self, name, type, oratype):
+    def __init__(self, name, type, oratype, collection=None):
         # Constructor
         self._name = name
         self.type = type
         self.oratype = oratype
+        self.collection = collection
+        # function or procedure, set by Function.add_argument
+        self.member = None
 
     def name(self):
         return self._name
 
-    def arg_name(self):
-        if self.type == 'out':
-            return "{0} = None".format(self._name)
-        return self._name
-
-    def return_statement(self):
-        if self.type and re.match('out', self.type):
-            return " {0}".format(self._name)
-        return ''
-
-    def after_calling(self):
-        if self.type and re.match('out', self.type):
-            return "{0} = {0}.getvalue()".format(self._name)
+    def mode(self):
+        # Function to get argument mode: in, out or in out
+        if not self.type:
+            return 'in'
+        return re.sub('\s+', ' ', self.type.lower())
 
-        return ''
-
-    def before_calling(self):
+    def spec(self):
         """
-        Template method to construct initial code before colling PLSQL function
+        Function to generate python description of argument used by plsql.runtime.Call
         """
-        plsql = self.pyora_create_temporary_name()
+        return "('{0}', '{1}', {2})".format(self._name, self.mode(), type_spec(
+            self.oratype, self.collection, self.member.option('array_size') if self.member else None))
 
-        plsql += self.cxora_create_variable()
+    def __str__(self):
+        return self.__unicode__()
 
-        plsql += self.cxora_set_value()
+    def __unicode__(self):
+        return self._name
 
-        plsql += self.pyora_set_origin_name()
+class Constant(object):
+    def __init__(self, name, value):
+        self._name = name
+        self._value = value
 
-        return plsql
+    def get_py_source(self):
+        return "{0} = {1}".format(self._name, self._value)
 
-    def pyora_create_temporary_name(self) :
-        # Generate python code to create new variable with None value
-        return """
-        {0}_tmp = None
-        """.format(self.name())
 
-    def cxora_create_variable(self) :
-        # Generate python code to create required type of variable
-        return """
-        {0}_tmp = cursor.var({1})
-        """.format(self.name(), ORATYPES[self.oratype])
+def merge_arguments(parsed, arguments):
+    """
+    Function to take signatures of package members from user_arguments.
+    Dictionary views have names in upper case, spelling of names is taken
+    from the specification, as well as constants and pipelined flags of
+    functions and index types of associative arrays which are not in the views.
+    Members without rows in user_arguments, like procedures without arguments,
+    keep parsed signatures
+
+    Parameters:
+    parsed    - tuple (functions, procedures, constants) of PlSqlParser
+    arguments - tuple (functions, procedures, constants) of DBA.get_arguments
+    """
+    names = {}
+    pipelined = set()
+    indexes = {}
+    for member in parsed[0] + parsed[1]:
+        names[member['name'].lower()] = member['name']
+        if member.get('pipelined'):
+            pipelined.add((member['name'].lower(), member['overload']))
+        for arg in member['args']:
+            names[arg['name'].lower()] = arg['name']
+        for item in member['args'] + [member]:
+            if item.get('collection'):
+                indexes[item['collection']['name'].lower()] = item['collection'].get('index')
+
+    def spelling(name):
+        return names.get(name.lower(), name.lower())
+
+    def collection(item):
+        if item.get('collection'):
+            item['collection'] = dict(item['collection'], index=indexes.get(item['collection']['name'].lower()))
+        return item
+
+    members = []
+    for items in arguments[:2]:
+        members.append([])
+        for member in items:
+            member = collection(dict(member, name=spelling(member['name'])))
+            member['args'] = [collection(dict(arg, name=spelling(arg['name']))) for arg in member['args']]
+            if (member['name'].lower(), member['overload']) in pipelined:
+                member['pipelined'] = True
+            members[-1].append(member)
+
+    found = set((member['name'].lower(), member['overload']) for member in members[0] + members[1])
+    for items, parsed_items in zip(members, parsed[:2]):
+        items.extend([member for member in parsed_items
+                      if (member['name'].lower(), member['overload']) not in found])
+
+    return members[0], members[1], parsed[2]
+
+def create_members(package, source, parser=None, arguments=None):
+    """
+    Function to create members of package from its specification
+
+    Parameters:
+    package   - instance of Package class
+    source    - PL/SQL package specification
+    parser    - PlSqlParser, new parser by default
+    arguments - signatures of members from DBA.get_arguments to use instead
+                of parsed ones, see settings.PLSQL_METADATA
+    """
+    members = (parser or PlSqlParser()).get_package_members(source)
+    if arguments is not None:
+        members = merge_arguments(members, arguments)
+    return build_members(package, members)
 
-    def cxora_set_value(self) :
-        # Generate python code to set initial value
-        return """
-        {0}_tmp.setvalue(0, {0})
-        """.format(self.name())
+def build_members(package, members):
+    """
+    Function to create members of package from parsed specification. Functions
+    and procedures with types which can't be bound are skipped with warning
 
-    def pyora_set_origin_name(self) :
-        # Generate python code to set created variable origin name
-        return """
-        {0} = {0}_tmp
-        """.format(self.name())
+    Parameters:
+    package   - instance of Package class
+    members   - tuple (functions, procedures, constants) of
+                PlSqlParser.get_package_members or merge_arguments
+    """
+    functions, procedures, constants = members
+
+    def supported(item):
+        # Function to check types of function or procedure, members with types
+        # which can't be bound are skipped, other members are generated
+        types = [(arg['oratype'], arg.get('collection')) for arg in item['args']]
+        # rows of pipelined functions are queried, their return type isn't bound
+        if item.get('oratype') and not item.get('pipelined'):
+            types.insert(0, (item['oratype'], item.get('collection')))
+        try:
+            for oratype, collection in types:
+                type_spec(oratype, collection)
+        except UnsupportedType as e:
+            logger.warning("%s.%s is skipped: %s", package.name, item['name'], e)
+            return False
+        return True
+
+    functions = [func for func in functions if supported(func)]
+    procedures = [proc for proc in procedures if supported(proc)]
+
+    members = []
+    for proc in procedures:
+        # create Procedure
+        member = Procedure(proc['name'], package)
+        for arg in proc['args']:
+            member.add_argument(
+                Argument.create(arg['name'], arg['type'], arg['oratype'], arg.get('collection'))
+            )
+        members.append(member)
+
+    for func in functions:
+        # create Function
+        if func.get('pipelined'):
+            member = TableFunction(func['name'], func['oratype'], package, func.get('collection'))
+        else:
+            member = Function(func['name'], func['oratype'], package, func.get('collection'))
+        for arg in func['args']:
+            member.add_argument(
+                Argument.create(arg['name'], arg['type'], arg['oratype'], arg.get('collection'))
+            )
+        members.append(member)
 
-    def __str__(self):
-        return self.__unicode__()
+    for const in constants:
+        members.append(Constant(const['name'], const['value']))
 
-    def __unicode__(self):
-        return self.name
+    return members
 
-class ClobArgument(Argument):
+def source_hash(source):
+    """
+    Function to get hash of package specification stored in generation manifest
+    """
+    if not isinstance(source, bytes):
+        source = source.encode('utf-8')
+    return hashlib.sha1(source).hexdigest()
 
-    def after_calling(self):
-        if self.type and re.match('out', self.type):
-            return """
-        {0} = {0}.getvalue()
-        {0} = {0}.read()
-        """.format(self._name)
-        return ''
+def generator_hash():
+    """
+    Function to get hash of templates and generation settings. Modules generated
+    by other templates or options are regenerated by incremental generation
+    """
+    digest = hashlib.sha1()
+    for name in sorted(os.listdir(settings.PLSQL_TEMPLATE_DIR)):
+        f = open(os.path.join(settings.PLSQL_TEMPLATE_DIR, name), 'rb')
+        digest.update(f.read())
+        f.close()
 
-class CursorArgument(Argument):
+    options = dict((name, getattr(settings, name)) for name in dir(settings)
+                   if name.startswith('PLSQL_') and name not in GENERATION_SETTINGS)
+    digest.update(json.dumps(options, sort_keys=True, default=repr).encode('utf-8'))
+    return digest.hexdigest()
 
-    def cxora_set_value(self):
-        return ''
+def generate_package(task):
+    """
+    Function to parse package specification and generate python modules.
+    Runs in worker processes of parallel generation, so takes one picklable argument
 
-    def after_calling(self):
-        if self.type and re.match('out', self.type):
-            return """
-        {0} = {0}.getvalue()
-        {0} = Cursor({0})
-        """.format(self._name)
-        return ''
+    Parameters:
+    task      - tuple (package info, package specification, generate async module,
+                signatures of members from DBA.get_arguments or None)
 
-class Constant(object):
-    def __init__(self, name, value):
-        self._name = name
-        self._value = value
+    Return tuple (package, python source, python source of async module or None)
+    """
+    info, source, async_stubs, arguments = task
 
-    def get_py_source(self):
-        return "{0} = {1}".format(self._name, self._value)
+    package = Package(info)
+    package.set_members(create_members(package, source, arguments=arguments))
 
+    async_source = None
+    if async_stubs:
+        async_source = package.get_async_py_source()
+
+    return package, package.get_py_source(), async_source
 
 class Schema():
     def __init__(self, connection):
+        """
+        Constructor.
+
+        Parameters:
+        connection - DB-API connection or dbgate.ConnectionPool. Specifications
+                     are fetched over several pooled connections at once
+                     by parallel generation
+        """
+        self.pool = connection if isinstance(connection, ConnectionPool) else None
         self.dba = DBA(connection)
         self.parser = PlSqlParser()
         self.fs = SchemaIO()
         self.packages = []
 
-    def generate_packages(self):
-        """Dump PLSQL packages to filesystem"""
+    def generate_packages(self, async_stubs=False, workers=None, incremental=None, force=False):
+        """
+        Dump PLSQL packages to filesystem
+
+        Parameters:
+        async_stubs - also generate <package>_async modules with asyncio
+                      package classes, see plsql.aio
+        workers     - number of processes parsing specifications and rendering
+                      modules, settings.PLSQL_GENERATION_WORKERS by default
+        incremental - regenerate only packages changed since previous generation
+                      according to the manifest, settings.PLSQL_INCREMENTAL by default
+        force       - regenerate all packages in incremental mode
+        """
+        if incremental is None:
+            incremental = settings.PLSQL_INCREMENTAL
+
         self.fs.check_packages_storage()
-        self._save_packages()
+        self._save_packages(async_stubs, workers or settings.PLSQL_GENERATION_WORKERS,
+                            incremental and not force)
 
-    def _save_packages(self):
+    def _save_packages(self, async_stubs=False, workers=1, incremental=False):
         """
-        Get packages, parse package specification, generate py and save
+        Get packages, parse package specification, generate py and save.
+
+        Packages and their specifications are fetched by bulk queries, several
+        pooled connections are used for more than DBA.IN_LIST_SIZE packages.
+        With several workers specifications are parsed and rendered by a process
+        pool. All specifications are fetched before the workers start: a few bulk
+        round trips cost less than overlapping a round trip per package with
+        parsing. Packages are saved in the order of the package list whatever
+        order workers finish in.
+
+        The manifest keeps last DDL time, specification hash and member names
+        of generated packages, the names are the index of plsql.importer.
+        In incremental mode only new packages and packages with changed
+        specification are saved, modules of dropped packages are removed and
+        other files are left untouched
         """
-        raw_packages = self.dba.get_packages()
-
-        for package in raw_packages:
-            package = Package(package)
-            if package.name in settings.PLSQL_PACKAGES:
-                # parse package to get package members
-                members = self._get_package_members(package)
-                package.set_members(members)
-                self.packages.append(package)
+        infos = self._get_packages(settings.PLSQL_PACKAGES)
+
+        generator = generator_hash()
+        manifest = self.fs.load_manifest()
+        generated = manifest.get('packages', {})
+        # packages generated by other templates or settings are regenerated
+        entries = {}
+        if incremental and manifest.get('generator') == generator:
+            entries = generated
+
+        def modules(name):
+            if async_stubs:
+                return [name.lower(), name.lower() + '_async']
+            return [name.lower()]
+
+        def unchanged(info, source=None):
+            entry = entries.get(info[PACKAGE_NAME])
+            if entry is None or entry['modules'] != modules(info[PACKAGE_NAME]):
+                return False
+            if source is None:
+                return entry['last_ddl_time'] == str(info[PACKAGE_LAST_DDL_TIME])
+            return entry['hash'] == source_hash(source)
+
+        candidates = [info[PACKAGE_NAME] for info in infos if not unchanged(info)]
+        sources = self._get_spec_sources(candidates, workers)
+        arguments = self._get_arguments(candidates, workers)
+        candidates = set(candidates)
+
+        packages = {}
+        tasks = []
+        for info in infos:
+            name = info[PACKAGE_NAME]
+            entry = entries.get(name)
+            if name in candidates:
+                source = sources.get(name, '')
+                # DDL without changes of specification, e.g. recompilation
+                if not unchanged(info, source):
+                    tasks.append((info, source, async_stubs, arguments.get(name)))
+                # names of members are kept while specification is the same
+                entry = dict(entry or {}, hash=source_hash(source), modules=modules(name))
+            entry['last_ddl_time'] = str(info[PACKAGE_LAST_DDL_TIME])
+            packages[name] = entry
+
+        if workers > 1 and len(tasks) > 1:
+            processes = multiprocessing.Pool(workers)
+            try:
+                results = processes.map(generate_package, tasks)
+            finally:
+                processes.close()
+                processes.join()
+        else:
+            results = [generate_package(task) for task in tasks]
+
+        for package, source, async_source in results:
+            self.packages.append(package)
+            packages[package.name]['members'] = package.get_member_names()
+
+            # save package to fs
+            self.fs.save_package(package.name.lower(), source)
+            if async_source is not None:
+                self.fs.save_package(package.name.lower() + '_async', async_source)
+
+        # remove modules of dropped packages and not generated async modules
+        for name, entry in generated.items():
+            expected = modules(name) if name in packages else []
+            for module in entry['modules']:
+                if module not in expected:
+                    self.fs.remove_package(module)
+
+        self.fs.save_manifest({'generator': generator, 'packages': packages})
+
+    def _get_packages(self, names=None):
+        # Function to get list of packages of the schema
+        if self.pool is None:
+            return self.dba.get_packages(names)
+        with self.pool.connection() as connection:
+            return DBA(connection).get_packages(names)
+
+    def _fetch(self, method, names, workers=1):
+        """
+        Function to fetch metadata of packages by bulk method of DBA, chunks of
+        DBA.IN_LIST_SIZE packages are fetched over several connections of pool at once.
+        Return dictionary of package name and metadata
+        """
+        chunks = [names[start:start + DBA.IN_LIST_SIZE] for start in range(0, len(names), DBA.IN_LIST_SIZE)]
 
-                # save package to fs
-                self.fs.save_package(
-                    package.name.lower(),
-                    package.get_py_source()
-                )
+        if self.pool is None:
+            results = [getattr(self.dba, method)(chunk) for chunk in chunks]
+        else:
+            def fetch(chunk):
+                with self.pool.connection() as connection:
+                    return getattr(DBA(connection), method)(chunk)
+
+            threads = ThreadPool(max(1, min(workers, self.pool.max_size, len(chunks))))
+            try:
+                results = threads.map(fetch, chunks)
+            finally:
+                threads.close()
+                threads.join()
+
+        metadata = {}
+        for result in results:
+            metadata.update(result)
+        return metadata
+
+    def _get_spec_sources(self, names, workers=1):
+        # Function to fetch specifications of packages
+        return self._fetch('get_spec_sources', names, workers)
+
+    def _get_arguments(self, names, workers=1):
+        # Function to fetch signatures of package members from user_arguments
+        if settings.PLSQL_METADATA != 'arguments':
+            return {}
+        return self._fetch('get_arguments', names, workers)
+
+    def _get_spec_source(self, package_name):
+        # Function to fetch package specification
+        return self._get_spec_sources([package_name]).get(package_name, '')
 
     def _get_package_members(self, package):
         """
@@ -326,35 +779,16 @@ class Schema():
         Parameters:
         package   - instance of Package class
         """
-        source = self.dba.get_spec_source(package.name)
-
-        functions, procedures, constants = self.parser.get_package_members(source)
-
-        members = []
-        for proc in procedures:
-            # create Procedure
-            member = Procedure(proc['name'], package)
-            for arg in proc['args']:
-                member.add_argument(
-                    Argument.create(arg['name'], arg['type'], arg['oratype'])
-                )
-            members.append(member)
-
-        for func in functions:
-            # create Function
-            member = Function(func['name'], func['oratype'], package)
-            for arg in func['args']:
-                member.add_argument(
-                    Argument.create(arg['name'], arg['type'], arg['oratype'])
-                )
-            members.append(member)
-
-        for const in constants:
-            members.append(Constant(const['name'], const['value']))
-
-        return members
+        source = self._get_spec_source(package.name)
+        arguments = self._get_arguments([package.name]).get(package.name)
+        return create_members(package, source, self.parser, arguments)
 
 class SchemaIO(object):
+    """
+    Name of generation manifest in the schema folder
+    """
+    MANIFEST = 'plsql_manifest.json'
+
     def check_packages_storage(self):
         """
         Create filesystem structure.
@@ -377,6 +811,41 @@ class SchemaIO(object):
         f.close()
 
 
+    def remove_package(self, fname):
+        """
+        Remove plsql package stub module and its compiled files
+        """
+        path = settings.PLSQL_SCHEMA_ROOT + settings.ORA_SCHEMA + '/' + fname
+        for name in (path + '.py', path + '.pyc', path + '.pyo'):
+            if os.path.exists(name):
+                os.remove(name)
+
+    def load_manifest(self):
+        """
+        Load generation manifest, empty dictionary if packages were not generated yet
+        """
+        path = settings.PLSQL_SCHEMA_ROOT + settings.ORA_SCHEMA + '/' + self.MANIFEST
+        if not os.path.exists(path):
+            return {}
+
+        f = open(path)
+        try:
+            return json.load(f)
+        except ValueError:
+            return {}
+        finally:
+            f.close()
+
+    def save_manifest(self, manifest):
+        """
+        Save generation manifest, the file is replaced at once
+        """
+        path = settings.PLSQL_SCHEMA_ROOT + settings.ORA_SCHEMA + '/' + self.MANIFEST
+        f = open(path + '.tmp', 'w')
+        json.dump(manifest, f, indent=1, sort_keys=True)
+        f.close()
+        os.rename(path + '.tmp', path)
+
     def _make_initpy(self, root):
         f = open(root + '/__init__.py', 'w')
         f.close()
\ No newline at end of file
@@ -0,0 +1,408 @@
+"""
+Benchmarks of parser, generation, calls of generated packages, cursor fetches
+and streaming of pipelined functions.
+
+Runs offline with plsql.fakeora instead of Oracle, round trips can take
+simulated latency. Results are written as JSON and can be compared with
+results of previous run:
+
+    python bench.py --output before.json
+    python bench.py --compare before.json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plsql import fakeora
+cx_Oracle = fakeora.install()
+
+from plsql import settings
+from plsql.base import Schema, generate_package
+from plsql.cursor import Cursor
+from plsql.parser import PlSqlParser
+
+clock = getattr(time, 'perf_counter', time.time)
+
+"""
+Sizes of benchmarks: members of parsed specification, generated packages and
+their members, number of calls and fetched rows
+"""
+SIZES = {
+    'parse_members' : 2000,
+    'packages' : 50,
+    'package_members' : 100,
+    'calls' : 10000,
+    'rows' : 100000,
+}
+
+QUICK_SIZES = {
+    'parse_members' : 200,
+    'packages' : 5,
+    'package_members' : 20,
+    'calls' : 500,
+    'rows' : 5000,
+}
+
+"""
+Default simulated latency of round trip in seconds
+"""
+LATENCY = 0.0005
+
+"""
+Default relative change of metric reported as regression
+"""
+THRESHOLD = 0.1
+
+BENCH_PACKAGE = 'BENCH_PACKAGE'
+
+DESCRIPTION = [
+    ('ID', cx_Oracle.NUMBER, 10, 22, 10, 0, 0),
+    ('NAME', cx_Oracle.STRING, 30, 30, None, None, 1),
+    ('AMOUNT', cx_Oracle.NUMBER, 20, 22, 0, -127, 1),
+    ('CREATED', cx_Oracle.DATETIME, 23, 7, None, None, 1),
+]
+
+
+def synthetic_spec(name, members):
+    """
+    Function to make package specification with given number of members.
+    Members are functions f_N, procedures p_N, ref cursor functions c_N and
+    constants k_N in turn
+    """
+    lines = ['create or replace package {0} as'.format(name)]
+    for index in range(members):
+        kind = index % 4
+        if kind == 0:
+            lines.append('    -- function {0}\n'
+                         '    function f_{0}(p_id in number, p_name varchar2 := null) return number;'.format(index))
+        elif kind == 1:
+            lines.append('    procedure p_{0}(p_id in number, p_result out varchar2);'.format(index))
+        elif kind == 2:
+            lines.append('    function c_{0}(p_id number default 10) return sys_refcursor;'.format(index))
+        else:
+            lines.append("    k_{0} constant varchar2(20) := 'value {0}';".format(index))
+    lines.append('end {0};'.format(name))
+    return '\n'.join(lines) + '\n'
+
+
+def best(function, repeat=3):
+    # Function to get the best time of several runs of function
+    times = []
+    for index in range(repeat):
+        started = clock()
+        function()
+        times.append(clock() - started)
+    return min(times)
+
+
+def peak_memory(function):
+    """
+    Function to get peak of memory allocated by function in bytes,
+    None without tracemalloc (python 2)
+    """
+    try:
+        import tracemalloc
+    except ImportError:
+        function()
+        return None
+
+    tracemalloc.start()
+    try:
+        function()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+class MemoryDBA(object):
+    """
+    Class implements access to package specifications kept in memory
+    """
+    def __init__(self, sources):
+        self.sources = sources
+
+    def get_packages(self, names=None):
+        now = datetime.datetime.now()
+        return [(name, now) for name in sorted(self.sources) if names is None or name in names]
+
+    def get_spec_sources(self, names):
+        return dict((name, self.sources[name]) for name in names)
+
+
+class MemorySchemaIO(object):
+    """
+    Class implements storage of generated modules in memory
+    """
+    def __init__(self):
+        self.modules = {}
+        self.manifest = {}
+
+    def check_packages_storage(self):
+        pass
+
+    def save_package(self, fname, content):
+        self.modules[fname] = content
+
+    def remove_package(self, fname):
+        self.modules.pop(fname, None)
+
+    def load_manifest(self):
+        return self.manifest
+
+    def save_manifest(self, manifest):
+        self.manifest = manifest
+
+
+def bench_parse(sizes, repeat=3):
+    """
+    Function to measure PlSqlParser throughput on large specification
+    """
+    spec = synthetic_spec(BENCH_PACKAGE, sizes['parse_members'])
+    parser = PlSqlParser()
+    seconds = best(lambda: parser.get_package_members(spec), repeat)
+    return {
+        'members' : sizes['parse_members'],
+        'bytes' : len(spec),
+        'seconds' : seconds,
+        'members_per_second' : sizes['parse_members'] / seconds,
+        'bytes_per_second' : len(spec) / seconds,
+    }
+
+
+def bench_generate(sizes, workers=1, repeat=1):
+    """
+    Function to measure Schema generation time per package
+    """
+    sources = {}
+    for index in range(sizes['packages']):
+        name = '{0}_{1}'.format(BENCH_PACKAGE, index)
+        sources[name] = synthetic_spec(name, sizes['package_members'])
+
+    def generate():
+        schema = Schema(None)
+        schema.dba = MemoryDBA(sources)
+        schema.fs = MemorySchemaIO()
+        schema.generate_packages(workers=workers, incremental=False)
+
+    packages = settings.PLSQL_PACKAGES
+    settings.PLSQL_PACKAGES = list(sources)
+    try:
+        seconds = best(generate, repeat)
+    finally:
+        settings.PLSQL_PACKAGES = packages
+
+    return {
+        'packages' : sizes['packages'],
+        'members' : sizes['package_members'],
+        'workers' : workers,
+        'emitter' : settings.PLSQL_EMITTER,
+        'seconds' : seconds,
+        'seconds_per_package' : seconds / sizes['packages'],
+    }
+
+
+def bench_package(database):
+    """
+    Function to generate package class of synthetic specification connected to fake database
+    """
+    package, source, async_source = generate_package(((BENCH_PACKAGE, None), synthetic_spec(BENCH_PACKAGE, 4),
+                                                      False, None))
+    namespace = {}
+    exec(source, namespace)
+    cls = namespace[BENCH_PACKAGE.lower()]
+    cls.connection = database.connect()
+
+    name = BENCH_PACKAGE.lower()
+    database.functions[name + '.f_0'] = lambda p_id, p_name: p_id.getvalue() + 1
+    database.functions[name + '.p_1'] = lambda p_id, p_result: p_result.setvalue(0, str(p_id.getvalue()))
+    return cls
+
+
+def bench_call(sizes, latency=0.0):
+    """
+    Function to measure overhead of calls of generated package per call,
+    round trips take latency seconds
+    """
+    database = fakeora.Database(latency=latency)
+    package = bench_package(database)
+    calls = sizes['calls'] if not latency else max(1, sizes['calls'] // 100)
+
+    def functions():
+        for index in range(calls):
+            package.f_0(index, 'name')
+
+    def procedures():
+        for index in range(calls):
+            package.p_1(index)
+
+    def bulk():
+        package.f_0.many([(index, 'name') for index in range(calls)])
+
+    results = {'latency' : latency, 'calls' : calls}
+    for name, function in (('function', functions), ('procedure', procedures), ('bulk', bulk)):
+        database.round_trips = 0
+        seconds = best(function, 1)
+        results[name] = {
+            'seconds_per_call' : seconds / calls,
+            'calls_per_second' : calls / seconds,
+            'round_trips' : database.round_trips,
+        }
+    return results
+
+
+def bench_fetch(sizes, latency=0.0):
+    """
+    Function to measure Cursor fetch throughput and memory for shapes of rows
+    """
+    database = fakeora.Database(latency=latency)
+    created = datetime.datetime(2012, 1, 1)
+    rows = [(index, 'name {0}'.format(index), index * 1.5, created) for index in range(sizes['rows'])]
+
+    results = {'rows' : len(rows), 'latency' : latency}
+    for shape in ('dict', 'tuple', 'namedtuple', 'record'):
+        def fetch():
+            cursor = Cursor(database.result(DESCRIPTION, rows).open(database.connect()), rows=shape)
+            cursor.fetch_all()
+
+        database.round_trips = 0
+        seconds = best(fetch, 1)
+        results[shape] = {
+            'seconds' : seconds,
+            'rows_per_second' : len(rows) / seconds,
+            'round_trips' : database.round_trips,
+            'peak_memory' : peak_memory(fetch),
+        }
+    return results
+
+
+def bench_stream(sizes, latency=0.0):
+    """
+    Function to measure streaming of rows of pipelined function, rows are
+    produced by generator and memory doesn't depend on number of rows
+    """
+    spec = 'create or replace package {0} as\n' \
+           '    function pipe_rows(p_count number) return t_rows pipelined;\n' \
+           'end {0};\n'.format(BENCH_PACKAGE)
+    package, source, async_source = generate_package(((BENCH_PACKAGE, None), spec, False, None))
+    namespace = {}
+    exec(source, namespace)
+    cls = namespace[BENCH_PACKAGE.lower()]
+
+    created = datetime.datetime(2012, 1, 1)
+    database = fakeora.Database(latency=latency)
+    database.functions[BENCH_PACKAGE.lower() + '.pipe_rows'] = lambda p_count: database.result(DESCRIPTION, (
+        (index, 'name {0}'.format(index), index * 1.5, created) for index in range(p_count.getvalue())))
+    cls.connection = database.connect()
+
+    def stream():
+        for row in cls.pipe_rows(sizes['rows']):
+            pass
+
+    database.round_trips = 0
+    seconds = best(stream, 1)
+    return {
+        'rows' : sizes['rows'],
+        'latency' : latency,
+        'seconds' : seconds,
+        'rows_per_second' : sizes['rows'] / seconds,
+        'round_trips' : database.round_trips,
+        'peak_memory' : peak_memory(stream),
+    }
+
+
+def run(sizes=SIZES, latency=LATENCY, workers=1):
+    """
+    Function to run all benchmarks. Return dictionary of results
+    """
+    return {
+        'python' : platform.python_version(),
+        'driver' : cx_Oracle.__name__,
+        'created' : datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'sizes' : sizes,
+        'results' : {
+            'parse' : bench_parse(sizes),
+            'generate' : bench_generate(sizes, workers),
+            'call' : bench_call(sizes),
+            'call_latency' : bench_call(sizes, latency),
+            'fetch' : bench_fetch(sizes),
+            'fetch_latency' : bench_fetch(sizes, latency),
+            'stream' : bench_stream(sizes),
+        },
+    }
+
+
+def metrics(results, prefix=''):
+    # Function to flatten nested results to dictionary of dotted names and numbers
+    flat = {}
+    for name, value in results.items():
+        if isinstance(value, dict):
+            flat.update(metrics(value, prefix + name + '.'))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[prefix + name] = value
+    return flat
+
+
+def compare(current, baseline, threshold=THRESHOLD):
+    """
+    Function to compare results with baseline results. Times (seconds) must not
+    grow and rates (per_second) must not fall by more than threshold.
+    Return list of tuples (metric, baseline value, current value) of regressions
+    """
+    current = metrics(current['results'])
+    baseline = metrics(baseline['results'])
+
+    regressions = []
+    for name in sorted(set(current) & set(baseline)):
+        before, after = baseline[name], current[name]
+        if not before:
+            continue
+        if name.endswith('per_second'):
+            regressed = after < before * (1 - threshold)
+        elif 'seconds' in name.split('.')[-1]:
+            regressed = after > before * (1 + threshold)
+        else:
+            continue
+        if regressed:
+            regressions.append((name, before, after))
+    return regressions
+
+
+def main(argv=None):
+    arguments = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    arguments.add_argument('--quick', action='store_true', help='use small sizes')
+    arguments.add_argument('--latency', type=float, default=LATENCY, help='seconds of simulated round trip')
+    arguments.add_argument('--workers', type=int, default=1, help='processes of generation')
+    arguments.add_argument('--output', help='file to write JSON results')
+    arguments.add_argument('--compare', help='JSON results of previous run')
+    arguments.add_argument('--threshold', type=float, default=THRESHOLD, help='relative change reported as regression')
+    options = arguments.parse_args(argv)
+
+    results = run(QUICK_SIZES if options.quick else SIZES, options.latency, options.workers)
+
+    output = json.dumps(results, indent=1, sort_keys=True)
+    if options.output:
+        f = open(options.output, 'w')
+        f.write(output)
+        f.close()
+    else:
+        print(output)
+
+    if options.compare:
+        f = open(options.compare)
+        baseline = json.load(f)
+        f.close()
+        regressions = compare(results, baseline, options.threshold)
+        for name, before, after in regressions:
+            sys.stderr.write('regression {0}: {1:.6g} -> {2:.6g}\n'.format(name, before, after))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
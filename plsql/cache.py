@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+
+"""
+Default maximum number of results kept for a function
+"""
+DEFAULT_SIZE = 128
+
+
+class ResultCache(object):
+    """
+    Class implements LRU cache of results of package function with optional
+    time to live. Results are keyed by values of IN arguments
+    """
+    def __init__(self, ttl=None, size=DEFAULT_SIZE):
+        """
+        Constructor.
+
+        Parameters:
+        ttl        - seconds while result is valid, None means until evicted
+        size       - maximum number of kept results
+        """
+        self.ttl = ttl
+        self.size = size
+        self.results = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """
+        Function to get cached result. Return tuple (found, result)
+        """
+        with self.lock:
+            try:
+                expires, result = self.results.pop(key)
+            except KeyError:
+                self.misses += 1
+                return False, None
+            except TypeError:
+                # unhashable arguments are never cached
+                self.misses += 1
+                return False, None
+
+            if expires is not None and expires <= time.time():
+                self.misses += 1
+                return False, None
+
+            self.results[key] = (expires, result)
+            self.hits += 1
+            return True, result
+
+    def put(self, key, result):
+        with self.lock:
+            expires = time.time() + self.ttl if self.ttl is not None else None
+            try:
+                self.results.pop(key, None)
+                self.results[key] = (expires, result)
+            except TypeError:
+                return
+
+            while len(self.results) > self.size:
+                self.results.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.results.clear()
+
+    def statistics(self):
+        """
+        Function to get dictionary with numbers of hits, misses, evictions and kept results
+        """
+        with self.lock:
+            return {
+                'hits' : self.hits,
+                'misses' : self.misses,
+                'evictions' : self.evictions,
+                'size' : len(self.results),
+            }
+
+    def __repr__(self):
+        return "<ResultCache ttl={0} size={1}/{2}>".format(self.ttl, len(self.results), self.size)
+
+
+def _caches(package):
+    # Function to get result caches of members of generated package class
+    caches = {}
+    for name, value in vars(package).items():
+        cache = getattr(value, 'result_cache', None)
+        if cache is not None:
+            caches[name] = cache
+    return caches
+
+
+def invalidate(package, member=None):
+    """
+    Function to drop cached results of package functions
+
+    Parameters:
+    package    - generated package class
+    member     - function name, all functions of package by default
+    """
+    for name, cache in _caches(package).items():
+        if member is None or name.lower() == member.lower():
+            cache.clear()
+
+
+def statistics(package):
+    """
+    Function to get cache statistics of package functions, dictionary keyed by function name
+    """
+    return dict((name, cache.statistics()) for name, cache in _caches(package).items())
@@ -0,0 +1,474 @@
+import array
+import datetime
+import keyword
+import re
+from collections import namedtuple
+
+import cx_Oracle
+
+from plsql import stats
+from plsql.lob import MAX_NATIVE_INT_PRECISION, inline_lob_column, lob_value, output_type_handler
+
+"""
+Number of rows fetched per round trip when nothing else is configured
+"""
+DEFAULT_ARRAYSIZE = 100
+
+"""
+Value of arraysize to tune size of batches by observed row width
+"""
+AUTO_ARRAYSIZE = 'auto'
+
+"""
+Shapes of rows returned by Cursor
+"""
+ROWS_DICT = 'dict'
+ROWS_TUPLE = 'tuple'
+ROWS_NAMEDTUPLE = 'namedtuple'
+ROWS_RECORD = 'record'
+
+"""
+Row classes generated for namedtuple and record shapes, key is (shape, column names)
+"""
+_row_classes = {}
+
+"""
+Kinds of columns in columnar fetch mode
+"""
+COLUMN_INT = 'int'
+COLUMN_FLOAT = 'float'
+COLUMN_DATETIME = 'datetime'
+COLUMN_OBJECT = 'object'
+
+"""
+array.array type codes and NumPy dtypes of column kinds.
+Dates are stored as microseconds since EPOCH in array.array columns
+"""
+ARRAY_TYPECODES = {
+    COLUMN_INT      : 'q' if 'q' in getattr(array, 'typecodes', '') else 'l',
+    COLUMN_FLOAT    : 'd',
+    COLUMN_DATETIME : 'q' if 'q' in getattr(array, 'typecodes', '') else 'l',
+}
+
+NUMPY_DTYPES = {
+    COLUMN_INT      : 'int64',
+    COLUMN_FLOAT    : 'float64',
+    COLUMN_DATETIME : 'datetime64[us]',
+    COLUMN_OBJECT   : 'object',
+}
+
+EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def _field_names(description):
+    """
+    Function to make python identifiers from column names of cursor description
+    """
+    names = []
+    for desc in description:
+        name = re.sub('\W', '_', desc[0].lower())
+        if not re.match('[a-z]', name) or keyword.iskeyword(name) or name in names:
+            name = 'col{0}_{1}'.format(len(names), name)
+        names.append(name)
+    return tuple(names)
+
+
+def _make_record_class(names):
+    """
+    Function to generate class with __slots__ for rows with given columns
+    """
+    source = """
+class Record(object):
+    __slots__ = {names!r}
+    _fields = {names!r}
+
+    def __init__(self, {args}):
+        {assignments}
+
+    def __iter__(self):
+        return iter(({values},))
+
+    def __getitem__(self, index):
+        return getattr(self, self._fields[index])
+
+    def __eq__(self, other):
+        return isinstance(other, Record) and tuple(self) == tuple(other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return 'Record(' + ', '.join(
+            '{{0}}={{1!r}}'.format(name, getattr(self, name)) for name in self._fields
+        ) + ')'
+""".format(
+        names=names,
+        args=', '.join(names),
+        assignments='\n        '.join('self.{0} = {0}'.format(name) for name in names),
+        values=', '.join('self.{0}'.format(name) for name in names),
+    )
+    namespace = {}
+    exec(source, namespace)
+    return namespace['Record']
+
+
+def _row_class(rows, names):
+    """
+    Function to get cached row class for shape and column names
+    """
+    key = (rows, names)
+    if key not in _row_classes:
+        if rows == ROWS_NAMEDTUPLE:
+            _row_classes[key] = namedtuple('Row', names)
+        else:
+            _row_classes[key] = _make_record_class(names)
+    return _row_classes[key]
+
+
+def row_factory(description, rows=ROWS_DICT, lob_inline_size=None, inline_lobs=None, name=None, checkout=None):
+    """
+    Function to compile converter of fetched rows for cursor description.
+
+    Converter is built once per cursor and takes the whole batch of rows
+    returned by fetchmany(), so per row work is limited to building the row.
+
+    Parameters:
+    description     - cx_Oracle cursor description
+    rows            - shape of rows: 'dict', 'tuple', 'namedtuple' or 'record'
+    lob_inline_size - LOB columns bigger than this are returned as LobStream
+    inline_lobs     - inline_lobs option of output type handler of the cursor,
+                      LOB columns fetched as str/bytes need no conversion
+    name            - package.member returned the cursor, label of LOB reads in plsql.stats
+    checkout        - plsql.runtime.Checkout of the call, returned LobStreams
+                      keep the connection checked out until they are read
+    """
+    lobs = [index for index, desc in enumerate(description)
+            if desc[1] in (cx_Oracle.CLOB, cx_Oracle.NCLOB, cx_Oracle.BLOB)
+            and not inline_lob_column(desc[1], desc[3], inline_lobs)]
+
+    def read_lobs(batch):
+        result = []
+        for row in batch:
+            row = list(row)
+            for index in lobs:
+                row[index] = lob_value(row[index], lob_inline_size, name, checkout)
+            result.append(tuple(row))
+        return result
+
+    if rows == ROWS_DICT:
+        names = tuple(desc[0].lower() for desc in description)
+        if lobs:
+            return lambda batch: [dict(zip(names, row)) for row in read_lobs(batch)]
+        return lambda batch: [dict(zip(names, row)) for row in batch]
+
+    if rows == ROWS_TUPLE:
+        if lobs:
+            return read_lobs
+        return lambda batch: batch
+
+    if rows in (ROWS_NAMEDTUPLE, ROWS_RECORD):
+        cls = _row_class(rows, _field_names(description))
+        if rows == ROWS_NAMEDTUPLE:
+            make = lambda row: tuple.__new__(cls, row)
+        else:
+            make = lambda row: cls(*row)
+        if lobs:
+            return lambda batch: [make(row) for row in read_lobs(batch)]
+        return lambda batch: [make(row) for row in batch]
+
+    raise ValueError("Unknown shape of rows: {0}".format(rows))
+
+
+def column_kind(desc):
+    """
+    Function to get kind of column in columnar fetch mode from cursor description item.
+    Integers wider than MAX_NATIVE_INT_PRECISION digits do not fit int64 and are kept as objects
+    """
+    oratype, precision, scale = desc[1], desc[4], desc[5]
+    if oratype is cx_Oracle.NUMBER:
+        if scale == 0 and precision:
+            if precision <= MAX_NATIVE_INT_PRECISION:
+                return COLUMN_INT
+            return COLUMN_OBJECT
+        return COLUMN_FLOAT
+    if oratype is getattr(cx_Oracle, 'NATIVE_FLOAT', None):
+        return COLUMN_FLOAT
+    if oratype in (cx_Oracle.DATETIME, cx_Oracle.TIMESTAMP):
+        return COLUMN_DATETIME
+    return COLUMN_OBJECT
+
+
+def _microseconds(value):
+    # Function to convert datetime to microseconds since EPOCH
+    delta = value - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+
+class _ArrayColumn(object):
+    """
+    Class to collect values of column into array.array with null mask
+    """
+    def __init__(self, kind):
+        self.kind = kind
+        if kind == COLUMN_OBJECT:
+            self.values = []
+        else:
+            self.values = array.array(ARRAY_TYPECODES[kind])
+        self.mask = array.array('B')
+
+    def extend(self, values):
+        self.mask.extend([value is None for value in values])
+        if self.kind == COLUMN_OBJECT:
+            self.values.extend(values)
+        elif self.kind == COLUMN_DATETIME:
+            self.values.extend([0 if value is None else _microseconds(value) for value in values])
+        elif None in values:
+            self.values.extend([0 if value is None else value for value in values])
+        else:
+            self.values.extend(values)
+
+    def result(self):
+        return self.values, self.mask
+
+
+class _NumpyColumn(object):
+    """
+    Class to collect values of column into NumPy arrays with null mask
+    """
+    def __init__(self, kind, numpy):
+        self.kind = kind
+        self.numpy = numpy
+        self.chunks = []
+        self.masks = []
+
+    def extend(self, values):
+        numpy = self.numpy
+        values = numpy.array(values, dtype=object)
+        mask = numpy.equal(values, None)
+        if self.kind != COLUMN_OBJECT:
+            values[mask] = 0 if self.kind != COLUMN_DATETIME else EPOCH
+        self.chunks.append(values.astype(NUMPY_DTYPES[self.kind]))
+        self.masks.append(mask.astype(bool))
+
+    def result(self):
+        numpy = self.numpy
+        if not self.chunks:
+            return numpy.array([], dtype=NUMPY_DTYPES[self.kind]), numpy.array([], dtype=bool)
+        return numpy.concatenate(self.chunks), numpy.concatenate(self.masks)
+
+
+class Cursor(object):
+    """
+    Class to wrap cursor returned by PL/SQL function or procedure.
+
+    Rows are fetched from the server in batches of arraysize rows.
+    Cursor supports iteration and can be used as context manager,
+    the server cursor is closed when all rows are fetched, on exit or
+    when the cursor is garbage collected.
+    """
+
+    """
+    Parameters of arraysize auto tuning: approximate size of one batch in bytes
+    and bounds for the calculated number of rows
+    """
+    FETCH_BUFFER_SIZE = 1024 * 1024
+    MIN_ARRAYSIZE = 10
+    MAX_ARRAYSIZE = 10000
+
+    def __init__(self, cursor, arraysize=DEFAULT_ARRAYSIZE, rows=ROWS_DICT, lob_inline_size=None,
+                 inline_lobs=None, numbers=None, checkout=None, name=None):
+        """
+        Constructor.
+
+        Parameters:
+        cursor          - cx_Oracle cursor
+        arraysize       - number of rows fetched per round trip or 'auto'
+        rows            - shape of rows: 'dict', 'tuple', 'namedtuple' or 'record'
+        lob_inline_size - LOB columns bigger than this are returned as LobStream,
+                          None means read all LOB columns
+        inline_lobs     - fetch LOB columns together with rows, see plsql.lob.output_type_handler
+        numbers         - 'auto' to map NUMBER columns by precision and scale
+        checkout        - plsql.runtime.Checkout of the call, connection is
+                          kept checked out until the cursor is closed
+        name            - package.member returned the cursor, label of fetches in plsql.stats
+        """
+        self.cursor = cursor
+        self.name = name
+        self.descs = self.cursor.description
+        self.lob_inline_size = lob_inline_size
+        self.inline_lobs = inline_lobs
+        self.make_rows = row_factory(self.descs, rows, lob_inline_size, inline_lobs, name, checkout)
+
+        self.checkout = checkout
+        if checkout is not None:
+            checkout.hold()
+        self.closed = False
+
+        # defines of ref cursor are made on the first fetch, so handler is still in time
+        if inline_lobs or numbers:
+            self.cursor.outputtypehandler = output_type_handler(inline_lobs, numbers)
+
+        self.autotune = arraysize == AUTO_ARRAYSIZE
+        if self.autotune:
+            arraysize = DEFAULT_ARRAYSIZE
+        self.arraysize = arraysize
+        self.cursor.arraysize = arraysize
+
+        # rows fetched from the server but not returned by next() yet
+        self._buffer = []
+        self._position = 0
+
+    def _fetch(self, size=None):
+        """
+        Function to fetch next batch of rows from the server.
+        Return empty list and close the cursor when there are no more rows
+        """
+        if self.closed:
+            return []
+
+        if stats.active and self.name is not None:
+            with stats.measure(self.name, stats.FETCH) as event:
+                rows = self.cursor.fetchmany(size or self.arraysize)
+                event.rows = len(rows)
+        else:
+            rows = self.cursor.fetchmany(size or self.arraysize)
+        if not rows:
+            self.close()
+            return rows
+
+        if self.autotune:
+            self._tune_arraysize(rows[0])
+
+        return rows
+
+    def _tune_arraysize(self, row):
+        """
+        Function to calculate arraysize from the width of the first fetched row
+        """
+        width = 0
+        for value in row:
+            try:
+                width += len(value)
+            except TypeError:
+                # numbers, dates, LOB locators and NULLs
+                width += 16
+
+        arraysize = self.FETCH_BUFFER_SIZE // max(width, 1)
+        self.arraysize = max(self.MIN_ARRAYSIZE, min(self.MAX_ARRAYSIZE, arraysize))
+        self.cursor.arraysize = self.arraysize
+        self.autotune = False
+
+    def next(self):
+        """
+        Function to get next row. Return None when there are no more rows
+        """
+        if self._position >= len(self._buffer):
+            self._buffer = self._fetch()
+            self._position = 0
+            if not self._buffer:
+                return None
+
+        row = self._buffer[self._position]
+        self._position += 1
+        return self.make_rows([row])[0]
+
+    def fetch_many(self, size=None):
+        """
+        Function to get next batch of rows. Return empty list when there are no more rows
+
+        Parameters:
+        size       - maximum number of rows, arraysize by default
+        """
+        size = size or self.arraysize
+
+        rows = self._buffer[self._position:self._position + size]
+        self._position += len(rows)
+        if len(rows) < size:
+            rows.extend(self._fetch(size - len(rows)))
+
+        return self.make_rows(rows)
+
+    def fetch_all(self):
+        result = []
+
+        batch = self.fetch_many()
+        while batch:
+            result.extend(batch)
+            batch = self.fetch_many()
+
+        return result
+
+    def fetch_columns(self, numpy=False):
+        """
+        Function to fetch all remaining rows into per column arrays without building rows.
+
+        NUMBER columns with zero scale are stored as 64-bit integers, other NUMBER
+        columns as doubles, DATE and TIMESTAMP columns as microseconds since EPOCH
+        (datetime64[us] with NumPy), other columns are kept as lists of objects.
+        NULL values are stored as zeros and marked in the null mask.
+
+        Parameters:
+        numpy      - build NumPy arrays instead of array.array, requires NumPy
+
+        Return tuple (columns, masks) of dictionaries keyed by column name
+        """
+        if numpy:
+            import numpy
+            make_column = lambda kind: _NumpyColumn(kind, numpy)
+        else:
+            make_column = _ArrayColumn
+
+        names = [desc[0].lower() for desc in self.descs]
+        columns = [make_column(column_kind(desc)) for desc in self.descs]
+        read_lobs = row_factory(self.descs, ROWS_TUPLE, self.lob_inline_size, self.inline_lobs, self.name,
+                                self.checkout)
+
+        rows = self._buffer[self._position:]
+        self._buffer = []
+        self._position = 0
+        if not rows:
+            rows = self._fetch()
+
+        while rows:
+            for column, values in zip(columns, zip(*read_lobs(rows))):
+                column.extend(list(values))
+            rows = self._fetch()
+
+        results = [column.result() for column in columns]
+        return (
+            dict((name, result[0]) for name, result in zip(names, results)),
+            dict((name, result[1]) for name, result in zip(names, results)),
+        )
+
+    def __iter__(self):
+        batch = self.fetch_many()
+        while batch:
+            for row in batch:
+                yield row
+            batch = self.fetch_many()
+
+    def close(self):
+        """
+        Function to close the server cursor
+        """
+        if self.closed:
+            return
+
+        self.closed = True
+        self._buffer = []
+        self._position = 0
+        self.cursor.close()
+        if self.checkout is not None:
+            self.checkout.done()
+
+    def __del__(self):
+        # cursor dropped without close() gives its connection back to the pool too
+        if not getattr(self, 'closed', True):
+            self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
@@ -1,16 +1,173 @@
 import os
 import re
+import threading
+import time
 import cx_Oracle
 
 class OracleHomeError(EnvironmentError):
     pass
 
-class FileNotFoundError(StandardError):
+class FileNotFoundError(Exception):
     pass
 
-class SIDNotFound(StandardError):
+class SIDNotFound(Exception):
     pass
 
+class PoolTimeout(Exception):
+    pass
+
+"""
+Strategies of connect-time failover between addresses of service:
+sequential tries addresses one by one starting from the last working one,
+parallel connects to all addresses at once and keeps the fastest one
+"""
+FAILOVER_SEQUENTIAL = 'sequential'
+FAILOVER_PARALLEL = 'parallel'
+
+"""
+Tokens of tnsnames.ora: comments, parentheses, '=', ',' and values
+"""
+TNS_TOKENS = re.compile(r'''
+      (?P<space>\s+)
+    | (?P<comment>\#[^\n]*)
+    | (?P<symbol>[()=,])
+    | (?P<value>"[^"]*"|'[^']*'|[^\s()=,\#]+)
+''', re.X)
+
+"""
+Parsed tnsnames.ora files, path: (mtime, size, services)
+"""
+_tnsnames = {}
+_tnsnames_lock = threading.Lock()
+
+"""
+Addresses of services which connected last time, sid: descriptor
+"""
+_preferred = {}
+_preferred_lock = threading.Lock()
+
+
+def parse_descriptors(text):
+    """
+    Function to parse tnsnames.ora content
+
+    Parameters:
+    text      - content of tnsnames.ora
+
+    Return dictionary of uppercased service name and its descriptor. Descriptor
+    is tuple (keyword, value), value is string or list of nested descriptors:
+    ('DESCRIPTION', [('ADDRESS_LIST', [('ADDRESS', [('HOST', 'db1'), ...]), ...]), ...])
+    """
+    tokens = [(match.lastgroup, match.group()) for match in TNS_TOKENS.finditer(text)
+              if match.lastgroup not in ('space', 'comment')]
+    position = [0]
+
+    def token(expected=None):
+        if position[0] >= len(tokens):
+            raise ValueError("unexpected end of tnsnames.ora")
+        kind, value = tokens[position[0]]
+        if expected is not None and value != expected:
+            raise ValueError("'{0}' expected instead of '{1}' in tnsnames.ora".format(expected, value))
+        position[0] += 1
+        return value
+
+    def node():
+        # (KEYWORD = value) or (KEYWORD = (...)(...))
+        token('(')
+        keyword = token().upper()
+        token('=')
+        if tokens[position[0]][1] == '(':
+            children = []
+            while tokens[position[0]][1] == '(':
+                children.append(node())
+            token(')')
+            return keyword, children
+        words = []
+        while tokens[position[0]][1] != ')':
+            words.append(token())
+        token(')')
+        return keyword, ' '.join(words)
+
+    services = {}
+    try:
+        while position[0] < len(tokens):
+            names = [token().upper()]
+            while tokens[position[0]][1] == ',':
+                token(',')
+                names.append(token().upper())
+            token('=')
+            if tokens[position[0]][1] == '(':
+                descriptor = node()
+            else:
+                descriptor = token()
+            for name in names:
+                services[name] = descriptor
+    except IndexError:
+        raise ValueError("unexpected end of tnsnames.ora")
+    return services
+
+
+def format_descriptor(descriptor):
+    """
+    Function to make connect descriptor string from parsed descriptor
+    """
+    if not isinstance(descriptor, tuple):
+        return descriptor
+    keyword, value = descriptor
+    if isinstance(value, list):
+        value = ''.join(format_descriptor(child) for child in value)
+    return "({0}={1})".format(keyword, value)
+
+
+def split_addresses(descriptor):
+    """
+    Function to split descriptor to descriptors with one address each,
+    nested ADDRESS_LIST and DESCRIPTION_LIST are flattened in order of addresses
+    """
+    if not isinstance(descriptor, tuple):
+        return [descriptor]
+
+    keyword, value = descriptor
+    if keyword == 'DESCRIPTION_LIST':
+        return sum([split_addresses(child) for child in value if child[0] == 'DESCRIPTION'], [])
+    if keyword != 'DESCRIPTION':
+        return [descriptor]
+
+    def addresses(nodes):
+        result = []
+        for child in nodes:
+            if child[0] == 'ADDRESS':
+                result.append(child)
+            elif child[0] == 'ADDRESS_LIST':
+                result.extend(addresses(child[1]))
+        return result
+
+    params = [child for child in value if child[0] not in ('ADDRESS', 'ADDRESS_LIST')]
+    return [('DESCRIPTION', [address] + params) for address in addresses(value)] or [descriptor]
+
+
+def load_tnsnames(path):
+    """
+    Function to get services of tnsnames.ora. Parsed file is cached by the
+    process until its modification time or size is changed
+    """
+    stat = os.stat(path)
+    with _tnsnames_lock:
+        cached = _tnsnames.get(path)
+        if cached is not None and cached[:2] == (stat.st_mtime, stat.st_size):
+            return cached[2]
+
+    f = open(path, 'r')
+    try:
+        services = parse_descriptors(f.read())
+    finally:
+        f.close()
+
+    with _tnsnames_lock:
+        _tnsnames[path] = (stat.st_mtime, stat.st_size, services)
+    return services
+
+
 class TnsOra(object):
     TNSNAMES_PATH = '/network/admin/tnsnames.ora'
 
@@ -20,116 +177,610 @@ class TnsOra(object):
 
     def initialize(self):
         """
-        Function tries to find tnsnames.ora and retrieve services
+        Function tries to find tnsnames.ora and retrieve services.
+        $TNS_ADMIN/tnsnames.ora is used when TNS_ADMIN is set
         """
-        if not os.environ['ORACLE_HOME']:
+        if os.environ.get('TNS_ADMIN'):
+            path = os.path.join(os.environ['TNS_ADMIN'], 'tnsnames.ora')
+        elif os.environ.get('ORACLE_HOME'):
+            path = os.environ['ORACLE_HOME'] + TnsOra.TNSNAMES_PATH
+        else:
             raise OracleHomeError()
 
-        if not os.path.exists(os.environ['ORACLE_HOME'] + TnsOra.TNSNAMES_PATH):
+        if not os.path.exists(path):
             raise FileNotFoundError()
 
-        f = open(os.environ['ORACLE_HOME'] + TnsOra.TNSNAMES_PATH, 'r')
+        self.services = load_tnsnames(path)
 
-        # Flag that it's stated service description
-        service_begin = False
-        # array of service descriptions
-        service = list()
+    def descriptor(self, sid):
+        # Function to get parsed descriptor of service
+        if sid.upper() not in self.services:
+            raise SIDNotFound()
+        return self.services[sid.upper()]
 
-        service_name = ''
+    def get(self, sid):
+        """
+        Function to get connection string by service name
 
-        for line in f.readlines():
-            # Skip comments and new line symbols
-            if re.match('^#', line) or re.match('\n', line):
-                continue
+        Parameter:
+        sid      - oracle service identifier
+        """
+        return format_descriptor(self.descriptor(sid))
 
-            line = line.replace('\n', '')
+    def addresses(self, sid):
+        """
+        Function to get connection strings of service with one address each
+        """
+        return [format_descriptor(descriptor) for descriptor in split_addresses(self.descriptor(sid))]
 
-            # try to find start of service description
-            result = re.match('\s*(\w+)\s*=', line)
-            if result:
-                # say that service description was started
-                service_begin = True
 
-                # save previous service descriprion
-                if len(service) > 0:
-                    self.services[service_name] = ''.join(service)
-                    service = []
+def connect_addresses(sid, addresses, connect, failover=FAILOVER_SEQUENTIAL, timeout=None):
+    """
+    Function to connect to one of addresses of service. Address which
+    connected last time is tried first, other addresses are tried when
+    it fails according to failover strategy
+
+    Parameters:
+    sid       - service name, key of remembered address
+    addresses - connection strings of service with one address each
+    connect   - callable getting connection string and returning connection
+    failover  - FAILOVER_SEQUENTIAL or FAILOVER_PARALLEL
+    timeout   - seconds to wait for parallel connects, None to wait forever
+    """
+    with _preferred_lock:
+        preferred = _preferred.get(sid)
+
+    errors = []
+    if preferred in addresses:
+        try:
+            return connect(preferred)
+        except cx_Oracle.DatabaseError as e:
+            errors.append(e)
+            # the others are tried starting from the next address
+            index = addresses.index(preferred)
+            addresses = addresses[index + 1:] + addresses[:index]
+
+    if failover == FAILOVER_PARALLEL and len(addresses) > 1:
+        address, connection, parallel_errors = _connect_parallel(addresses, connect, timeout)
+        errors.extend(parallel_errors)
+    else:
+        address, connection = None, None
+        for candidate in addresses:
+            try:
+                address, connection = candidate, connect(candidate)
+                break
+            except cx_Oracle.DatabaseError as e:
+                errors.append(e)
+
+    if connection is None:
+        if errors:
+            raise errors[-1]
+        raise cx_Oracle.DatabaseError("no address of {0} connected in time".format(sid))
+
+    with _preferred_lock:
+        _preferred[sid] = address
+    return connection
+
+
+def _connect_parallel(addresses, connect, timeout=None):
+    """
+    Function to connect to all addresses at once. The first connected
+    address wins, connections opened later are closed.
+    Return tuple (address, connection, errors), connection is None on failure
+    """
+    lock = threading.Lock()
+    done = threading.Event()
+    state = {'winner': (None, None), 'pending': len(addresses), 'errors': []}
+
+    def attempt(address):
+        try:
+            connection, error = connect(address), None
+        except Exception as e:
+            connection, error = None, e
+
+        with lock:
+            state['pending'] -= 1
+            if connection is not None and state['winner'][1] is None:
+                state['winner'] = (address, connection)
+                done.set()
+                return
+            if error is not None:
+                state['errors'].append(error)
+            if state['pending'] == 0:
+                done.set()
+
+        if connection is not None:
+            connection.close()
+
+    for address in addresses:
+        thread = threading.Thread(target=attempt, args=(address,))
+        thread.daemon = True
+        thread.start()
+
+    done.wait(timeout)
+    with lock:
+        address, connection = state['winner']
+        if connection is None:
+            # connections opened after timeout are closed by their threads
+            state['winner'] = (None, False)
+        return address, connection, list(state['errors'])
 
-                # save service name
-                service_name = result.group(1)
-            # skip first line of service description and save next lines
-            elif service_begin:
-                service.append(line)
 
-        # save last service description
-        if len(service) > 0:
-            self.services[service_name] = ''.join(service)
+class OraConnection(cx_Oracle.Connection):
+    @staticmethod
+    def connect(sid, login, password, failover=FAILOVER_SEQUENTIAL):
+        """
+        Function to connect to service from tnsnames.ora. Services with
+        several addresses are connected with failover, see connect_addresses
+
+        Parameters:
+        sid       - oracle service identifier
+        login     - user name
+        password  - password
+        failover  - FAILOVER_SEQUENTIAL, FAILOVER_PARALLEL or None to pass
+                    whole descriptor to the driver
+        """
+        tns = TnsOra()
+        addresses = tns.addresses(sid)
 
-        f.close()
+        def connect(service_description):
+            connection_string = "{0}/{1}@{2}".format(login, password, service_description)
+            return OraConnection(connection_string)
 
-    def get(self, sid):
-        """
-        Function to get connection string by service name
+        if failover is None or len(addresses) == 1:
+            return connect(tns.get(sid))
+        return connect_addresses(sid.upper(), addresses, connect, failover)
 
-        Parameter:
-        sid      - oracle service identifier
+
+class ConnectionPool(object):
+    """
+    Class implements thread safe pool of connections for generated packages.
+
+    Connections are checked out per call and returned to the pool afterwards.
+    Inside of "with pool.connection():" block all calls of the thread use
+    the same connection, e.g. for a web request. With per_thread=True every
+    thread keeps its connection until release_thread() is called.
+
+    Connection returns to idle ones when all its users released it: every
+    acquire() and the binding to the thread. Release of connection which is
+    not checked out is ignored
+    """
+    def __init__(self, connect, min_size=1, max_size=10, timeout=30, ping_interval=60,
+                 per_thread=False):
         """
-        if not self.services.has_key(sid):
-            raise SIDNotFound()
-        return self.services[sid]
+        Constructor.
+
+        Parameters:
+        connect        - callable without arguments returning new DB-API connection
+        min_size       - number of connections opened at once
+        max_size       - maximum number of connections
+        timeout        - seconds to wait for free connection, None to wait forever
+        ping_interval  - connections idle longer than this are checked before use
+        per_thread     - keep connection bound to the thread between calls
+        """
+        self.connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+        self.per_thread = per_thread
+
+        self._lock = threading.Condition()
+        # idle connections, list of (connection, time of release)
+        self._idle = []
+        # number of opened connections, idle and checked out
+        self._size = 0
+        # checked out connections, dictionary of id(connection) and [connection, number of users]
+        self._users = {}
+        self._local = threading.local()
+
+        for i in range(min_size):
+            with self._lock:
+                self._size += 1
+            self._idle.append((self._open(), time.time()))
 
-class OraConnection(cx_Oracle.Connection):
     @staticmethod
-    def connect(sid, login, password):
-        tns = TnsOra()
-        service_description = tns.get(sid)
-        connection_string = "{0}/{1}@{2}".format(login, password, service_description)
+    def create(sid, login, password, failover=FAILOVER_SEQUENTIAL, **kwargs):
+        """
+        Function to create pool of connections to Oracle service from tnsnames.ora
+        """
+        return ConnectionPool(lambda: OraConnection.connect(sid, login, password, failover), **kwargs)
+
+    def _open(self):
+        # Function to open new connection, its slot is counted in size by the caller
+        try:
+            return self.connect()
+        except:
+            self._discard(None)
+            raise
+
+    def _discard(self, connection):
+        # Function to close broken or unneeded connection
+        with self._lock:
+            self._size -= 1
+            self._lock.notify()
+
+        if connection is not None:
+            try:
+                connection.close()
+            except Exception:
+                pass
+
+    def _is_alive(self, connection, released):
+        """
+        Function to check connection which was idle longer than ping_interval
+        """
+        if self.ping_interval is None or time.time() - released < self.ping_interval:
+            return True
+
+        try:
+            if hasattr(connection, 'ping'):
+                connection.ping()
+            else:
+                cursor = connection.cursor()
+                cursor.execute("select 1 from dual")
+                cursor.close()
+        except Exception:
+            return False
+        return True
+
+    def acquire(self, timeout=None):
+        """
+        Function to check out connection from the pool
+
+        Parameters:
+        timeout    - seconds to wait for free connection, pool timeout by default
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            with self._lock:
+                self._users[id(connection)][1] += 1
+            return connection
+
+        if timeout is None:
+            timeout = self.timeout
+        deadline = None if timeout is None else time.time() + timeout
+
+        while True:
+            with self._lock:
+                while not self._idle and self._size >= self.max_size:
+                    if deadline is None:
+                        self._lock.wait()
+                        continue
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        raise PoolTimeout()
+                    self._lock.wait(remaining)
+
+                idle = self._idle.pop() if self._idle else None
+                if idle is None:
+                    # slot of new connection is reserved together with the check of max_size
+                    self._size += 1
+
+            if idle is None:
+                connection = self._open()
+            elif self._is_alive(*idle):
+                connection = idle[0]
+            else:
+                self._discard(idle[0])
+                continue
 
-        return OraConnection(connection_string)
+            with self._lock:
+                # binding to the thread is a user of connection too
+                self._users[id(connection)] = [connection, 2 if self.per_thread else 1]
+            if self.per_thread:
+                self._local.connection = connection
+            return connection
 
+    def release(self, connection, discard=False):
+        """
+        Function to return connection to the pool.
+        Connections bound to the thread stay checked out
+
+        Parameters:
+        connection - connection returned by acquire()
+        discard    - close connection instead of reuse, e.g. after fatal error
+        """
+        with self._lock:
+            users = self._users.get(id(connection))
+            if users is None or users[0] is not connection:
+                # released already, e.g. by cursor closed after the end of "with pool.connection()" block
+                return
+            if not discard:
+                users[1] -= 1
+                if users[1] == 0:
+                    del self._users[id(connection)]
+                    self._idle.append((connection, time.time()))
+                    self._lock.notify()
+                return
+            del self._users[id(connection)]
+
+        if getattr(self._local, 'connection', None) is connection:
+            self._local.connection = None
+        self._discard(connection)
+
+    def release_thread(self):
+        """
+        Function to return connection bound to the current thread, the connection
+        stays checked out while it has other users, e.g. open cursors
+        """
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None:
+            self._local.connection = None
+            self.release(connection)
+
+    def connection(self):
+        """
+        Function to bind connection to the current thread for a block, e.g. for a web request:
+
+            with pool.connection() as connection:
+                ...
+        """
+        return _PooledConnection(self)
+
+    def close(self):
+        """
+        Function to close idle connections
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, released in idle:
+            self._discard(connection)
+
+    def size(self):
+        return self._size
+
+    def idle(self):
+        return len(self._idle)
+
+
+class _PooledConnection(object):
+    """
+    Context manager of connection checked out from the pool
+    """
+    def __init__(self, pool):
+        self.pool = pool
+        # connection of outer block or per_thread connection is left bound
+        self.bound = False
+
+    def __enter__(self):
+        local = self.pool._local
+        if getattr(local, 'connection', None) is None:
+            # user of acquired connection is the binding to the thread
+            local.connection = self.pool.acquire()
+            self.bound = True
+        return local.connection
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.bound:
+            self.bound = False
+            self.pool.release_thread()
+        return False
+
+
+"""
+Types of user_arguments.data_type named differently in package specifications
+"""
+ARGUMENT_TYPES = {
+    'REF CURSOR'                     : 'sys_refcursor',
+    'BINARY_INTEGER'                 : 'number',
+    'PLS_INTEGER'                    : 'number',
+}
+
+"""
+Collection types of user_arguments.data_type and kinds of parser collections.
+Older servers report nested tables of packages as PL/SQL TABLE too, they
+are bound as associative arrays
+"""
+COLLECTION_TYPES = {
+    'PL/SQL TABLE' : 'index by',
+    'TABLE'        : 'table',
+    'VARRAY'       : 'varray',
+}
 
 class DBA(object):
     """
     Class implements database access
     """
+
+    """
+    Maximum number of names in one "in" list of Oracle
+    """
+    IN_LIST_SIZE = 1000
+
+    """
+    Number of source lines fetched per round trip
+    """
+    SOURCE_ARRAYSIZE = 5000
+
     def __init__(self, connection):
         self.connection = connection
 
-    def get_packages(self):
+    def _in_list(self, column, names):
+        """
+        Function to make "column in (:p0, :p1, ...)" condition and its bind parameters
+        """
+        binds = dict(('p{0}'.format(index), name) for index, name in enumerate(names))
+        condition = "{0} in ({1})".format(column, ', '.join(':p{0}'.format(index) for index in range(len(names))))
+        return condition, binds
+
+    def get_packages(self, names=None):
         """
-        Retrieve all user's plsql packages
+        Retrieve user's plsql packages
+
+        Parameters:
+        names    - list of package names to retrieve, all packages by default
+
+        Return list of tuples (package name, last DDL time) ordered by name
         """
+        if names is not None and not names:
+            return []
+
+        chunks = [None]
+        if names is not None:
+            chunks = [names[start:start + self.IN_LIST_SIZE] for start in range(0, len(names), self.IN_LIST_SIZE)]
+
+        packages = []
         cursor = self.connection.cursor()
 
-        raw = cursor.execute("""
-            select *
-              from user_objects
-             where object_type = 'PACKAGE'
-            """)
+        for chunk in chunks:
+            condition, binds = ("1 = 1", {}) if chunk is None else self._in_list('object_name', chunk)
+
+            cursor.execute("""
+                select object_name, last_ddl_time
+                  from user_objects
+                 where object_type = 'PACKAGE'
+                   and {0}
+                """.format(condition), binds)
+            packages.extend(cursor.fetchall())
 
-        packages = raw.fetchall()
         cursor.close()
 
-        return packages
+        return sorted(packages)
 
-    def get_spec_source(self, package_name):
+    def get_spec_sources(self, names):
         """
-        Retrieve plsql package specification
+        Retrieve plsql specifications of packages in one query per IN_LIST_SIZE packages.
+        Source lines are streamed and joined per package
+
+        Parameters:
+        names    - list of package names
+
+        Return dictionary of package name and specification
         """
+        sources = {}
         cursor = self.connection.cursor()
+        cursor.arraysize = self.SOURCE_ARRAYSIZE
+
+        for start in range(0, len(names), self.IN_LIST_SIZE):
+            condition, binds = self._in_list('name', names[start:start + self.IN_LIST_SIZE])
+            cursor.execute("""
+                select name, text
+                  from user_source
+                 where type = 'PACKAGE'
+                   and {0}
+                 order by name, line
+            """.format(condition), binds)
+
+            name, lines = None, []
+            rows = cursor.fetchmany()
+            while rows:
+                for row_name, text in rows:
+                    if row_name != name:
+                        if lines:
+                            sources[name] = ''.join(lines)
+                        name, lines = row_name, []
+                    lines.append(text)
+                rows = cursor.fetchmany()
+
+            if lines:
+                sources[name] = ''.join(lines)
 
-        raw = cursor.execute("""
-            select text
-              from user_source
-             where name = :name
-               and type = 'PACKAGE'
-        """, {':name' : package_name})
+        cursor.close()
+
+        return sources
+
+    def get_arguments(self, names):
+        """
+        Retrieve signatures of functions and procedures of packages from
+        user_arguments in one query per IN_LIST_SIZE packages
+
+        Parameters:
+        names    - list of package names
+
+        Return dictionary of package name and tuple (functions, procedures, constants)
+        in the format of PlSqlParser.get_package_members. Constants are not
+        available in user_arguments, the list is empty. Arguments have also keys
+        'length', 'precision', 'scale' and 'defaulted'. Arguments and functions of
+        collection types have key 'collection' like ones of PlSqlParser, element
+        type is taken from the row of the next data level. Index types of associative
+        arrays are not in user_arguments, they are taken from specifications by
+        base.merge_arguments
+        """
+        packages = dict((name, ([], [], [])) for name in names)
+        cursor = self.connection.cursor()
+        cursor.arraysize = self.SOURCE_ARRAYSIZE
+
+        for start in range(0, len(names), self.IN_LIST_SIZE):
+            condition, binds = self._in_list('package_name', names[start:start + self.IN_LIST_SIZE])
+            cursor.execute("""
+                select package_name, object_name, overload, subprogram_id, position,
+                       argument_name, in_out, data_type, data_length, data_precision,
+                       data_scale, defaulted, data_level, type_owner, type_name, type_subname
+                  from user_arguments
+                 where data_level <= 1
+                   and {0}
+                 order by package_name, subprogram_id, sequence
+            """.format(condition), binds)
+
+            member, key, collection = None, None, None
+            rows = cursor.fetchmany()
+            while rows:
+                for row in rows:
+                    package_name, name, overload, subprogram_id, position, argument_name, in_out, \
+                        data_type, length, precision, scale, defaulted, data_level, \
+                        type_owner, type_name, type_subname = row
+
+                    if data_level:
+                        # element of collection
+                        if collection is not None:
+                            collection['element'] = ARGUMENT_TYPES.get(data_type, data_type.lower())
+                            if data_type in ('CHAR', 'NCHAR', 'VARCHAR2', 'NVARCHAR2', 'RAW'):
+                                collection['length'] = length
+                            collection = None
+                        continue
+
+                    if (package_name, subprogram_id) != key:
+                        key = (package_name, subprogram_id)
+                        member = {
+                            'name'     : name,
+                            'args'     : [],
+                            'overload' : int(overload) if overload else None,
+                        }
+                        functions, procedures, constants = packages[package_name]
+                        if position == 0:
+                            functions.append(member)
+                        else:
+                            procedures.append(member)
+
+                    collection = None
+                    if data_type in COLLECTION_TYPES:
+                        type_parts = [part for part in (type_owner, type_name, type_subname) if part]
+                        collection = {
+                            'name'       : '.'.join(type_parts[-2:]),
+                            'collection' : COLLECTION_TYPES[data_type],
+                            'element'    : None,
+                            'length'     : None,
+                            'size'       : None,
+                            'index'      : None,
+                        }
+
+                    if position == 0:
+                        # return value of function
+                        member['oratype'] = ARGUMENT_TYPES.get(data_type, data_type.lower())
+                        if collection is not None:
+                            member['collection'] = collection
+                    elif argument_name is not None:
+                        member['args'].append({
+                            'name'      : argument_name,
+                            'type'      : in_out.replace('/', ' ').lower(),
+                            'oratype'   : ARGUMENT_TYPES.get(data_type, data_type.lower()),
+                            'default'   : None,
+                            'defaulted' : defaulted == 'Y',
+                            'length'    : length,
+                            'precision' : precision,
+                            'scale'     : scale,
+                        })
+                        if collection is not None:
+                            member['args'][-1]['collection'] = collection
+                rows = cursor.fetchmany()
 
-        raw_source = raw.fetchall()
         cursor.close()
 
-        source = ''
-        for line in raw_source:
-            source += line[0]
+        return packages
 
-        return source
\ No newline at end of file
+    def get_spec_source(self, package_name):
+        """
+        Retrieve plsql package specification
+        """
+        return self.get_spec_sources([package_name]).get(package_name, '')
@@ -0,0 +1,204 @@
+"""
+Dynamic mapping of PL/SQL packages without generated modules.
+
+Package classes are built in memory on first access, with the same call
+semantics as generated modules:
+
+    plsql.packages.configure(pool=pool)
+    plsql.packages.refs.get_code(1)
+"""
+import json
+import os
+import re
+import threading
+
+from plsql import settings
+from plsql.base import Package, build_members, merge_arguments
+from plsql.dbgate import DBA
+from plsql.parser import PlSqlParser
+
+SPEC_QUERY = """
+    select text
+      from user_source
+     where name = :name
+       and type = 'PACKAGE'
+     order by line
+"""
+
+DDL_TIME_QUERY = """
+    select to_char(last_ddl_time, 'YYYY-MM-DD HH24:MI:SS')
+      from user_objects
+     where object_name = :name
+       and object_type = 'PACKAGE'
+"""
+
+
+def constant_value(value):
+    """
+    Function to convert PL/SQL literal of constant to python value,
+    other expressions are returned as source text
+    """
+    if re.match(r"^'(?:[^']|'')*'$", value):
+        return value[1:-1].replace("''", "'")
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def build_package(name, members, options=None):
+    """
+    Function to build package class from parsed specification. The class is
+    built by the code generating package modules, see plsql.base, its source
+    is produced by plsql.emitter without Django. Functions and procedures with
+    types which can't be bound are skipped with warning
+
+    Parameters:
+    name       - package name
+    members    - tuple (functions, procedures, constants) of PlSqlParser.get_package_members
+                 or base.merge_arguments
+    options    - dictionary of options like PLSQL_OPTIONS: option values for
+                 all packages, keys 'PACKAGE' and 'PACKAGE.MEMBER',
+                 settings.PLSQL_OPTIONS by default
+    """
+    functions, procedures, constants = members
+
+    package = Package((name.upper(), None), options, 'native')
+    package.set_members(build_members(package, (functions, procedures, [])))
+
+    namespace = {'__name__': __name__}
+    exec(package.get_py_source(), namespace)
+    package_class = namespace[package.name.lower()]
+
+    for const in constants:
+        setattr(package_class, const['name'], constant_value(const['value']))
+
+    return package_class
+
+
+class Packages(object):
+    """
+    Class implements lazy access to package classes built from specifications
+    of the connected schema. Only specifications of used packages are fetched.
+
+    Parsed specifications can be kept in cache_dir between processes, they are
+    checked against last DDL time of package before use
+    """
+    def __init__(self, connection=None, pool=None, options=None, cache_dir=None):
+        self._lock = threading.RLock()
+        self._packages = {}
+        self.configure(connection, pool, options, cache_dir)
+
+    def configure(self, connection=None, pool=None, options=None, cache_dir=None):
+        """
+        Function to set connection or dbgate.ConnectionPool of packages,
+        options of package members like PLSQL_OPTIONS (settings.PLSQL_OPTIONS
+        by default) and folder of cached specifications. Already built packages
+        are dropped
+        """
+        with self._lock:
+            self._connection = connection
+            self._pool = pool
+            self._options = options
+            self._cache_dir = cache_dir
+            self._packages = {}
+
+    def _run(self, function):
+        # Function to call function with connection of packages
+        connection = self._pool.acquire() if self._pool is not None else self._connection
+        if connection is None:
+            raise RuntimeError("plsql.packages is not configured, call plsql.packages.configure()")
+        try:
+            return function(connection)
+        finally:
+            if self._pool is not None:
+                self._pool.release(connection)
+
+    def _query(self, statement, name):
+        # Function to run query with package name on connection of packages
+        def query(connection):
+            cursor = connection.cursor()
+            cursor.execute(statement, {'name': name})
+            rows = cursor.fetchall()
+            cursor.close()
+            return rows
+        return self._run(query)
+
+    def _cache_path(self, name):
+        return os.path.join(self._cache_dir, name.lower() + '.json')
+
+    def _members(self, name):
+        """
+        Function to get parsed specification of package, from cache_dir when
+        package wasn't changed since it was cached. With settings.PLSQL_METADATA
+        'arguments' signatures of members are taken from user_arguments
+        """
+        ddl_time = None
+        if self._cache_dir is not None:
+            rows = self._query(DDL_TIME_QUERY, name)
+            ddl_time = rows[0][0] if rows else None
+            if os.path.exists(self._cache_path(name)):
+                f = open(self._cache_path(name))
+                cached = json.load(f)
+                f.close()
+                if cached['last_ddl_time'] == ddl_time and cached.get('metadata') == settings.PLSQL_METADATA:
+                    return cached['members']
+
+        source = ''.join(row[0] for row in self._query(SPEC_QUERY, name))
+        if not source:
+            return None
+        members = PlSqlParser().get_package_members(source)
+        if settings.PLSQL_METADATA == 'arguments':
+            arguments = self._run(lambda connection: DBA(connection).get_arguments([name]))
+            members = merge_arguments(members, arguments[name])
+
+        if self._cache_dir is not None:
+            if not os.path.exists(self._cache_dir):
+                os.makedirs(self._cache_dir)
+            f = open(self._cache_path(name) + '.tmp', 'w')
+            json.dump({'last_ddl_time': ddl_time, 'metadata': settings.PLSQL_METADATA, 'members': members}, f)
+            f.close()
+            os.rename(self._cache_path(name) + '.tmp', self._cache_path(name))
+
+        return members
+
+    def get(self, name):
+        """
+        Function to get package class, the class is built on first access.
+        Raise AttributeError if there is no such package
+        """
+        key = name.upper()
+        package = self._packages.get(key)
+        if package is not None:
+            return package
+
+        with self._lock:
+            package = self._packages.get(key)
+            if package is None:
+                members = self._members(key)
+                if members is None:
+                    raise AttributeError("package {0} is not found".format(key))
+                package = build_package(key, members, self._options)
+                package.connection = self._connection
+                package.pool = self._pool
+                self._packages[key] = package
+        return package
+
+    def clear(self, name=None):
+        """
+        Function to drop built package classes, they are built again on next access
+        """
+        with self._lock:
+            if name is None:
+                self._packages = {}
+            else:
+                self._packages.pop(name.upper(), None)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return self.get(name)
@@ -0,0 +1,82 @@
+"""
+Emitter of generated modules from precomputed string fragments.
+
+Output is the same as of default templates, but rendering doesn't need
+Django. Used instead of templates when settings.PLSQL_EMITTER is 'native',
+custom templates in PLSQL_TEMPLATE_DIR are ignored then.
+"""
+
+PACKAGE = (
+    "import cx_Oracle\n"
+    "from plsql.runtime import AssociativeArray, FunctionCall, ProcedureCall, SqlCollection, TableFunctionCall\n"
+    "\n"
+    "class {package_name}:\n"
+    "    connection = None\n"
+    "    pool = None\n"
+    "    statement_cache_size = {statement_cache_size}\n"
+    "    bulk_batch_size = {bulk_batch_size}\n"
+    "\n"
+)
+PACKAGE_MEMBER = "\n    {0}\n"
+
+ASYNC_PACKAGE = (
+    "from plsql.aio import AsyncCall, AsyncPackage\n"
+    "from .{package_name} import {package_name} as _{package_name}\n"
+    "\n"
+    "class {package_name}(AsyncPackage):\n"
+    "    package = _{package_name}\n"
+    "    concurrency = {concurrency}\n"
+)
+ASYNC_CONSTANT = "\n    {0} = _{1}.{0}\n"
+ASYNC_MEMBER = "\n    {0} = AsyncCall('{0}')\n"
+
+FUNCTION = "{name} = FunctionCall('{package_name}.{name}', {return_type}{args}{options})\n"
+PROCEDURE = "{name} = ProcedureCall('{package_name}.{name}'{args}{options})\n"
+TABLE_FUNCTION = "{name} = TableFunctionCall('{package_name}.{name}'{args}{options})\n"
+ARGUMENTS = ", [{0}\n    ]"
+ARGUMENT = "\n        {0},"
+
+
+def _package(context):
+    members = [PACKAGE_MEMBER.format(member) for member in context['members']]
+    return PACKAGE.format(**context) + ''.join(members)
+
+def _package_async(context):
+    members = [ASYNC_CONSTANT.format(constant, context['package_name']) for constant in context['constants']]
+    members += [ASYNC_MEMBER.format(member) for member in context['members']]
+    return ASYNC_PACKAGE.format(**context) + ''.join(members)
+
+def _arguments(args):
+    if not args:
+        return ''
+    return ARGUMENTS.format(''.join(ARGUMENT.format(arg.spec()) for arg in args))
+
+def _function(context):
+    return FUNCTION.format(**dict(context, args=_arguments(context['args'])))
+
+def _procedure(context):
+    return PROCEDURE.format(**dict(context, args=_arguments(context['args'])))
+
+def _table_function(context):
+    return TABLE_FUNCTION.format(**dict(context, args=_arguments(context['args'])))
+
+"""
+Emitters of default templates
+"""
+EMITTERS = {
+    'package.html'       : _package,
+    'package_async.html' : _package_async,
+    'function.html'      : _function,
+    'procedure.html'     : _procedure,
+    'table_function.html': _table_function,
+}
+
+def emit(template_name, context):
+    """
+    Function to generate part of python module like the template with the same name
+
+    Parameters:
+    template_name - name of default template
+    context       - dictionary of template variables
+    """
+    return EMITTERS[template_name](context)
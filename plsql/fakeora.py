@@ -0,0 +1,380 @@
+"""
+In-process stand-in for cx_Oracle used by benchmarks.
+
+Package members are python callables registered in Database, they get bind
+variables of arguments and return result of PL/SQL function. Every round trip
+to the "server" takes latency seconds, round trips of a connection are
+serialized like by the driver and number of concurrently served round trips
+can be limited to simulate contention on the server:
+
+    database = Database(latency=0.0005)
+    database.functions['refs.get_code'] = lambda code: code.getvalue() * 2
+    package.connection = database.connect()
+
+Ref cursors are returned by functions as database.result(description, rows),
+they are opened on the connection of the call. Pipelined functions queried by
+"select * from table(package.function(...))" return results too, rows can be
+generators consumed by fetches.
+The module has type constants and exceptions of cx_Oracle, install() makes it
+importable as cx_Oracle when the driver is not installed.
+"""
+import itertools
+import re
+import sys
+import threading
+import time
+
+
+class DbType(object):
+    """
+    Class to represent type constant of driver
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return "<DbType {0}>".format(self.name)
+
+
+CURSOR = DbType('CURSOR')
+BINARY = DbType('BINARY')
+BFILE = DbType('BFILE')
+BLOB = DbType('BLOB')
+CLOB = DbType('CLOB')
+DATETIME = DbType('DATETIME')
+FIXED_CHAR = DbType('FIXED_CHAR')
+FIXED_UNICODE = DbType('FIXED_UNICODE')
+INTERVAL = DbType('INTERVAL')
+LONG_BINARY = DbType('LONG_BINARY')
+LONG_STRING = DbType('LONG_STRING')
+LONG_UNICODE = DbType('LONG_UNICODE')
+NATIVE_FLOAT = DbType('NATIVE_FLOAT')
+NATIVE_INT = DbType('NATIVE_INT')
+NCLOB = DbType('NCLOB')
+NUMBER = DbType('NUMBER')
+OBJECT = DbType('OBJECT')
+ROWID = DbType('ROWID')
+STRING = DbType('STRING')
+TIMESTAMP = DbType('TIMESTAMP')
+UNICODE = DbType('UNICODE')
+
+
+class Error(Exception):
+    pass
+
+
+class DatabaseError(Error):
+    pass
+
+
+"""
+Calls of package members in anonymous blocks of generated packages
+"""
+CALLS = re.compile(r'(:\w+ := )?([\w$#.]+)\(([^)]*)\);')
+
+"""
+Queries of table functions of generated packages
+"""
+TABLE_QUERY = re.compile(r'^\s*select \* from table\(([\w$#.]+)\(([^)]*)\)\)\s*$', re.I)
+
+
+class Database(object):
+    """
+    Class implements server of fake driver: package members, query results
+    and simulated latency of round trips
+    """
+    def __init__(self, functions=None, queries=None, latency=0.0, sessions=None):
+        """
+        Constructor.
+
+        Parameters:
+        functions  - dictionary of package.member and python callable
+        queries    - callable getting statement and bind parameters of query
+                     and returning tuple (description, rows)
+        latency    - seconds of one round trip
+        sessions   - maximum number of round trips served at once, None for no limit
+        """
+        self.functions = dict((name.lower(), function) for name, function in (functions or {}).items())
+        self.queries = queries
+        self.latency = latency
+        self.sessions = threading.BoundedSemaphore(sessions) if sessions else None
+        self.round_trips = 0
+        self.lock = threading.Lock()
+
+    def round_trip(self):
+        with self.lock:
+            self.round_trips += 1
+        if self.sessions is not None:
+            self.sessions.acquire()
+        try:
+            if self.latency:
+                time.sleep(self.latency)
+        finally:
+            if self.sessions is not None:
+                self.sessions.release()
+
+    def connect(self, *args, **kwargs):
+        return Connection(self)
+
+    def result(self, description, rows):
+        """
+        Function to make ref cursor returned by package function
+        """
+        return Result(description, rows)
+
+    def lob(self, data, type=None):
+        """
+        Function to make LOB locator returned by package function
+        """
+        if type is None:
+            type = BLOB if isinstance(data, bytes) and bytes is not str else CLOB
+        return Lob(self, data, type)
+
+
+class Result(object):
+    """
+    Class implements rows of ref cursor not opened yet, rows are any iterable
+    """
+    def __init__(self, description, rows):
+        self.description = description
+        self.rows = rows
+
+    def open(self, connection):
+        cursor = Cursor(connection)
+        cursor.description = self.description
+        cursor.rows = iter(self.rows)
+        return cursor
+
+
+class Connection(object):
+    """
+    Class implements DB-API connection of fake driver
+    """
+    def __init__(self, database):
+        self.database = database
+        self.stmtcachesize = 20
+        self.outputtypehandler = None
+        self.closed = False
+        # False to fail pings like a broken connection
+        self.alive = True
+        # number of opened cursors and executed statements
+        self.cursors = 0
+        self.statements = []
+        self.lock = threading.Lock()
+
+    def round_trip(self):
+        # Function to make round trip, one at a time for the connection
+        with self.lock:
+            self.database.round_trip()
+
+    def cursor(self):
+        self.cursors += 1
+        return Cursor(self)
+
+    def ping(self):
+        self.round_trip()
+        if not self.alive:
+            raise DatabaseError("ORA-03113: end-of-file on communication channel")
+
+    def commit(self):
+        self.round_trip()
+
+    def rollback(self):
+        self.round_trip()
+
+    def close(self):
+        self.closed = True
+
+
+class Var(object):
+    """
+    Class implements bind variable
+    """
+    def __init__(self, type, arraysize=1):
+        self.type = type
+        self.values = [None] * arraysize
+
+    def setvalue(self, position, value):
+        self.values[position] = value
+
+    def getvalue(self, position=0):
+        return self.values[position]
+
+
+class ObjectType(object):
+    """
+    Class implements type of collection objects
+    """
+    def __init__(self, name):
+        self.name = name
+
+    def newobject(self):
+        return Object(self)
+
+
+class Object(object):
+    """
+    Class implements collection object bound to variables of ObjectType
+    """
+    def __init__(self, type, values=()):
+        self.type = type
+        self.values = list(values)
+
+    def append(self, value):
+        self.values.append(value)
+
+    def extend(self, values):
+        self.values.extend(values)
+
+    def aslist(self):
+        return list(self.values)
+
+
+class _Element(object):
+    # Class implements element of array variable seen by one execution of executemany
+    __slots__ = ('var', 'position')
+
+    def __init__(self, var, position):
+        self.var = var
+        self.position = position
+
+    def setvalue(self, position, value):
+        self.var.setvalue(self.position, value)
+
+    def getvalue(self, position=0):
+        return self.var.getvalue(self.position)
+
+
+class Cursor(object):
+    """
+    Class implements cursor of fake driver. Anonymous blocks call registered
+    functions, other statements are answered by queries of Database
+    """
+    def __init__(self, connection):
+        self.connection = connection
+        self.database = connection.database
+        self.description = None
+        self.rows = iter(())
+        self.arraysize = 100
+        self.rowcount = 0
+        self.outputtypehandler = None
+        self.inputs = ()
+        self.closed = False
+
+    def var(self, type, size=0, arraysize=1, typename=None, **kwargs):
+        if typename is not None:
+            type = ObjectType(typename)
+        return Var(type, arraysize)
+
+    def arrayvar(self, type, value, size=0):
+        var = Var(type)
+        var.setvalue(0, [] if isinstance(value, int) else list(value))
+        return var
+
+    def setinputsizes(self, *vars, **kwargs):
+        self.inputs = vars
+
+    def _function(self, name):
+        # Function to get python callable of package member
+        function = self.database.functions.get(name.lower())
+        if function is None:
+            raise DatabaseError("PLS-00302: component '{0}' must be declared".format(name))
+        return function
+
+    def _call(self, statement, parameters):
+        # Function to run calls of anonymous block, bind variables are taken in order of appearance
+        parameters = list(parameters or [])
+        for result, name, binds in CALLS.findall(statement):
+            function = self._function(name)
+            result = parameters.pop(0) if result else None
+            args = [parameters.pop(0) for bind in binds.split(',') if bind.strip()]
+            value = function(*args)
+            if isinstance(value, Result):
+                value = value.open(self.connection)
+            if result is not None:
+                result.setvalue(0, value)
+
+    def execute(self, statement, parameters=None, **kwargs):
+        self.connection.round_trip()
+        self.connection.statements.append(statement)
+        if statement.lstrip()[:5].lower() in ('begin', 'decla'):
+            self._call(statement, parameters)
+            return None
+
+        table = TABLE_QUERY.match(statement)
+        if table is not None:
+            result = self._function(table.group(1))(*list(parameters or []))
+            self.description, self.rows = result.description, iter(result.rows)
+            return self
+
+        if self.database.queries is None:
+            raise DatabaseError("ORA-00942: table or view does not exist")
+        self.description, rows = self.database.queries(statement, parameters or kwargs)
+        self.rows = iter(rows)
+        return self
+
+    def executemany(self, statement, parameters):
+        self.connection.round_trip()
+        self.connection.statements.append(statement)
+        count = parameters if isinstance(parameters, int) else len(parameters)
+        self.rowcount = 0
+        for position in range(count):
+            if isinstance(parameters, int):
+                self._call(statement, [_Element(var, position) for var in self.inputs])
+            else:
+                self._call(statement, parameters[position])
+            self.rowcount += 1
+
+    def fetchmany(self, size=None):
+        self.connection.round_trip()
+        return list(itertools.islice(self.rows, size or self.arraysize))
+
+    def fetchall(self):
+        self.connection.round_trip()
+        return list(self.rows)
+
+    def close(self):
+        self.rows = iter(())
+        self.closed = True
+
+
+class Lob(object):
+    """
+    Class implements LOB locator, every read is a round trip
+    """
+    def __init__(self, database, data, type=CLOB):
+        self.database = database
+        self.data = data
+        self.type = type
+
+    def size(self):
+        self.database.round_trip()
+        return len(self.data)
+
+    def getchunksize(self):
+        return 8132
+
+    def read(self, offset=1, amount=None):
+        self.database.round_trip()
+        if amount is None:
+            return self.data[offset - 1:]
+        return self.data[offset - 1:offset - 1 + amount]
+
+
+def connect(*args, **kwargs):
+    """
+    Function to connect to empty database without latency, like cx_Oracle.connect
+    """
+    return Database().connect()
+
+
+def install():
+    """
+    Function to make this module importable as cx_Oracle when the driver is
+    not installed. Return module used as cx_Oracle
+    """
+    try:
+        import cx_Oracle
+    except ImportError:
+        cx_Oracle = sys.modules['cx_Oracle'] = sys.modules[__name__]
+    return cx_Oracle
@@ -0,0 +1,205 @@
+"""
+Import hook deferring execution of generated package modules until first
+attribute access:
+
+    plsql.importer.install(settings.PLSQL_SCHEMA_ROOT + settings.ORA_SCHEMA)
+    import sa.refs          # the module body is not executed yet
+    sa.refs.__all__         # names from the index, still not executed
+    sa.refs.refs.get_code   # executed here
+"""
+import json
+import os
+import re
+import sys
+import threading
+import types
+
+"""
+Name of generation manifest in the schema folder, it is used as index of packages
+"""
+MANIFEST = 'plsql_manifest.json'
+
+"""
+Member declarations of generated package class, used when manifest has no index
+"""
+MEMBER = re.compile(r'^    (\w+) = ', re.M)
+
+"""
+Attributes of generated package class which are not package members
+"""
+CLASS_ATTRIBUTES = ('connection', 'pool', 'statement_cache_size', 'bulk_batch_size')
+
+"""
+Suffix of asyncio modules, they have functions of package modules
+"""
+ASYNC_SUFFIX = '_async'
+
+
+class LazyModule(types.ModuleType):
+    """
+    Class implements generated module executed on first access to attribute
+    which is not defined yet. __all__ and dir() are answered from the index,
+    members of the package class are listed by __plsql_members__
+    """
+    def __getattr__(self, name):
+        if name.startswith('__') or self.__dict__.get('_lazy_loaded', True):
+            raise AttributeError(name)
+        self._lazy_load()
+        return getattr(self, name)
+
+    def __dir__(self):
+        if self.__dict__.get('_lazy_loaded', True):
+            return sorted(self.__dict__)
+        return sorted(['__all__', '__file__', '__name__'] + list(self.__all__))
+
+    def _lazy_load(self):
+        with self._lazy_lock:
+            if self._lazy_loaded:
+                return
+            self._lazy_loaded = True
+            try:
+                _execute(self)
+            except:
+                self._lazy_loaded = False
+                raise
+
+
+def _execute(module):
+    """
+    Function to execute module source, compiled code is cached like by regular import
+    """
+    try:
+        from importlib.machinery import SourceFileLoader
+    except ImportError:
+        # python 2
+        import imp
+        f = open(module.__file__, 'U')
+        try:
+            imp.load_module(module.__name__, f, module.__file__, ('.py', 'U', imp.PY_SOURCE))
+        finally:
+            f.close()
+    else:
+        code = SourceFileLoader(module.__name__, module.__file__).get_code(module.__name__)
+        exec(code, module.__dict__)
+
+
+class SchemaFinder(object):
+    """
+    Class implements finder and loader of generated modules of schema folder.
+    Supports both PEP 302 (find_module/load_module) and PEP 451 (find_spec) protocols
+    """
+    def __init__(self, directory):
+        """
+        Constructor.
+
+        Parameters:
+        directory  - schema folder, PLSQL_SCHEMA_ROOT + ORA_SCHEMA, the folder
+                     name is the name of python package of generated modules
+        """
+        self.directory = os.path.abspath(directory)
+        self.package = os.path.basename(self.directory.rstrip(os.sep))
+        self._index = None
+
+    def index(self):
+        """
+        Function to get dictionary of package module name and list of member
+        names of its package class. Names are taken from the generation manifest
+        or from module sources without executing them
+        """
+        if self._index is not None:
+            return self._index
+
+        index = {}
+        manifest = os.path.join(self.directory, MANIFEST)
+        if os.path.exists(manifest):
+            f = open(manifest)
+            packages = json.load(f).get('packages', {})
+            f.close()
+            for entry in packages.values():
+                if 'members' not in entry:
+                    index = {}
+                    break
+                index[entry['modules'][0]] = entry['members']
+
+        if not index:
+            modules = [name[:-3] for name in os.listdir(self.directory)
+                       if name.endswith('.py') and name != '__init__.py']
+            for name in modules:
+                if name.endswith(ASYNC_SUFFIX) and name[:-len(ASYNC_SUFFIX)] in modules:
+                    continue
+                f = open(os.path.join(self.directory, name + '.py'))
+                index[name] = [member for member in MEMBER.findall(f.read())
+                               if member not in CLASS_ATTRIBUTES]
+                f.close()
+
+        self._index = index
+        return index
+
+    def _path(self, fullname):
+        # Function to get source of generated module or None for other modules
+        package, _, name = fullname.rpartition('.')
+        if package != self.package or name == '__init__':
+            return None
+        path = os.path.join(self.directory, name + '.py')
+        return path if os.path.exists(path) else None
+
+    def _init_module(self, module, fullname):
+        name = fullname.rpartition('.')[2]
+        module.__file__ = self._path(fullname)
+        module.__package__ = self.package
+        module.__loader__ = self
+        module.__all__ = [name]
+        index = self.index()
+        if name not in index and name.endswith(ASYNC_SUFFIX):
+            name = name[:-len(ASYNC_SUFFIX)]
+        module.__plsql_members__ = list(index.get(name, []))
+        module._lazy_lock = threading.Lock()
+        module._lazy_loaded = False
+
+    # PEP 451
+    def find_spec(self, fullname, path=None, target=None):
+        if self._path(fullname) is None:
+            return None
+        from importlib.machinery import ModuleSpec
+        return ModuleSpec(fullname, self, origin=self._path(fullname))
+
+    def create_module(self, spec):
+        module = LazyModule(spec.name)
+        self._init_module(module, spec.name)
+        return module
+
+    def exec_module(self, module):
+        # the module is executed on first attribute access
+        pass
+
+    # PEP 302
+    def find_module(self, fullname, path=None):
+        if self._path(fullname) is None:
+            return None
+        return self
+
+    def load_module(self, fullname):
+        module = sys.modules.get(fullname)
+        if module is None:
+            module = sys.modules[fullname] = LazyModule(fullname)
+            self._init_module(module, fullname)
+        return module
+
+
+def install(directory):
+    """
+    Function to install lazy import of generated modules of schema folder.
+    Return installed finder, its index() lists packages and their members
+    """
+    for finder in sys.meta_path:
+        if isinstance(finder, SchemaFinder) and finder.directory == os.path.abspath(directory):
+            return finder
+
+    finder = SchemaFinder(directory)
+    sys.meta_path.insert(0, finder)
+    return finder
+
+
+def uninstall(finder):
+    if finder in sys.meta_path:
+        sys.meta_path.remove(finder)
@@ -0,0 +1,291 @@
+"""
+Load harness for generated package classes.
+
+Replays a mix of function, procedure and cursor calls from many threads,
+processes or asyncio tasks against plsql.fakeora with simulated latency and
+server contention, and reports throughput and latency percentiles for each
+level of concurrency:
+
+    python load.py --mode threads --concurrency 1,4,16 --connections 8
+    python3 load.py --mode asyncio --latency 0.002
+
+Package class is generated from LOAD_SPEC like modules of generate_packages.
+It has single connection by default, --connections N uses dbgate.ConnectionPool
+of N connections.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from plsql import fakeora
+cx_Oracle = fakeora.install()
+
+from plsql.base import generate_package
+
+clock = getattr(time, 'perf_counter', time.time)
+
+LOAD_SPEC = """
+create or replace package load_package as
+    function get_value(p_id number) return number;
+    procedure set_value(p_id in number, p_result out varchar2);
+    function get_rows(p_id number) return sys_refcursor;
+end load_package;
+"""
+
+DESCRIPTION = [
+    ('ID', cx_Oracle.NUMBER, 10, 22, 10, 0, 0),
+    ('NAME', cx_Oracle.STRING, 30, 30, None, None, 1),
+]
+
+"""
+Calls of the mix, they get package class and number of the call
+"""
+CALLS = {
+    'function' : lambda package, index: package.get_value(index),
+    'procedure' : lambda package, index: package.set_value(index),
+    'cursor' : lambda package, index: package.get_rows(index).fetch_all(),
+}
+
+"""
+Default weights of calls in the mix
+"""
+MIX = {'function': 6, 'procedure': 3, 'cursor': 1}
+
+"""
+Defaults: levels of concurrency, calls per level, seconds of round trip and rows of cursors
+"""
+CONCURRENCY = (1, 2, 4, 8, 16)
+CALLS_PER_LEVEL = 2000
+LATENCY = 0.001
+ROWS = 20
+
+
+def make_database(latency=LATENCY, sessions=None, rows=ROWS):
+    """
+    Function to make fake database serving members of LOAD_SPEC
+    """
+    result = [(index, 'name {0}'.format(index)) for index in range(rows)]
+    return fakeora.Database({
+        'load_package.get_value' : lambda p_id: p_id.getvalue() + 1,
+        'load_package.set_value' : lambda p_id, p_result: p_result.setvalue(0, str(p_id.getvalue())),
+        'load_package.get_rows' : lambda p_id: fakeora.Result(DESCRIPTION, result),
+    }, latency=latency, sessions=sessions)
+
+
+def make_package(database, connections=0):
+    """
+    Function to make package class of generated module of LOAD_SPEC,
+    connected by single connection or by pool of connections
+    """
+    info, source, async_source = generate_package((('LOAD_PACKAGE', None), LOAD_SPEC, False, None))
+    namespace = {}
+    exec(source, namespace)
+    package = namespace['load_package']
+    if connections:
+        from plsql.dbgate import ConnectionPool
+        package.pool = ConnectionPool(database.connect, min_size=0, max_size=connections, timeout=None)
+    else:
+        package.connection = database.connect()
+    return package
+
+
+def schedule(mix, calls, seed=0):
+    """
+    Function to make reproducible sequence of call kinds weighted by mix
+    """
+    kinds = sorted(mix)
+    weights = [mix[kind] for kind in kinds]
+    generator = random.Random(seed)
+    sequence = []
+    for index in range(calls):
+        point = generator.uniform(0, sum(weights))
+        for kind, weight in zip(kinds, weights):
+            point -= weight
+            if point <= 0:
+                break
+        sequence.append(kind)
+    return sequence
+
+
+def percentile(latencies, fraction):
+    # Function to get percentile of sorted latencies
+    if not latencies:
+        return 0.0
+    return latencies[min(len(latencies) - 1, int(fraction * len(latencies)))]
+
+
+def summarize(concurrency, latencies, errors, seconds):
+    """
+    Function to get throughput and percentiles of latencies of one level of concurrency
+    """
+    latencies = sorted(latencies)
+    return {
+        'concurrency' : concurrency,
+        'calls' : len(latencies),
+        'errors' : errors,
+        'seconds' : seconds,
+        'calls_per_second' : len(latencies) / seconds if seconds else 0.0,
+        'p50' : percentile(latencies, 0.5),
+        'p99' : percentile(latencies, 0.99),
+        'max' : latencies[-1] if latencies else 0.0,
+    }
+
+
+def run_threads(package, sequence, concurrency):
+    """
+    Function to replay calls from concurrency threads.
+    Return tuple (latencies, number of errors, seconds)
+    """
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    position = [0]
+
+    def worker():
+        while True:
+            with lock:
+                index = position[0]
+                position[0] += 1
+            if index >= len(sequence):
+                return
+            started = clock()
+            try:
+                CALLS[sequence[index]](package, index)
+            except Exception:
+                with lock:
+                    errors[0] += 1
+                continue
+            latency = clock() - started
+            with lock:
+                latencies.append(latency)
+
+    threads = [threading.Thread(target=worker) for index in range(concurrency)]
+    started = clock()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors[0], clock() - started
+
+
+def _process_worker(task):
+    # Function to replay part of calls in worker process with its own package and database
+    sequence, latency, sessions, connections = task
+    package = make_package(make_database(latency, sessions), connections)
+    latencies, errors, seconds = run_threads(package, sequence, 1)
+    return latencies, errors
+
+
+def run_processes(sequence, concurrency, latency, sessions=None, connections=0):
+    """
+    Function to replay calls from concurrency processes, each process has
+    its package class and fake database, so sessions limit every process
+    """
+    parts = [sequence[index::concurrency] for index in range(concurrency)]
+    processes = multiprocessing.Pool(concurrency)
+    try:
+        started = clock()
+        results = processes.map(_process_worker, [(part, latency, sessions, connections) for part in parts])
+        seconds = clock() - started
+    finally:
+        processes.close()
+        processes.join()
+    return sum([result[0] for result in results], []), sum(result[1] for result in results), seconds
+
+
+def run(mode='threads', levels=CONCURRENCY, calls=CALLS_PER_LEVEL, mix=None, latency=LATENCY,
+        sessions=None, connections=0, rows=ROWS, seed=0):
+    """
+    Function to run load for each level of concurrency
+
+    Parameters:
+    mode        - 'threads', 'processes' or 'asyncio'
+    levels      - numbers of concurrent threads, processes or tasks
+    calls       - number of calls replayed on each level
+    mix         - dictionary of call kind ('function', 'procedure', 'cursor') and weight
+    latency     - seconds of round trip
+    sessions    - maximum number of round trips served by database at once
+    connections - size of connection pool, 0 for single connection of package class
+    rows        - rows of cursors
+
+    Return dictionary with parameters and list of results of levels
+    """
+    sequence = schedule(mix or MIX, calls, seed)
+
+    results = []
+    for concurrency in levels:
+        if mode == 'processes':
+            latencies, errors, seconds = run_processes(sequence, concurrency, latency, sessions, connections)
+        else:
+            package = make_package(make_database(latency, sessions, rows), connections)
+            if mode == 'asyncio':
+                from plsql.load_aio import run_asyncio
+                latencies, errors, seconds = run_asyncio(package, sequence, concurrency)
+            else:
+                latencies, errors, seconds = run_threads(package, sequence, concurrency)
+        results.append(summarize(concurrency, latencies, errors, seconds))
+
+    return {
+        'python' : platform.python_version(),
+        'mode' : mode,
+        'mix' : mix or MIX,
+        'latency' : latency,
+        'sessions' : sessions,
+        'connections' : connections,
+        'levels' : results,
+    }
+
+
+def report(results):
+    """
+    Function to format results as text table
+    """
+    lines = ['{0:>11} {1:>10} {2:>10} {3:>10} {4:>7}'.format('concurrency', 'calls/s', 'p50 ms', 'p99 ms', 'errors')]
+    for level in results['levels']:
+        lines.append('{0:>11} {1:>10.1f} {2:>10.3f} {3:>10.3f} {4:>7}'.format(
+            level['concurrency'], level['calls_per_second'], level['p50'] * 1000, level['p99'] * 1000,
+            level['errors']))
+    return '\n'.join(lines)
+
+
+def main(argv=None):
+    arguments = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    arguments.add_argument('--mode', choices=('threads', 'processes', 'asyncio'), default='threads')
+    arguments.add_argument('--concurrency', default=','.join(str(level) for level in CONCURRENCY),
+                           help='comma separated levels of concurrency')
+    arguments.add_argument('--calls', type=int, default=CALLS_PER_LEVEL, help='calls per level')
+    arguments.add_argument('--mix', default=','.join('{0}={1}'.format(kind, MIX[kind]) for kind in sorted(MIX)),
+                           help='weights of calls, e.g. function=6,procedure=3,cursor=1')
+    arguments.add_argument('--latency', type=float, default=LATENCY, help='seconds of simulated round trip')
+    arguments.add_argument('--sessions', type=int, help='round trips served by database at once')
+    arguments.add_argument('--connections', type=int, default=0, help='size of connection pool')
+    arguments.add_argument('--rows', type=int, default=ROWS, help='rows of cursors')
+    arguments.add_argument('--json', action='store_true', help='print results as JSON')
+    options = arguments.parse_args(argv)
+
+    mix = {}
+    for item in options.mix.split(','):
+        kind, weight = item.split('=')
+        if kind not in CALLS:
+            arguments.error('unknown call {0}'.format(kind))
+        mix[kind] = float(weight)
+
+    results = run(options.mode, [int(level) for level in options.concurrency.split(',')], options.calls, mix,
+                  options.latency, options.sessions, options.connections, options.rows)
+    if options.json:
+        print(json.dumps(results, indent=1, sort_keys=True))
+    else:
+        print(report(results))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""
+Asyncio mode of load harness, see load.py. Requires python 3
+"""
+import asyncio
+import time
+
+from plsql.aio import AsyncCall, AsyncPackage
+
+clock = time.perf_counter
+
+
+def run_asyncio(package, sequence, concurrency):
+    """
+    Function to replay calls from concurrency asyncio tasks through plsql.aio,
+    see load.run_threads
+    """
+    attrs = dict((name, AsyncCall(name)) for name in ('get_value', 'set_value', 'get_rows'))
+    attrs.update({'package': package, 'concurrency': None})
+    async_package = type('load_package_async', (AsyncPackage,), attrs)
+
+    latencies = []
+    errors = [0]
+    position = [0]
+
+    async def call(kind, index):
+        if kind == 'cursor':
+            cursor = await async_package.get_rows(index)
+            await cursor.fetch_all()
+        elif kind == 'procedure':
+            await async_package.set_value(index)
+        else:
+            await async_package.get_value(index)
+
+    async def worker():
+        while position[0] < len(sequence):
+            index = position[0]
+            position[0] += 1
+            started = clock()
+            try:
+                await call(sequence[index], index)
+            except Exception:
+                errors[0] += 1
+                continue
+            latencies.append(clock() - started)
+
+    async def main():
+        await asyncio.gather(*[worker() for index in range(concurrency)])
+
+    loop = asyncio.new_event_loop()
+    try:
+        started = clock()
+        loop.run_until_complete(main())
+        seconds = clock() - started
+    finally:
+        loop.close()
+        async_package.shutdown()
+    return latencies, errors[0], seconds
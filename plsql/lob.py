@@ -0,0 +1,236 @@
+import decimal
+
+import cx_Oracle
+
+from plsql import stats
+
+"""
+Number of LOB chunks read per round trip when iterating over LobStream
+"""
+CHUNKS_PER_READ = 8
+
+"""
+Value of numbers option to map NUMBER columns by precision and scale
+"""
+NUMBERS_AUTO = 'auto'
+
+"""
+Maximum precision of NUMBER columns fetched as native 64-bit integers
+"""
+MAX_NATIVE_INT_PRECISION = 18
+
+
+def lob_value(lob, inline_size=None, name=None, checkout=None):
+    """
+    Function to convert LOB locator to value returned from generated packages
+
+    Parameters:
+    lob          - cx_Oracle LOB or None
+    inline_size  - LOBs up to this size (characters for CLOB/NCLOB, bytes for BLOB)
+                   are read at once and returned as str/bytes, bigger LOBs are
+                   returned as LobStream. None means read all LOBs at once
+    name         - package.member returned the LOB, label of reads in plsql.stats
+    checkout     - plsql.runtime.Checkout of the call, connection is kept
+                   checked out until returned LobStream is read or closed
+    """
+    if lob is None:
+        return None
+
+    if inline_size is None:
+        if stats.active and name is not None:
+            with stats.measure(name, stats.LOB) as event:
+                data = lob.read()
+                event.lob_size = len(data)
+            return data
+        return lob.read()
+
+    stream = LobStream(lob, name=name)
+    if stream.size() <= inline_size:
+        return stream.read()
+    if checkout is not None:
+        stream.hold(checkout)
+    return stream
+
+
+def inline_lob_column(oratype, size, inline_lobs):
+    """
+    Function to check whether LOB column is fetched as str/bytes instead of locators
+
+    Parameters:
+    oratype     - cx_Oracle type of column
+    size        - maximum size of column reported by Oracle, if known
+    inline_lobs - True to inline all LOB columns, maximum size of inlined
+                  column or None/False to keep locators
+    """
+    if not inline_lobs or oratype not in (cx_Oracle.CLOB, cx_Oracle.NCLOB, cx_Oracle.BLOB):
+        return False
+    return inline_lobs is True or not size or size <= inline_lobs
+
+
+def output_type_handler(inline_lobs=None, numbers=None):
+    """
+    Function to create cx_Oracle output type handler for cursors of generated packages.
+
+    Inlined LOB columns are fetched as long strings/bytes together with the rows,
+    without extra round trip per LOB. Oracle doesn't report the length of
+    LOB values before fetching, so the size limit of inline_lobs is applied to
+    the maximum size of column; columns over it keep LOB locators.
+
+    Parameters:
+    inline_lobs - True to inline all LOB columns, maximum size of inlined
+                  column or None/False to keep locators
+    numbers     - 'auto' to fetch NUMBER columns as int when scale is 0,
+                  as Decimal when scale is positive and as float otherwise.
+                  None keeps cx_Oracle defaults
+    """
+    def handler(cursor, name, default_type, size, precision, scale):
+        if inline_lob_column(default_type, size, inline_lobs):
+            if default_type is cx_Oracle.BLOB:
+                return cursor.var(cx_Oracle.LONG_BINARY, arraysize=cursor.arraysize)
+            return cursor.var(cx_Oracle.LONG_STRING, arraysize=cursor.arraysize)
+
+        if numbers == NUMBERS_AUTO and default_type is cx_Oracle.NUMBER:
+            if scale == 0 and 0 < precision <= MAX_NATIVE_INT_PRECISION:
+                return cursor.var(int, arraysize=cursor.arraysize)
+            if scale == 0 and precision:
+                return cursor.var(cx_Oracle.STRING, 255, arraysize=cursor.arraysize, outconverter=int)
+            if scale > 0:
+                return cursor.var(cx_Oracle.STRING, 255, arraysize=cursor.arraysize,
+                                  outconverter=decimal.Decimal)
+            return cursor.var(float, arraysize=cursor.arraysize)
+
+    return handler
+
+
+def install_output_type_handler(connection, inline_lobs=True, numbers=NUMBERS_AUTO):
+    """
+    Function to set output type handler for all cursors of the connection
+    """
+    connection.outputtypehandler = output_type_handler(inline_lobs, numbers)
+
+
+class LobStream(object):
+    """
+    Class implements lazy file like reading of CLOB, NCLOB and BLOB values.
+    Data is read from the server only on read(), readinto() or iteration.
+    Pooled connection of the LOB is checked out until the whole LOB is read,
+    the stream is closed or garbage collected
+    """
+    def __init__(self, lob, chunk_size=None, encoding='utf-8', name=None):
+        """
+        Constructor.
+
+        Parameters:
+        lob         - cx_Oracle LOB
+        chunk_size  - size of pieces returned by iteration, rounded up to
+                      the multiple of LOB chunk size
+        encoding    - encoding of CLOB/NCLOB data written by readinto()
+        name        - package.member returned the LOB, label of reads in plsql.stats
+        """
+        self.lob = lob
+        self.name = name
+        self.encoding = encoding
+        self.binary = getattr(lob, 'type', None) is cx_Oracle.BLOB
+
+        lob_chunk_size = lob.getchunksize()
+        if chunk_size:
+            chunk_size = -(-chunk_size // lob_chunk_size) * lob_chunk_size
+        self.chunk_size = chunk_size or lob_chunk_size * CHUNKS_PER_READ
+
+        # Oracle LOB offsets start from 1
+        self.offset = 1
+        self._size = None
+        # encoded characters not written by readinto() yet
+        self._pending = b''
+        # plsql.runtime.Checkout of connection the LOB is read from
+        self.checkout = None
+
+    def hold(self, checkout):
+        # Function to keep connection of the call checked out while the LOB is read
+        checkout.hold()
+        self.checkout = checkout
+
+    def _release(self):
+        # Function to give connection of the call back, the LOB isn't read from it anymore
+        if self.checkout is not None:
+            checkout, self.checkout = self.checkout, None
+            checkout.done()
+
+    def size(self):
+        """
+        Function to get size of LOB, characters for CLOB/NCLOB and bytes for BLOB
+        """
+        if self._size is None:
+            self._size = self.lob.size()
+        return self._size
+
+    def tell(self):
+        return self.offset - 1
+
+    def read(self, size=-1):
+        """
+        Function to read at most size characters/bytes, all remaining data by default.
+        Return empty value at the end of LOB
+        """
+        remaining = self.size() - self.tell()
+        if size is None or size < 0 or size > remaining:
+            size = remaining
+
+        if size == 0:
+            self._release()
+            return b'' if self.binary else u''
+
+        if stats.active and self.name is not None:
+            with stats.measure(self.name, stats.LOB) as event:
+                data = self.lob.read(self.offset, size)
+                event.lob_size = len(data)
+        else:
+            data = self.lob.read(self.offset, size)
+        self.offset += len(data)
+        if self.tell() >= self.size():
+            self._release()
+        return data
+
+    def readinto(self, buffer):
+        """
+        Function to read data into writable buffer like bytearray or memoryview.
+        Character LOBs are written encoded. Return number of written bytes
+        """
+        size = len(buffer)
+        if self.binary:
+            data = self.read(size)
+        else:
+            data = self._pending
+            while len(data) < size:
+                chunk = self.read(size - len(data))
+                if not chunk:
+                    break
+                data += chunk.encode(self.encoding)
+            data, self._pending = data[:size], data[size:]
+
+        buffer[:len(data)] = data
+        return len(data)
+
+    def __iter__(self):
+        data = self.read(self.chunk_size)
+        while data:
+            yield data
+            data = self.read(self.chunk_size)
+
+    def close(self):
+        self.lob = None
+        self._release()
+
+    def __del__(self):
+        if getattr(self, 'checkout', None) is not None:
+            self._release()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def __repr__(self):
+        return "<LobStream size={0} offset={1}>".format(self._size, self.offset)
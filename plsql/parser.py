@@ -1,30 +1,258 @@
 import re
 
+"""
+Ditionary with dependences between Oracle types and cx_Oracle types
+"""
+ORATYPES = {
+    'sys_refcursor' : 'cx_Oracle.CURSOR',
+    'raw'           : 'cx_Oracle.BINARY',
+    'bfile'         : 'cx_Oracle.BFILE',
+    'blob'          : 'cx_Oracle.BLOB',
+    'clob'          : 'cx_Oracle.CLOB',
+    'date'          : 'cx_Oracle.DATETIME',
+    'char'          : 'cx_Oracle.FIXED_CHAR',
+    'nchar'         : 'cx_Oracle.FIXED_UNICODE',
+    'long row'      : 'cx_Oracle.LONG_BINARY',
+    'long raw'      : 'cx_Oracle.LONG_BINARY',
+    'long'          : 'cx_Oracle.LONG_STRING',
+    'nclob'         : 'cx_Oracle.NCLOB',
+    'number'        : 'cx_Oracle.NUMBER',
+    'rowid'         : 'cx_Oracle.ROWID',
+    'urowid'        : 'cx_Oracle.ROWID',
+    'varchar2'      : 'cx_Oracle.STRING',
+    'varchar'       : 'cx_Oracle.STRING',
+    'timestamp'     : 'cx_Oracle.TIMESTAMP',
+    'timestamp with time zone'       : 'cx_Oracle.TIMESTAMP',
+    'timestamp with local time zone' : 'cx_Oracle.TIMESTAMP',
+    'interval day to second'         : 'cx_Oracle.INTERVAL',
+    # cx_Oracle has no type of year to month intervals, they are bound as strings like '1-6'
+    'interval year to month'         : 'cx_Oracle.STRING',
+    'nvarchar2'     : 'cx_Oracle.UNICODE',
+    'integer'       : 'cx_Oracle.NUMBER',
+    'float'         : 'cx_Oracle.NUMBER',
+    'binary_float'  : 'cx_Oracle.NATIVE_FLOAT',
+    'binary_double' : 'cx_Oracle.NATIVE_FLOAT',
+    'pls_integer'   : 'cx_Oracle.NUMBER',
+    'binary_integer': 'cx_Oracle.NUMBER',
+}
+
+"""
+cx_Oracle type of anchored types (table.column%type), the real type is known
+only to the server, values are bound as strings and converted by Oracle.
+Exact types are taken from user_arguments with settings.PLSQL_METADATA 'arguments'
+"""
+ANCHORED_TYPE = 'cx_Oracle.STRING'
+
+def cx_type(oratype):
+    """
+    Function to get cx_Oracle type of Oracle type, like a 'cx_Oracle.NUMBER'.
+    Raise KeyError for unknown types
+    """
+    oratype = oratype.lower()
+    if oratype.endswith('%type'):
+        return ANCHORED_TYPE
+    return ORATYPES[oratype]
+
+"""
+Kinds of collection types: associative array (index-by table), nested table and varray
+"""
+INDEX_BY = 'index by'
+NESTED_TABLE = 'table'
+VARRAY = 'varray'
+
+"""
+Index types of associative arrays indexed by strings, such arrays can't be
+bound by cx_Oracle which supports only arrays indexed by pls_integer
+"""
+STRING_INDEXES = ('varchar2', 'varchar', 'string', 'long')
+
+"""
+Types of collection elements with maximum length
+"""
+SIZED_TYPES = ('char', 'nchar', 'varchar', 'varchar2', 'nvarchar2', 'raw')
+
+"""
+Tokens of PL/SQL source. Whitespace and comments are matched to be skipped
+"""
+TOKENS = re.compile(r"""
+      (?P<space>\s+)
+    | (?P<comment>--[^\n]*|/\*.*?\*/)
+    | (?P<string>[nN]?[qQ]'(?:\[.*?\]|\{.*?\}|\(.*?\)|<.*?>|(?P<quote>\S).*?(?P=quote))'
+                |[nN]?'(?:[^']|'')*')
+    | (?P<identifier>"[^"]+")
+    | (?P<word>[A-Za-z][\w$\#]*)
+    | (?P<number>\d+(?:\.\d+)?(?:[eE][+-]?\d+)?)
+    | (?P<symbol>:=|=>|\.\.|\|\||<=|>=|<>|!=|.)
+""", re.S | re.X)
+
+"""
+Words finishing return type of function
+"""
+FUNCTION_CLAUSES = ('deterministic', 'pipelined', 'parallel_enable', 'result_cache',
+                    'authid', 'accessible', 'aggregate', 'is', 'as')
+
+"""
+Words starting spec declarations without public members
+"""
+SKIPPED_DECLARATIONS = ('pragma', 'type', 'subtype', 'cursor')
+
+
+class Token(object):
+    """
+    Class to represent token of PL/SQL source
+    """
+    __slots__ = ('kind', 'text', 'start', 'end')
+
+    def __init__(self, kind, text, start, end):
+        self.kind = kind
+        self.text = text
+        self.start = start
+        self.end = end
+
+    def word(self):
+        # Function to get lowercased keyword or None for other tokens
+        if self.kind == 'word':
+            return self.text.lower()
+        return None
+
+    def name(self):
+        # Function to get identifier, quoted identifiers are returned without quotes
+        if self.kind == 'identifier':
+            return self.text[1:-1]
+        return self.text
+
+    def __repr__(self):
+        return "<Token {0} {1!r}>".format(self.kind, self.text)
+
+
+def tokenize(source):
+    """
+    Function to split PL/SQL source to tokens, whitespace and comments are skipped
+    """
+    for match in TOKENS.finditer(source):
+        if match.lastgroup not in ('space', 'comment'):
+            yield Token(match.lastgroup, match.group(), match.start(), match.end())
+
+
 class PlSqlParser:
 
     def get_package_members(self, package_specification):
         """
-        Function to get public functions and procedures of PL/SQL package
+        Function to get public functions and procedures of PL/SQL package.
+        The specification is read in one pass of tokenizer
 
         Parameters:
         package_specification - PL/SQL package specification
 
-        Return tuple (functions, procedures). Structure of each item of tuple see below
+        Return tuple (functions, procedures, constants). Structure of each item of tuple see below
         """
-        functions =self._get_functions(package_specification)
-        procedures = self._get_procedures(package_specification)
-        constants = self._get_constants(package_specification)
+        self.source = package_specification
+        self.package_name = None
+        # collection types declared in the specification
+        self.types = {}
+
+        functions = []
+        procedures = []
+        constants = []
+        # functions and procedures in order of declaration
+        members = []
+
+        for statement in self._statements(tokenize(package_specification)):
+            keyword = statement[0].word()
+            if keyword == 'function':
+                functions.append(self._get_function(statement))
+                members.append(functions[-1])
+            elif keyword == 'procedure':
+                procedures.append(self._get_procedure(statement))
+                members.append(procedures[-1])
+            elif keyword == 'end':
+                break
+            elif keyword == 'type':
+                collection = self._get_collection(statement)
+                if collection is not None:
+                    self.types[statement[1].name().lower()] = collection
+            elif keyword not in SKIPPED_DECLARATIONS and len(statement) > 2 \
+                    and statement[1].word() == 'constant':
+                constants.append(self._get_constant(statement))
+
+        self._number_overloads(members)
+        self._set_collections(functions + procedures)
 
         return functions, procedures, constants
 
-    def _get_constants(self, source):
+    def _statements(self, tokens):
+        """
+        Function to group tokens of package specification to declarations
+        finished by semicolon. Header of package is skipped
+        """
+        statement = []
+        depth = 0
+        header = None
+        previous = None
+
+        for token in tokens:
+            if header is None:
+                header = token.word() in ('create', 'package')
+            if header:
+                # create or replace package [schema.]name [authid ...] as|is
+                if token.word() in ('as', 'is'):
+                    header = False
+                elif previous is not None and (previous.word() == 'package' or previous.text == '.'):
+                    self.package_name = token.name()
+                previous = token
+                continue
+
+            if token.text == '(':
+                depth += 1
+            elif token.text == ')':
+                depth -= 1
+
+            if token.text == ';' and depth == 0:
+                if statement:
+                    yield statement
+                statement = []
+            else:
+                statement.append(token)
+
+        if statement:
+            yield statement
+
+    def _text(self, tokens):
+        # Function to get source text of tokens
+        if not tokens:
+            return None
+        return self.source[tokens[0].start:tokens[-1].end]
+
+    def _oratype(self, tokens):
+        """
+        Function to get Oracle type without size, precision and character semantics,
+        like a number, timestamp with time zone, employees.salary%type
+        """
+        parts = []
+        depth = 0
+        for token in tokens:
+            if token.text == '(':
+                depth += 1
+            elif token.text == ')':
+                depth -= 1
+            elif depth == 0:
+                parts.append(token)
+
+        text = ''
+        for previous, token in zip([None] + parts, parts):
+            if previous is not None and previous.kind == 'word' and token.kind == 'word':
+                text += ' '
+            text += token.name()
+        return text
+
+    def _get_constant(self, tokens):
         """
-        Function to get information about constants in package specification
+        Function to get information about constant in package specification
 
         Parameters:
-        source     - PL/QSL package specification
+        tokens     - tokens of constant declaration
 
-        Return array of dictionaries.
+        Return dictionary.
         Dictionary structure:
         {
             'name'    : "constant name",
@@ -32,149 +260,227 @@ class PlSqlParser:
             'oratype' : "constant Oracle type",
         }
         """
-        constants = []
+        declaration = tokens[2:]
+        position = 0
+        while position < len(declaration) \
+                and declaration[position].text != ':=' and declaration[position].word() != 'default':
+            position += 1
+
+        oratype = declaration[:position]
+        if len(oratype) > 1 and oratype[-1].word() == 'null' and oratype[-2].word() == 'not':
+            oratype = oratype[:-2]
+
+        return {
+            'name'    : tokens[0].name(),
+            'oratype' : self._text(oratype),
+            'value'   : self._text(declaration[position + 1:]),
+        }
 
-        # retrieve all constants from the source
-        raw_constants = re.findall('.+?constant.*?:=.*?;', source, re.I | re.S)
-
-        for item in raw_constants:
-            item = item.replace('\n', '')
-            result = re.search('''
-                               (?P<name>\w+)            # constant name
-                               \s*constant\s*           # keyword
-                               (?P<oratype>[\w\(\)]+)   # constant Oracle type
-                               \s*:=\s*
-                               (?P<value>.*);           # constant value
-                               ''', item, re.I | re.X)
-            if result:
-                constants.append({
-                    'name' : result.group('name'),
-                    'oratype' : result.group('oratype'),
-                    'value' : result.group('value')
-                })
-
-        return constants
-
-    def _get_functions(self, source):
+    def _get_collection(self, tokens):
         """
-        Function to get information about function in package specification
+        Function to get information about collection type declared in package
+        specification. Return None for other types
 
         Parameters:
-        source     - PL/QSL package specification
+        tokens     - tokens of type declaration
 
-        Return array of dictionaries.
+        Return dictionary.
         Dictionary structure:
         {
-            'name'    : "function name",
-            'args'    : ["array of dictionaries of function arguments"],
-            'oratype' : "function return Oracle type",
+            'name'       : "package.type name",
+            'collection' : "kind of collection: index by, table or varray",
+            'element'    : "Oracle type of elements without size",
+            'length'     : "maximum size of string elements or None",
+            'size'       : "maximum number of elements of varray or None",
+            'index'      : "Oracle type of index of associative array or None",
+        }
+        """
+        words = [token.word() for token in tokens]
+        if len(tokens) < 5 or words[2] not in ('is', 'as') or 'of' not in words:
+            return None
+
+        start = words.index('of')
+        if words[3] == 'table' and start == 4:
+            kind = NESTED_TABLE
+        elif words[3] in ('varray', 'varying'):
+            kind = VARRAY
+        else:
+            return None
+
+        end = start + 1
+        while end < len(tokens) and words[end] not in ('not', 'index'):
+            end += 1
+        index = None
+        if 'index' in words[end:]:
+            kind = INDEX_BY
+            index = self._oratype(tokens[words.index('index', end) + 2:])
+
+        element = tokens[start + 1:end]
+        lengths = [token.text for token in element if token.kind == 'number']
+        if self._oratype(element) not in SIZED_TYPES:
+            lengths = []
+        sizes = [token.text for token in tokens[3:start] if token.kind == 'number']
+
+        name = tokens[1].name()
+        if self.package_name:
+            name = '{0}.{1}'.format(self.package_name, name)
+
+        return {
+            'name'       : name,
+            'collection' : kind,
+            'element'    : self._oratype(element),
+            'length'     : int(lengths[0]) if lengths else None,
+            'size'       : int(sizes[0]) if sizes and kind == VARRAY else None,
+            'index'      : index,
         }
+
+    def _set_collections(self, members):
+        """
+        Function to mark arguments and return values of collection types declared
+        in the specification, they get key 'collection' with the type, see _get_collection
+        """
+        def collection(oratype):
+            parts = (oratype or '').lower().split('.')
+            if len(parts) == 2 and self.package_name and parts[0] == self.package_name.lower():
+                parts = parts[1:]
+            if len(parts) == 1:
+                return self.types.get(parts[0])
+            return None
+
+        for member in members:
+            for item in member['args'] + [member]:
+                if collection(item.get('oratype')) is not None:
+                    item['collection'] = dict(collection(item['oratype']))
+
+    def _get_args(self, tokens):
+        """
+        Function to get arguments from tokens after function/procedure name.
+        Return tuple (list of arguments, position of token after arguments)
+
         Dictionary of argument representation:
         {
             'name'    : "argument name",
-            'type'    : "argument type, one of in, out, in out on None",
-            'oratype' : "Oracle type of argument like a NUMBER, SYS_REFCURSOR, etc.",
+            'type'    : "argument type, one of in, out, in out or None",
+            'oratype' : "Oracle type of argument like a NUMBER, SYS_REFCURSOR, emp.sal%TYPE, etc.",
+            'default' : "default value or None",
+        }
         """
-        functions = []
-
-        # retrieve all functions from the source
-        raw_functions = re.findall('(function\s+\w+\s*.+?;)', source, re.S | re.I )
-
-        for item in raw_functions:
-            item = item.replace('\n', '')
-
-            # catch procedure name, return type and string of arguments
-            result = re.search("""
-                               function\s+                         # keyword
-                               (?P<name>\w+)\s*                    # function name
-                               (?:\((?P<args>.+)?\)\s*)?           # function arguments
-                               return\s+(?P<return_oratype>\w+)    # function return Oracle type
-                               """, item, re.I | re.S | re.X)
-
-            function = {
-                'name'    : result.group('name'),
-                'oratype' : result.group('return_oratype'),
-                'args'    : []
-            }
-
-            if result.group('args'):
-                # split string of argument on the parts like  ['arg1 in number', 'arg2 in out varchar2', etc]
-                for param in result.group('args').split(','):
-                    param = param.strip(' ').lstrip(' ').replace('\s+', ' ')
-
-                    # catch argument name, argument type, argument Oracle type
-                    arg = re.search("""
-                                    (?P<name>\w+)                                   # argument name
-                                    \s+
-                                    (?:(?P<type>(?:in\s+out)|(?:in)|(?:out))\s+)?   # argument type (in, out, in out)
-                                    (?P<oratype>\w+)                                # argument oracle type
-                                    """, param, re.X)
-                    function['args'].append({
-                        'name'    : arg.group('name'),
-                        'type'    : arg.group('type'),
-                        'oratype' : arg.group('oratype')
-                    })
-            functions.append(function)
-
-        return functions
-
-    def _get_procedures(self, source):
-        """
-        Function to get information about procedures in package specification
+        args = []
+        if not tokens or tokens[0].text != '(':
+            return args, 0
+
+        # split tokens of arguments by commas outside of parentheses
+        params = [[]]
+        depth = 0
+        position = 1
+        while position < len(tokens):
+            token = tokens[position]
+            position += 1
+            if token.text == '(':
+                depth += 1
+            elif token.text == ')':
+                if depth == 0:
+                    break
+                depth -= 1
+            elif token.text == ',' and depth == 0:
+                params.append([])
+                continue
+            params[-1].append(token)
+
+        for param in params:
+            if not param:
+                continue
+
+            modes = []
+            index = 1
+            while index < len(param) and param[index].word() in ('in', 'out', 'nocopy'):
+                if param[index].word() != 'nocopy':
+                    modes.append(param[index].word())
+                index += 1
+
+            end = index
+            while end < len(param) and param[end].text != ':=' and param[end].word() != 'default':
+                end += 1
+
+            args.append({
+                'name'    : param[0].name(),
+                'type'    : ' '.join(modes) or None,
+                'oratype' : self._oratype(param[index:end]),
+                'default' : self._text(param[end + 1:]),
+            })
+
+        return args, position
+
+    def _get_function(self, tokens):
+        """
+        Function to get information about function in package specification
 
         Parameters:
-        source     - PL/QSL package specification
+        tokens     - tokens of function declaration
 
-        Return array of dictionaries.
+        Return dictionary.
         Dictionary structure:
         {
-            'name' : "procedure name",
-            'args' : ["array of dictionaries of procedure arguments"],
+            'name'     : "function name",
+            'args'     : ["array of dictionaries of function arguments, see _get_args"],
+            'oratype'  : "function return Oracle type",
+            'overload' : "number of overloaded function with the same name or None",
         }
-        Dictionary of argument representation:
+        Pipelined functions have also key 'pipelined' with value True
+        """
+        args, position = self._get_args(tokens[2:])
+        position += 2
+
+        # return type follows arguments
+        while position < len(tokens) and tokens[position].word() != 'return':
+            position += 1
+        end = position + 1
+        while end < len(tokens) and tokens[end].word() not in FUNCTION_CLAUSES:
+            end += 1
+
+        function = {
+            'name'     : tokens[1].name(),
+            'oratype'  : self._oratype(tokens[position + 1:end]),
+            'args'     : args,
+            'overload' : None,
+        }
+        if 'pipelined' in [token.word() for token in tokens[end:]]:
+            function['pipelined'] = True
+        return function
+
+    def _get_procedure(self, tokens):
+        """
+        Function to get information about procedure in package specification
+
+        Parameters:
+        tokens     - tokens of procedure declaration
+
+        Return dictionary.
+        Dictionary structure:
         {
-            'name'    : "argument name",
-            'type'    : "argument type, one of in, out, in out on None",
-            'oratype' : "Oracle type of argument like a NUMBER, SYS_REFCURSOR, etc.",
+            'name'     : "procedure name",
+            'args'     : ["array of dictionaries of procedure arguments, see _get_args"],
+            'overload' : "number of overloaded procedure with the same name or None",
+        }
         """
-        procedures = []
+        args, position = self._get_args(tokens[2:])
+
+        return {
+            'name'     : tokens[1].name(),
+            'args'     : args,
+            'overload' : None,
+        }
 
-        # retrieve all procedures from the source
-        raw_procedures = re.findall('(procedure\s+\w+\s*.+?;)', source, re.S | re.I )
-
-        for item in raw_procedures:
-            item = item.replace('\n', '')
-
-            # catch procedure name and string of arguments
-            result = re.search("""
-                               procedure\s+                     # keyword
-                               (?P<name>\w+)\s*                 # procedure name
-                               (?:\((?P<args>.+)?\)\s*)?        # procedure arguments
-                               """, item, re.I | re.S | re.X)
-
-            procedure = {
-                'name' : result.group('name'),
-                'args' : []
-            }
-
-            if result.group('args'):
-                # split string of argument on the parts like  ['arg1 in number', 'arg2 in out varchar2', etc]
-                for param in result.group('args').split(','):
-                    param = param.strip(' ').lstrip(' ').replace('\s+', ' ')
-
-                    # catch argument name, argument type, argument Oracle type
-                    params = re.search("""
-                                       (?P<name>\w+)                                   # argument name
-                                       \s+
-                                       (?:(?P<type>(?:in\s+out)|(?:in)|(?:out))\s+)?   # argument type (in, out, in out)
-                                       (?P<oratype>\w+)                                # argument oracle type
-                                       """, param, re.X)
-
-                    procedure['args'].append({
-                        'name'    : params.group('name'),
-                        'type'    : params.group('type'),
-                        'oratype' : params.group('oratype')
-                    })
-            procedures.append(procedure)
-
-        return procedures
+    def _number_overloads(self, members):
+        # Function to number members with the same name like USER_ARGUMENTS.OVERLOAD
+        counts = {}
+        for member in members:
+            name = member['name'].lower()
+            counts[name] = counts.get(name, 0) + 1
+
+        numbers = {}
+        for member in members:
+            name = member['name'].lower()
+            if counts[name] > 1:
+                numbers[name] = numbers.get(name, 0) + 1
+                member['overload'] = numbers[name]
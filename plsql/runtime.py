@@ -0,0 +1,844 @@
+import threading
+import weakref
+from collections import OrderedDict
+
+import cx_Oracle
+
+from plsql import stats
+from plsql.cache import ResultCache
+from plsql.cursor import Cursor
+from plsql.lob import LobStream, lob_value, output_type_handler
+
+"""
+Argument modes
+"""
+IN = 'in'
+OUT = 'out'
+IN_OUT = 'in out'
+
+"""
+Default number of prepared calls kept for a connection
+"""
+STATEMENT_CACHE_SIZE = 50
+
+"""
+Default number of rows sent per round trip by bulk calls
+"""
+BULK_BATCH_SIZE = 1000
+
+"""
+Default maximum number of elements of associative array arguments
+"""
+ARRAY_SIZE = 1000
+
+"""
+Statement caches of connections
+"""
+_caches = weakref.WeakKeyDictionary()
+_caches_lock = threading.Lock()
+
+"""
+Batches recording calls in current thread
+"""
+_local = threading.local()
+
+
+class CollectionType(object):
+    """
+    Class to represent PL/SQL collection type of argument or return value.
+    Collections are passed and returned as python lists, subclasses create
+    bind variables by var(cursor) and set lists to them by bind(var, value),
+    see create_var and set_value
+    """
+    def value(self, value):
+        # Function to convert value of bind variable to list
+        return value
+
+
+class AssociativeArray(CollectionType):
+    """
+    Class to represent associative array (table of ... index by pls_integer)
+    bound as array variable, the whole list is sent in one round trip
+    """
+    def __init__(self, oratype, size=ARRAY_SIZE, length=None):
+        """
+        Constructor.
+
+        Parameters:
+        oratype    - cx_Oracle type of elements
+        size       - maximum number of elements
+        length     - maximum length of string elements
+        """
+        self.oratype = oratype
+        self.size = size
+        self.length = length
+
+    def var(self, cursor):
+        if self.length:
+            return cursor.arrayvar(self.oratype, self.size, self.length)
+        return cursor.arrayvar(self.oratype, self.size)
+
+    def bind(self, var, value):
+        value = list(value or [])
+        if len(value) > self.size:
+            raise ValueError("array of {0} elements exceeds array size {1}".format(len(value), self.size))
+        var.setvalue(0, value)
+
+    def __repr__(self):
+        return "AssociativeArray({0!r}, {1})".format(self.oratype, self.size)
+
+
+class SqlCollection(CollectionType):
+    """
+    Class to represent nested table or varray of SQL type (create type ... as
+    table of ...) bound as object variable
+    """
+    def __init__(self, type_name):
+        """
+        Constructor.
+
+        Parameters:
+        type_name  - name of collection type: [schema.]type or package.type
+        """
+        self.type_name = type_name
+
+    def var(self, cursor):
+        return cursor.var(cx_Oracle.OBJECT, typename=self.type_name)
+
+    def bind(self, var, value):
+        if value is None:
+            var.setvalue(0, None)
+            return
+        collection = var.type.newobject()
+        collection.extend(list(value))
+        var.setvalue(0, collection)
+
+    def value(self, value):
+        if value is None:
+            return None
+        return value.aslist()
+
+    def __repr__(self):
+        return "SqlCollection({0!r})".format(self.type_name)
+
+
+def create_var(cursor, oratype):
+    """
+    Function to create bind variable of argument or return value
+    """
+    if isinstance(oratype, CollectionType):
+        return oratype.var(cursor)
+    return cursor.var(oratype)
+
+
+def set_value(var, oratype, value):
+    """
+    Function to set value of argument to bind variable
+    """
+    if isinstance(oratype, CollectionType):
+        oratype.bind(var, value)
+    else:
+        var.setvalue(0, value)
+
+
+class Checkout(object):
+    """
+    Class to get connection for a call of package member.
+
+    Connection is taken from the package pool when it is set, otherwise
+    package connection is used. Connection returns to the pool when the
+    call is finished and all cursors returned by the call are closed:
+
+        with Checkout(package) as checkout:
+            cursor = checkout.connection.cursor()
+    """
+    def __init__(self, package, connection=None):
+        self.package = package
+        self.connection = connection
+        # pool the connection is taken from
+        self.pool = None
+        # number of users of connection: the call and returned cursors
+        self.users = 0
+
+    def __enter__(self):
+        if self.connection is None:
+            self.pool = getattr(self.package, 'pool', None)
+            if self.pool is not None:
+                self.connection = self.pool.acquire()
+            else:
+                self.connection = self.package.connection
+        self.users = 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.done()
+        return False
+
+    def hold(self):
+        # Function to keep connection checked out while returned cursor is open
+        self.users += 1
+
+    def done(self):
+        # Function to release connection by one of its users
+        self.users -= 1
+        if self.users == 0 and self.pool is not None:
+            self.pool.release(self.connection)
+
+
+class StatementCache(object):
+    """
+    Class implements LRU cache of prepared calls of a connection
+    """
+    def __init__(self, size=STATEMENT_CACHE_SIZE):
+        self.size = size
+        self.calls = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, call, connection):
+        """
+        Function to get prepared call, the call is prepared on cache miss
+        """
+        with self.lock:
+            prepared = self.calls.pop(call, None)
+            if prepared is None:
+                prepared = PreparedCall(call, connection)
+            self.calls[call] = prepared
+
+            while len(self.calls) > self.size:
+                self.calls.popitem(last=False)[1].close()
+
+        return prepared
+
+    def clear(self):
+        with self.lock:
+            for prepared in self.calls.values():
+                prepared.close()
+            self.calls.clear()
+
+
+def statement_cache(connection, size=STATEMENT_CACHE_SIZE):
+    """
+    Function to get statement cache of connection.
+    Return None for connections which can't be weak referenced
+
+    Parameters:
+    connection - DB-API connection
+    size       - size of cache created for the connection
+    """
+    with _caches_lock:
+        try:
+            cache = _caches.get(connection)
+        except TypeError:
+            return None
+
+        if cache is None:
+            cache = _caches[connection] = StatementCache(size)
+            # let Oracle client keep parsed statements of the connection too
+            if getattr(connection, 'stmtcachesize', size) < size:
+                connection.stmtcachesize = size
+
+    return cache
+
+
+class PreparedCall(object):
+    """
+    Class implements call of package member on a connection.
+    Cursor and bind variables are created once and reused by every execution
+    """
+    def __init__(self, call, connection):
+        self.call = call
+        self.cursor = connection.cursor()
+        self.lock = threading.Lock()
+
+        self.vars = []
+        if call.return_type is not None:
+            self.vars.append(create_var(self.cursor, call.return_type))
+        for name, mode, oratype in call.args:
+            self.vars.append(create_var(self.cursor, oratype))
+        self.arg_vars = self.vars[len(self.vars) - len(call.args):]
+        self.arg_types = [arg[2] for arg in call.args]
+
+    def execute(self, values):
+        """
+        Function to execute the call. Return list of values of return value
+        and OUT arguments
+
+        Parameters:
+        values     - list of argument values
+        """
+        with self.lock:
+            for var, oratype, value in zip(self.arg_vars, self.arg_types, values):
+                set_value(var, oratype, value)
+            self.cursor.execute(self.call.statement, self.vars)
+            return [self.vars[index].getvalue() for index in self.call.outputs]
+
+    def close(self):
+        self.cursor.close()
+
+
+class Call(object):
+    """
+    Class implements call of PL/SQL package member from generated package class.
+    The call is a descriptor, package.member returns BoundCall
+    """
+    def __init__(self, name, return_type=None, args=(), **options):
+        """
+        Constructor.
+
+        Parameters:
+        name          - package.member
+        return_type   - cx_Oracle type of function result, None for procedures
+        args          - list of tuples (argument name, mode, cx_Oracle type
+                        or CollectionType)
+        options       - lob_inline_size, cache (dictionary with ttl and size
+                        of ResultCache) and options of returned Cursor
+        """
+        self.name = name
+        self.return_type = return_type
+        self.args = [tuple(arg) for arg in args]
+        self.collections = bool([oratype for oratype in [return_type] + [arg[2] for arg in self.args]
+                                 if isinstance(oratype, CollectionType)])
+        self.arg_names = [arg[0] for arg in self.args]
+        self.lob_inline_size = options.pop('lob_inline_size', None)
+        cache = options.pop('cache', None)
+        self.cursor_options = options
+
+        # rows of returned SQL collection can be streamed by query, see BoundCall.rows
+        self.table = None
+        if isinstance(return_type, SqlCollection) and not [arg for arg in self.args if arg[1] != IN]:
+            self.table = TableFunctionCall(name, self.args, lob_inline_size=self.lob_inline_size, **options)
+
+        binds = [':{0}'.format(index + 1) for index in range(len(self.args))]
+        if return_type is None:
+            self.statement = "begin {0}({1}); end;".format(name, ', '.join(binds))
+        else:
+            self.statement = "begin :r := {0}({1}); end;".format(name, ', '.join(binds))
+
+        # indexes of bind variables with returned values
+        offset = 0 if return_type is None else 1
+        self.outputs = [index + offset for index, arg in enumerate(self.args) if arg[1] != IN]
+        if return_type is not None:
+            self.outputs.insert(0, 0)
+
+        # variables holding cursors and LOB locators can't be reused while
+        # returned values are alive
+        types = [self.return_type] + [arg[2] for arg in self.args if arg[1] != IN]
+        self.reusable = not [oratype for oratype in types
+                             if oratype in (cx_Oracle.CURSOR, cx_Oracle.CLOB, cx_Oracle.NCLOB, cx_Oracle.BLOB)]
+
+        # results of functions with IN arguments only can be cached
+        self.result_cache = None
+        if cache:
+            if return_type is None or not self.reusable or self.outputs != [0]:
+                raise TypeError("{0} has OUT arguments or returns cursor or LOB and can't be cached".format(name))
+            self.result_cache = ResultCache(**cache)
+
+        self._bound = {}
+
+    def __get__(self, instance, owner):
+        bound = self._bound.get(owner)
+        if bound is None:
+            bound = self._bound[owner] = BoundCall(self, owner)
+        return bound
+
+    def values(self, args, kwargs):
+        """
+        Function to get list of argument values from arguments of python call
+        """
+        if len(args) > len(self.args):
+            raise TypeError("{0} takes at most {1} arguments ({2} given)".format(
+                self.name, len(self.args), len(args)))
+
+        values = list(args) + [None] * (len(self.args) - len(args))
+        for name, value in kwargs.items():
+            if name not in self.arg_names:
+                raise TypeError("{0} got an unexpected keyword argument '{1}'".format(self.name, name))
+            values[self.arg_names.index(name)] = value
+
+        missing = [name for index, (name, mode, oratype) in enumerate(self.args)
+                   if mode != OUT and index >= len(args) and name not in kwargs]
+        if missing:
+            raise TypeError("{0} takes argument '{1}'".format(self.name, missing[0]))
+
+        return values
+
+    def prepare(self, package, connection):
+        """
+        Function to get prepared call for connection
+        """
+        if self.reusable:
+            cache = statement_cache(connection, getattr(package, 'statement_cache_size', STATEMENT_CACHE_SIZE))
+            if cache is not None:
+                return cache.get(self, connection)
+        return PreparedCall(self, connection)
+
+    def convert(self, oratype, value, checkout):
+        """
+        Function to convert returned value to python value
+        """
+        if oratype is cx_Oracle.CURSOR:
+            return Cursor(value, checkout=checkout, name=self.name, **self.cursor_options)
+        if oratype in (cx_Oracle.CLOB, cx_Oracle.NCLOB, cx_Oracle.BLOB):
+            return lob_value(value, self.lob_inline_size, self.name, checkout)
+        if isinstance(oratype, CollectionType):
+            return oratype.value(value)
+        return value
+
+    def result(self, outputs):
+        """
+        Function to make result of python call from values of return value and OUT arguments
+        """
+        if not outputs:
+            return None
+        if len(outputs) == 1:
+            return outputs[0]
+        return tuple(outputs)
+
+    def output_types(self):
+        types = [arg[2] for arg in self.args if arg[1] != IN]
+        if self.return_type is not None:
+            types.insert(0, self.return_type)
+        return types
+
+    def invoke(self, package, args, kwargs):
+        """
+        Function to call package member
+
+        Parameters:
+        package    - generated package class with connection or pool
+        args       - positional arguments of python call
+        kwargs     - keyword arguments of python call
+        """
+        values = self.values(args, kwargs)
+
+        if self.result_cache is not None:
+            found, result = self.result_cache.get(tuple(values))
+            if found:
+                return result
+
+        if not stats.active:
+            result = self.execute(package, values)
+        else:
+            with stats.measure(self.name, stats.CALL):
+                result = self.execute(package, values)
+
+        if self.result_cache is not None:
+            self.result_cache.put(tuple(values), result)
+        return result
+
+    def execute(self, package, values):
+        """
+        Function to execute the call with argument values in one round trip
+        """
+        with Checkout(package) as checkout:
+            prepared = self.prepare(package, checkout.connection)
+            outputs = []
+            try:
+                for oratype, value in zip(self.output_types(), prepared.execute(values)):
+                    outputs.append(self.convert(oratype, value, checkout))
+            except Exception:
+                # cursors and LOB streams converted before the failure give their connection back
+                for output in outputs:
+                    if isinstance(output, (Cursor, LobStream)):
+                        output.close()
+                raise
+            finally:
+                if not self.reusable:
+                    prepared.close()
+
+        return self.result(outputs)
+
+    def many(self, package, rows, batch_size=None):
+        """
+        Function to call package member for each row with array binding,
+        batch_size rows are sent per round trip.
+
+        A failed row doesn't stop the call, execution continues with the next
+        row and the error is reported in the result.
+
+        Parameters:
+        package    - generated package class with connection or pool
+        rows       - list of tuples of positional arguments or dictionaries
+                     of keyword arguments
+        batch_size - number of rows per round trip, package bulk_batch_size by default
+        """
+        if not self.reusable:
+            raise TypeError("{0} returns cursors or LOBs and can't be called in bulk".format(self.name))
+        if self.collections:
+            raise TypeError("{0} has collection arguments and can't be called in bulk".format(self.name))
+
+        batch_size = batch_size or getattr(package, 'bulk_batch_size', BULK_BATCH_SIZE)
+        values = []
+        for row in rows:
+            if isinstance(row, dict):
+                values.append(self.values((), row))
+            else:
+                values.append(self.values(tuple(row), {}))
+
+        if not stats.active:
+            return self._many(package, values, batch_size)
+
+        with stats.measure(self.name, stats.BULK) as event:
+            result = self._many(package, values, batch_size)
+            event.round_trips = result.round_trips
+            event.rows = len(result)
+            event.errors = len(result.errors)
+        return result
+
+    def _many(self, package, values, batch_size):
+        # Function to execute the call for rows of argument values
+        result = BulkResult(len(values))
+        with Checkout(package) as checkout:
+            cursor = checkout.connection.cursor()
+            try:
+                for start in range(0, len(values), batch_size):
+                    self._execute_many(cursor, values[start:start + batch_size], start, result)
+            finally:
+                cursor.close()
+
+        return result
+
+    def _execute_many(self, cursor, batch, offset, result):
+        """
+        Function to execute the call for batch of rows, rows after failed one
+        are executed again by the next round trip. When the driver doesn't
+        report the number of successful rows, none of the rows is executed
+        again and all of them are reported as failed
+        """
+        position = 0
+        while position < len(batch):
+            rows = batch[position:]
+
+            vars = []
+            if self.return_type is not None:
+                vars.append(cursor.var(self.return_type, arraysize=len(rows)))
+            for index, (name, mode, oratype) in enumerate(self.args):
+                var = cursor.var(oratype, arraysize=len(rows))
+                for row_index, row in enumerate(rows):
+                    var.setvalue(row_index, row[index])
+                vars.append(var)
+
+            cursor.setinputsizes(*vars)
+            result.round_trips += 1
+            try:
+                cursor.executemany(self.statement, len(rows))
+                executed, error = len(rows), None
+            except cx_Oracle.DatabaseError as e:
+                # for PL/SQL blocks rowcount is number of successful iterations
+                executed, error = cursor.rowcount, e
+                if not 0 <= executed < len(rows):
+                    # rows executed already would repeat their side effects
+                    for row_index in range(len(rows)):
+                        result.errors.append((offset + position + row_index, error))
+                    return
+
+            for row_index in range(executed):
+                result.outputs[offset + position + row_index] = self.result(
+                    [vars[index].getvalue(row_index) for index in self.outputs]
+                )
+
+            if error is None:
+                return
+
+            result.errors.append((offset + position + executed, error))
+            position += executed + 1
+
+    def signature(self):
+        args = []
+        for name, mode, oratype in self.args:
+            args.append(name + '=None' if mode == OUT else name)
+        return "{0}({1})".format(self.name.split('.')[-1], ', '.join(args))
+
+
+class FunctionCall(Call):
+    """
+    Class implements call of PL/SQL package function
+    """
+    def __init__(self, name, return_type, args=(), **options):
+        super(FunctionCall, self).__init__(name, return_type, args, **options)
+
+
+class ProcedureCall(Call):
+    """
+    Class implements call of PL/SQL package procedure
+    """
+    def __init__(self, name, args=(), **options):
+        super(ProcedureCall, self).__init__(name, None, args, **options)
+
+
+class TableFunctionCall(Call):
+    """
+    Class implements call of pipelined PL/SQL function or function returning
+    SQL collection by query "select * from table(package.function(...))".
+    Call returns Cursor, rows are fetched lazily in batches of its arraysize
+    """
+    def __init__(self, name, args=(), **options):
+        super(TableFunctionCall, self).__init__(name, cx_Oracle.CURSOR, args, **options)
+        if [arg for arg in self.args if arg[1] != IN]:
+            raise TypeError("{0} has OUT arguments and can't be queried".format(name))
+
+        binds = [':{0}'.format(index + 1) for index in range(len(self.args))]
+        self.statement = "select * from table({0}({1}))".format(name, ', '.join(binds))
+        self.outputs = [0]
+        self.table = self
+
+    def execute(self, package, values):
+        """
+        Function to open query of the function with argument values
+        """
+        with Checkout(package) as checkout:
+            cursor = checkout.connection.cursor()
+            try:
+                # defines of query are made by execute, handler must be set before
+                if self.cursor_options.get('inline_lobs') or self.cursor_options.get('numbers'):
+                    cursor.outputtypehandler = output_type_handler(self.cursor_options.get('inline_lobs'),
+                                                                   self.cursor_options.get('numbers'))
+                vars = []
+                for (name, mode, oratype), value in zip(self.args, values):
+                    var = create_var(cursor, oratype)
+                    set_value(var, oratype, value)
+                    vars.append(var)
+                cursor.execute(self.statement, vars)
+            except Exception:
+                cursor.close()
+                raise
+            return self.convert(cx_Oracle.CURSOR, cursor, checkout)
+
+
+class BulkResult(object):
+    """
+    Class implements result of bulk call.
+
+    outputs     - results of the call for each row, None for failed rows
+    errors      - list of tuples (row index, exception) of failed rows
+    round_trips - number of executions of the call
+    """
+    def __init__(self, count):
+        self.outputs = [None] * count
+        self.errors = []
+        self.round_trips = 0
+
+    def failed(self):
+        return [index for index, error in self.errors]
+
+    def __len__(self):
+        return len(self.outputs)
+
+    def __iter__(self):
+        return iter(self.outputs)
+
+    def __repr__(self):
+        return "<BulkResult rows={0} errors={1}>".format(len(self.outputs), len(self.errors))
+
+
+class BoundCall(object):
+    """
+    Class implements call of package member bound to generated package class
+    """
+    def __init__(self, call, package):
+        self.call = call
+        self.package = package
+        self.__name__ = call.name.split('.')[-1]
+        self.__doc__ = call.signature()
+
+    def __call__(self, *args, **kwargs):
+        batch = current_batch()
+        if batch is not None:
+            return batch.add(self.call, self.package, self.call.values(args, kwargs))
+        return self.call.invoke(self.package, args, kwargs)
+
+    def rows(self, *args, **kwargs):
+        """
+        Function to stream rows of collection returned by the function,
+        see TableFunctionCall
+        """
+        if self.call.table is None:
+            raise TypeError("{0} doesn't return SQL collection".format(self.call.name))
+        return self.call.table.invoke(self.package, args, kwargs)
+
+    def many(self, rows, batch_size=None):
+        """
+        Function to call package member for each row with array binding,
+        see Call.many
+        """
+        return self.call.many(self.package, rows, batch_size)
+
+    def __repr__(self):
+        return "<{0} of {1}>".format(self.call.signature(), self.call.name.split('.')[0])
+
+
+class CallFuture(object):
+    """
+    Class implements result of call recorded by batch, available after
+    the batch is executed
+    """
+    def __init__(self, call):
+        self.call = call
+        self._done = False
+        self._result = None
+        self._error = None
+
+    def done(self):
+        return self._done
+
+    def result(self):
+        """
+        Function to get result of the call, raise the error of batch if
+        the batch failed
+        """
+        if not self._done:
+            raise RuntimeError("{0} is not executed yet".format(self.call.name))
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def set_result(self, result):
+        self._result = result
+        self._done = True
+
+    def set_error(self, error):
+        self._error = error
+        self._done = True
+
+    def __repr__(self):
+        state = 'done' if self._done else 'pending'
+        return "<CallFuture {0} {1}>".format(self.call.name, state)
+
+
+class Batch(object):
+    """
+    Class implements batch of package calls executed in one round trip.
+
+    Calls of generated packages made in the with block are not executed
+    immediately, they return CallFuture. On exit of the block all calls
+    are executed as one anonymous PL/SQL block and futures are resolved:
+
+        with batch() as b:
+            first = package.function(1)
+            second = other_package.function(2)
+        first.result(), second.result()
+    """
+    def __init__(self, connection=None):
+        """
+        Constructor.
+
+        Parameters:
+        connection - connection to execute the batch, by default connection
+                     of package of first call is used
+        """
+        self.connection = connection
+        # list of tuples (call, package, argument values, future)
+        self.calls = []
+        self._previous = None
+
+    def add(self, call, package, values):
+        """
+        Function to record call of package member, return CallFuture
+        """
+        if isinstance(call, TableFunctionCall):
+            raise TypeError("{0} is a table function and can't be called in batch".format(call.name))
+        future = CallFuture(call)
+        self.calls.append((call, package, values, future))
+        return future
+
+    def statement(self, calls=None):
+        """
+        Function to get anonymous block calling recorded members
+        """
+        lines = ['begin']
+        position = 0
+        for call, package, values, future in (self.calls if calls is None else calls):
+            result = ''
+            if call.return_type is not None:
+                position += 1
+                result = ':{0} := '.format(position)
+            binds = [':{0}'.format(position + index + 1) for index in range(len(call.args))]
+            position += len(call.args)
+            lines.append('    {0}{1}({2});'.format(result, call.name, ', '.join(binds)))
+        lines.append('end;')
+        return '\n'.join(lines)
+
+    def execute(self):
+        """
+        Function to execute recorded calls and resolve their futures.
+        With plsql.stats enabled time of the batch is divided between its calls
+        """
+        calls, self.calls = self.calls, []
+        if not calls:
+            return
+
+        if not stats.active:
+            return self._execute(calls)
+
+        started = stats.clock()
+        error = None
+        try:
+            self._execute(calls)
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            seconds = (stats.clock() - started) / len(calls)
+            for index, (call, package, values, future) in enumerate(calls):
+                stats.record(call.name, stats.BATCH, seconds, round_trips=1 if index == 0 else 0, error=error)
+
+    def _execute(self, calls):
+        # Function to execute calls in one anonymous block
+        with Checkout(calls[0][1], self.connection) as checkout:
+            cursor = checkout.connection.cursor()
+            try:
+                call_vars = []
+                for call, package, values, future in calls:
+                    vars = []
+                    if call.return_type is not None:
+                        vars.append(create_var(cursor, call.return_type))
+                    for (name, mode, oratype), value in zip(call.args, values):
+                        var = create_var(cursor, oratype)
+                        set_value(var, oratype, value)
+                        vars.append(var)
+                    call_vars.append(vars)
+
+                try:
+                    cursor.execute(self.statement(calls), sum(call_vars, []))
+                except cx_Oracle.DatabaseError as e:
+                    for call, package, values, future in calls:
+                        future.set_error(e)
+                    raise
+
+                for (call, package, values, future), vars in zip(calls, call_vars):
+                    outputs = [call.convert(oratype, vars[index].getvalue(), checkout)
+                               for oratype, index in zip(call.output_types(), call.outputs)]
+                    future.set_result(call.result(outputs))
+            finally:
+                cursor.close()
+
+    def __enter__(self):
+        self._previous = current_batch()
+        _local.batch = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        _local.batch = self._previous
+        if exc_type is None:
+            self.execute()
+        else:
+            self.calls = []
+        return False
+
+
+def batch(connection=None):
+    """
+    Function to create batch of package calls executed in one round trip, see Batch
+
+    Parameters:
+    connection - connection to execute the batch, by default connection
+                 of package of first call is used
+    """
+    return Batch(connection)
+
+
+def current_batch():
+    """
+    Function to get batch recording calls in current thread or None
+    """
+    return getattr(_local, 'batch', None)
@@ -3,7 +3,7 @@ import os
 def rel(path):
     return os.path.join(os.path.abspath(os.path.dirname(__file__)), path)
 
-os.environ['DJANGO_SETTINGS_MODULE'] = 'settings'
+os.environ['DJANGO_SETTINGS_MODULE'] = 'plsql.settings'
 
 # List of packages to dump
 PLSQL_PACKAGES = [
@@ -16,6 +16,78 @@ PLSQL_SCHEMA_ROOT = '/home/sites/superanimals/db/'
 
 PLSQL_TEMPLATE_DIR =  rel('templates')
 
+# Source of signatures of package members: 'parser' to parse package
+# specifications, 'arguments' to take exact types, modes and overloads from
+# user_arguments (constants and spelling of names still come from specifications)
+PLSQL_METADATA = 'parser'
+
+# 'django' to render generated modules by templates of PLSQL_TEMPLATE_DIR,
+# 'native' to build them by plsql.emitter without Django (default templates only)
+PLSQL_EMITTER = 'django'
+
+# Number of processes parsing specifications and rendering modules by
+# Schema.generate_packages. Specifications are fetched by bulk queries before
+# workers start, chunks of them in parallel when Schema is created with
+# dbgate.ConnectionPool
+PLSQL_GENERATION_WORKERS = 1
+
+# Regenerate only packages changed since the previous generation by
+# Schema.generate_packages, see plsql_manifest.json in the schema folder.
+# generate_packages(force=True) regenerates all packages
+PLSQL_INCREMENTAL = False
+
+# Number of rows fetched per round trip by cursors returned from packages.
+# Use 'auto' to tune it by the width of fetched rows
+PLSQL_ARRAYSIZE = 100
+
+# Shape of rows returned by cursors: 'dict', 'tuple', 'namedtuple' or 'record'
+# (generated class with __slots__)
+PLSQL_ROWS = 'dict'
+
+# CLOB/NCLOB/BLOB values up to this size (characters or bytes) are returned
+# as str, bigger values are returned as lazy plsql.lob.LobStream.
+# None means read all LOB values at once
+PLSQL_LOB_INLINE_SIZE = None
+
+# Fetch LOB columns of cursors as str/bytes together with rows instead of
+# reading every LOB separately: True, maximum size of inlined column, or None
+PLSQL_INLINE_LOBS = None
+
+# 'auto' to fetch NUMBER columns of cursors as int, Decimal or float by
+# precision and scale, None keeps cx_Oracle defaults
+PLSQL_NUMBERS = None
+
+# Number of prepared calls with their cursors and bind variables
+# kept for each connection
+PLSQL_STATEMENT_CACHE_SIZE = 50
+
+# Number of rows sent per round trip by bulk calls: package.member.many(rows)
+PLSQL_BULK_BATCH_SIZE = 1000
+
+# Maximum number of elements of associative array (index-by table) arguments,
+# the whole list is sent or received in one round trip
+PLSQL_ARRAY_SIZE = 1000
+
+# Collection types created by "create type ... as table of" used by arguments
+# of packages, they are bound as typed object collections.
+# Collections declared in package specifications are found by parser
+PLSQL_SQL_COLLECTIONS = []
+
+# Maximum number of concurrent calls of asyncio package classes generated
+# with generate_packages(async_stubs=True), None means size of connection pool
+PLSQL_CONCURRENCY = None
+
+# Result cache of package functions, dictionary with ttl (seconds, None means
+# no expiration) and size (maximum number of kept results), None disables it.
+# Usually set for particular functions:
+# PLSQL_OPTIONS = {'REFS.GET_CODE': {'cache': {'ttl': 3600, 'size': 1000}}}
+# Functions with OUT arguments or returning cursors or LOBs are never cached
+PLSQL_CACHE = None
+
+# Options for particular packages and package members, member options win.
+# Example: {'REPORTS': {'arraysize': 1000}, 'REPORTS.BIG_EXPORT': {'arraysize': 'auto'}}
+PLSQL_OPTIONS = {}
+
 # connection parameters
 ORA_SID = 'ORCL'
 ORA_SCHEMA = 'sa'
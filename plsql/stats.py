@@ -0,0 +1,290 @@
+"""
+Instrumentation of calls of generated packages.
+
+Calls, bulk calls, batches, cursor fetches and LOB reads are measured when
+statistics are enabled and kept in the in-process registry labelled by
+package and member:
+
+    plsql.stats.enable(slow_threshold=0.5)
+    ...
+    plsql.stats.snapshot()['refs.get_code']['call']['p95']
+
+Measuring is switched off by default, disabled hooks only check
+plsql.stats.active.
+"""
+import logging
+import random
+import threading
+import time
+
+"""
+Kinds of measured operations
+"""
+CALL = 'call'
+BULK = 'bulk'
+BATCH = 'batch'
+FETCH = 'fetch'
+LOB = 'lob'
+
+"""
+Upper bounds of histogram buckets in seconds, from 0.1ms doubled up to ~100s
+"""
+BUCKETS = tuple(0.0001 * 2 ** index for index in range(21))
+
+"""
+Percentiles of histograms in snapshot
+"""
+PERCENTILES = (('p50', 0.5), ('p95', 0.95), ('p99', 0.99))
+
+"""
+True while statistics are collected, checked by hooks of generated packages
+"""
+active = False
+
+clock = getattr(time, 'perf_counter', time.time)
+
+logger = logging.getLogger('plsql.stats')
+logger.addHandler(logging.NullHandler())
+
+_lock = threading.Lock()
+_registry = {}
+_exporters = []
+_slow_threshold = None
+_sample_rate = 1.0
+
+
+class Histogram(object):
+    """
+    Class implements histogram of durations with fixed exponential buckets.
+    Percentiles are estimated by upper bound of bucket, limited by maximum
+    """
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        index = 0
+        while index < len(BUCKETS) and seconds > BUCKETS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, fraction):
+        """
+        Function to get estimated duration not exceeded by fraction of measurements
+        """
+        if not self.count:
+            return 0.0
+        rank = fraction * self.count
+        total = 0
+        for index, count in enumerate(self.counts):
+            total += count
+            if total >= rank and count:
+                if index == len(BUCKETS):
+                    return self.max
+                return min(BUCKETS[index], self.max)
+        return self.max
+
+    def summary(self):
+        result = {'count': self.count, 'seconds': self.sum, 'max': self.max}
+        for name, fraction in PERCENTILES:
+            result[name] = self.percentile(fraction)
+        return result
+
+
+class MemberStats(object):
+    """
+    Class implements counters and histograms of one package member
+    """
+    def __init__(self):
+        self.timings = {}
+        self.errors = 0
+        self.round_trips = 0
+        self.rows = 0
+        self.lob_size = 0
+
+    def add(self, event):
+        histogram = self.timings.get(event.kind)
+        if histogram is None:
+            histogram = self.timings[event.kind] = Histogram()
+        histogram.add(event.seconds)
+        self.errors += event.errors
+        self.round_trips += event.round_trips
+        self.rows += event.rows
+        self.lob_size += event.lob_size
+
+    def summary(self):
+        result = dict((kind, histogram.summary()) for kind, histogram in self.timings.items())
+        result.update({
+            'errors' : self.errors,
+            'round_trips' : self.round_trips,
+            'rows' : self.rows,
+            'lob_size' : self.lob_size,
+        })
+        return result
+
+
+class Event(object):
+    """
+    Class to represent measured operation, passed to exporters.
+
+    name        - package.member
+    kind        - one of CALL, BULK, BATCH, FETCH, LOB
+    seconds     - wall time
+    round_trips - number of round trips to the server
+    rows        - rows fetched by cursor or rows of bulk call
+    lob_size    - characters/bytes read from LOBs
+    errors      - number of failed calls or rows
+    error       - exception raised by the operation or None
+    """
+    __slots__ = ('name', 'kind', 'seconds', 'round_trips', 'rows', 'lob_size', 'errors', 'error')
+
+    def __init__(self, name, kind, seconds=0.0, round_trips=0, rows=0, lob_size=0, errors=0, error=None):
+        self.name = name
+        self.kind = kind
+        self.seconds = seconds
+        self.round_trips = round_trips
+        self.rows = rows
+        self.lob_size = lob_size
+        self.errors = errors or (1 if error is not None else 0)
+        self.error = error
+
+    @property
+    def package(self):
+        return self.name.split('.')[0]
+
+    @property
+    def member(self):
+        return self.name.split('.')[-1]
+
+    def __repr__(self):
+        return "<Event {0} {1} {2:.6f}s>".format(self.kind, self.name, self.seconds)
+
+
+class Measurement(object):
+    """
+    Class implements context manager measuring wall time of operation,
+    counters of the event can be set inside of the block
+    """
+    def __init__(self, name, kind, round_trips=1):
+        self.event = Event(name, kind, round_trips=round_trips)
+        self.started = None
+
+    def __enter__(self):
+        self.started = clock()
+        return self.event
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.event.seconds = clock() - self.started
+        if exc_value is not None:
+            self.event.error = exc_value
+            self.event.errors = max(self.event.errors, 1)
+        add(self.event)
+        return False
+
+
+def measure(name, kind, round_trips=1):
+    """
+    Function to measure operation in with block, see Measurement
+
+    Parameters:
+    name        - package.member
+    kind        - one of CALL, BULK, BATCH, FETCH, LOB
+    round_trips - number of round trips made by the operation
+    """
+    return Measurement(name, kind, round_trips)
+
+
+def record(name, kind, seconds=0.0, round_trips=1, rows=0, lob_size=0, errors=0, error=None):
+    """
+    Function to record measured operation, see Event for parameters
+    """
+    add(Event(name, kind, seconds, round_trips, rows, lob_size, errors, error))
+
+
+def add(event):
+    """
+    Function to add event to registry, pass it to exporters and log slow calls
+    """
+    with _lock:
+        stats = _registry.get(event.name)
+        if stats is None:
+            stats = _registry[event.name] = MemberStats()
+        stats.add(event)
+
+    for exporter in list(_exporters):
+        try:
+            exporter(event)
+        except Exception:
+            logger.exception("exporter %r failed", exporter)
+
+    if _slow_threshold is not None and event.kind != FETCH and event.kind != LOB \
+            and event.seconds >= _slow_threshold \
+            and (_sample_rate >= 1 or random.random() < _sample_rate):
+        logger.warning("slow %s %s %.3fs round trips %d rows %d%s", event.kind, event.name, event.seconds,
+                       event.round_trips, event.rows, ' error %r' % event.error if event.error else '')
+
+
+def enable(slow_threshold=None, sample_rate=1.0):
+    """
+    Function to start collecting statistics
+
+    Parameters:
+    slow_threshold - calls taking at least this number of seconds are logged
+                     to 'plsql.stats' logger, None to log nothing
+    sample_rate    - fraction of slow calls logged
+    """
+    global active, _slow_threshold, _sample_rate
+    _slow_threshold = slow_threshold
+    _sample_rate = sample_rate
+    active = True
+
+
+def disable():
+    """
+    Function to stop collecting statistics, collected data is kept
+    """
+    global active
+    active = False
+
+
+def add_exporter(exporter):
+    """
+    Function to register exporter, callable taking Event of every measured operation
+    """
+    _exporters.append(exporter)
+
+
+def remove_exporter(exporter):
+    if exporter in _exporters:
+        _exporters.remove(exporter)
+
+
+def snapshot():
+    """
+    Function to get collected statistics, dictionary keyed by package.member.
+
+    Item structure:
+    {
+        'call'        : {'count', 'seconds', 'max', 'p50', 'p95', 'p99'},
+        ...             histograms of other measured kinds
+        'errors'      : number of errors,
+        'round_trips' : number of round trips,
+        'rows'        : number of rows,
+        'lob_size'    : characters/bytes read from LOBs,
+    }
+    """
+    with _lock:
+        return dict((name, stats.summary()) for name, stats in _registry.items())
+
+
+def reset():
+    """
+    Function to drop collected statistics
+    """
+    with _lock:
+        _registry.clear()
@@ -1,13 +1,46 @@
+import datetime
+import decimal
+import json
 import os
 import re
+import shutil
 import sys
+import tempfile
+import threading
+import time
 import unittest
 from importlib import import_module
 
-import settings
-from base import Schema
-from parser import PlSqlParser
-from dbgate import OraConnection
+from plsql import fakeora
+cx_Oracle = fakeora.install()
+
+import plsql
+import plsql.cache
+import plsql.importer
+import plsql.runtime
+import plsql.stats
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    import asyncio
+    from plsql import aio
+except (ImportError, SyntaxError):
+    # aio is python 3 only, it must be importable there
+    if sys.version_info >= (3, 5):
+        raise
+    aio = None
+
+from plsql import base, bench, dbgate, load, settings
+from plsql.base import Function, Package, Schema, generate_package
+from plsql.cursor import Cursor
+from plsql.dbgate import DBA, ConnectionPool, OraConnection, PoolTimeout, TnsOra
+from plsql.dynamic import Packages, build_package
+from plsql.lob import LobStream, lob_value, output_type_handler
+from plsql.parser import ORATYPES, PlSqlParser
 
 sys.path.append(settings.PLSQL_SCHEMA_ROOT)
 
@@ -36,9 +69,1403 @@ class TestParser(unittest.TestCase):
             self.fixtures[TEST_PACKAGE]
         )
 
-        self.assertEquals(len(functions), 12)
-        self.assertEquals(len(procedures), 1)
-        self.assertEquals(len(constants), 3)
+        self.assertEqual(len(functions), 12)
+        self.assertEqual(len(procedures), 1)
+        self.assertEqual(len(constants), 3)
+
+    def test_parse_declarations(self):
+        """
+        Tests to parse comments, literals, defaults, anchored types and overloads
+        """
+        functions, procedures, constants = self.parser.get_package_members("""
+            create or replace package "Refs" authid current_user as
+                -- function commented(x number) return number;
+                /* procedure hidden; */
+                type t_rec is record (a number(10, 2), b varchar2(10 char));
+                c_text constant varchar2(100) not null := 'it''s; (tricky)';
+                function get(p_id in emp.id%type, p_amount number(10,2) := 1.5,
+                             p_name varchar2 default 'x, y') return emp%rowtype deterministic;
+                function get(p_id in out nocopy number) return timestamp(6) with time zone;
+                procedure "Save"(p_list out sys.odcinumberlist);
+            end "Refs";
+        """)
+
+        self.assertEqual([f['name'] for f in functions], ['get', 'get'])
+        self.assertEqual([f['overload'] for f in functions], [1, 2])
+        self.assertEqual(functions[0]['oratype'], 'emp%rowtype')
+        self.assertEqual(functions[0]['args'], [
+            {'name': 'p_id', 'type': 'in', 'oratype': 'emp.id%type', 'default': None},
+            {'name': 'p_amount', 'type': None, 'oratype': 'number', 'default': '1.5'},
+            {'name': 'p_name', 'type': None, 'oratype': 'varchar2', 'default': "'x, y'"},
+        ])
+        self.assertEqual(functions[1]['oratype'], 'timestamp with time zone')
+        self.assertEqual(functions[1]['args'][0]['type'], 'in out')
+
+        self.assertEqual(procedures, [{'name': 'Save', 'overload': None, 'args': [
+            {'name': 'p_list', 'type': 'out', 'oratype': 'sys.odcinumberlist', 'default': None},
+        ]}])
+        self.assertEqual(constants, [
+            {'name': 'c_text', 'oratype': 'varchar2(100)', 'value': "'it''s; (tricky)'"},
+        ])
+
+    def test_overloads_in_declaration_order(self):
+        """
+        Tests to number overloads of functions and procedures together like USER_ARGUMENTS.OVERLOAD
+        """
+        functions, procedures, constants = self.parser.get_package_members("""
+            create or replace package refs as
+                procedure x(p_id number);
+                function x return number;
+                procedure x(p_name varchar2);
+            end refs;
+        """)
+
+        self.assertEqual([f['overload'] for f in functions], [2])
+        self.assertEqual([p['overload'] for p in procedures], [1, 3])
+
+    def test_parse_collections(self):
+        """
+        Tests to parse collection types of arguments and return values
+        """
+        functions, procedures, constants = self.parser.get_package_members(COLLECTION_SPEC)
+
+        self.assertEqual(procedures[0]['args'][0]['collection'], {
+            'name': 'ids.t_ids', 'collection': 'index by', 'element': 'number', 'length': None, 'size': None,
+            'index': 'pls_integer',
+        })
+        self.assertEqual(procedures[0]['args'][1]['collection']['length'], 30)
+        self.assertEqual(functions[0]['collection'], {
+            'name': 'ids.t_list', 'collection': 'varray', 'element': 'number', 'length': None, 'size': 10,
+            'index': None,
+        })
+        self.assertFalse('collection' in procedures[0]['args'][2])
+        self.assertEqual([f.get('pipelined') for f in functions], [None, True])
+
+
+COLLECTION_SPEC = """
+create or replace package scott.ids as
+    type t_ids is table of number index by pls_integer;
+    type t_names is table of varchar2(30) not null index by binary_integer;
+    type t_codes is table of varchar2(10);
+    type t_list is varray(10) of number;
+    procedure save(p_ids in t_ids, p_names in out ids.t_names, p_count out number);
+    procedure codes(p_codes out t_codes);
+    function top(p_limit number) return t_list;
+    function pipe(p_limit number) return t_codes pipelined;
+end ids;
+"""
+
+
+class FakeCursor(object):
+    """
+    Class implements cx_Oracle cursor over rows kept in memory
+    """
+    def __init__(self, description, rows):
+        self.description = description
+        self.rows = list(rows)
+        self.arraysize = 100
+        self.fetches = 0
+        self.closed = False
+
+    def fetchmany(self, size):
+        self.fetches += 1
+        batch, self.rows = self.rows[:size], self.rows[size:]
+        return batch
+
+    def close(self):
+        self.closed = True
+
+
+class TestCursor(unittest.TestCase):
+    """
+    Class implements tests for cursor wrapper of generated packages
+    """
+    def setUp(self):
+        self.description = [('VAL_NUMBER', None), ('VAL_VARCHAR', None)]
+        self.rows = [(i, str(i)) for i in range(5)]
+
+    def test_fetch_all_in_batches(self):
+        fake = FakeCursor(self.description, self.rows)
+        cursor = Cursor(fake, 2)
+
+        rows = cursor.fetch_all()
+
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[4], {'val_number': 4, 'val_varchar': '4'})
+        self.assertEqual(fake.fetches, 4)
+        self.assertTrue(fake.closed)
+
+    def test_next(self):
+        cursor = Cursor(FakeCursor(self.description, self.rows), 2)
+
+        numbers = []
+        row = cursor.next()
+        while row:
+            numbers.append(row['val_number'])
+            row = cursor.next()
+
+        self.assertEqual(numbers, list(range(5)))
+        self.assertIsNone(cursor.next())
+
+    def test_iteration(self):
+        cursor = Cursor(FakeCursor(self.description, self.rows), 3)
+
+        self.assertEqual([row['val_number'] for row in cursor], list(range(5)))
+        self.assertTrue(cursor.closed)
+
+    def test_context_manager(self):
+        fake = FakeCursor(self.description, self.rows)
+
+        with Cursor(fake) as cursor:
+            cursor.next()
+
+        self.assertTrue(fake.closed)
+
+    def test_autotune_arraysize(self):
+        fake = FakeCursor(self.description, self.rows)
+        cursor = Cursor(fake, 'auto')
+
+        cursor.next()
+
+        self.assertEqual(cursor.arraysize, Cursor.MAX_ARRAYSIZE)
+        self.assertEqual(fake.arraysize, Cursor.MAX_ARRAYSIZE)
+
+    def test_tuple_rows(self):
+        cursor = Cursor(FakeCursor(self.description, self.rows), rows='tuple')
+
+        self.assertEqual(cursor.fetch_all(), self.rows)
+
+    def test_namedtuple_rows(self):
+        cursor = Cursor(FakeCursor(self.description, self.rows), rows='namedtuple')
+
+        row = cursor.next()
+
+        self.assertEqual(row.val_number, 0)
+        self.assertEqual(row.val_varchar, '0')
+        self.assertEqual(tuple(row), self.rows[0])
+
+    def test_record_rows(self):
+        description = self.description + [('COUNT(*)', None)]
+        cursor = Cursor(FakeCursor(description, [(1, 'a', 2)]), rows='record')
+
+        row = cursor.next()
+
+        self.assertEqual((row.val_number, row.val_varchar), (1, 'a'))
+        self.assertEqual(tuple(row), (1, 'a', 2))
+        self.assertFalse(hasattr(row, '__dict__'))
+
+    def test_clob_columns(self):
+        class Lob(object):
+            def read(self):
+                return 'text'
+
+        description = [('VAL_CLOB', cx_Oracle.CLOB, None, None, None, None, 1)]
+        cursor = Cursor(FakeCursor(description, [(Lob(),), (None,)]), rows='tuple')
+
+        self.assertEqual(cursor.fetch_all(), [('text',), (None,)])
+
+    def test_inline_lobs(self):
+        description = [('VAL_CLOB', cx_Oracle.CLOB, None, None, None, None, 1)]
+        fake = FakeCursor(description, [('text',)])
+        cursor = Cursor(fake, rows='tuple', inline_lobs=True)
+
+        self.assertIsNotNone(fake.outputtypehandler)
+        self.assertEqual(cursor.fetch_all(), [('text',)])
+
+    def test_output_type_handler(self):
+        class VarCursor(object):
+            arraysize = 10
+
+            def var(self, type, size=None, arraysize=None, outconverter=None):
+                return type, outconverter
+
+        handler = output_type_handler(inline_lobs=1000, numbers='auto')
+        cursor = VarCursor()
+
+        self.assertEqual(handler(cursor, 'C', cx_Oracle.CLOB, None, 0, 0), (cx_Oracle.LONG_STRING, None))
+        self.assertEqual(handler(cursor, 'B', cx_Oracle.BLOB, 0, 0, 0), (cx_Oracle.LONG_BINARY, None))
+        self.assertIsNone(handler(cursor, 'C', cx_Oracle.CLOB, 5000, 0, 0))
+        self.assertEqual(handler(cursor, 'N', cx_Oracle.NUMBER, 22, 10, 0), (int, None))
+        self.assertEqual(handler(cursor, 'N', cx_Oracle.NUMBER, 22, 10, 2)[1], decimal.Decimal)
+        self.assertEqual(handler(cursor, 'N', cx_Oracle.NUMBER, 22, 0, -127), (float, None))
+
+    def _columnar_cursor(self):
+        description = [
+            ('ID', cx_Oracle.NUMBER, 10, 22, 10, 0, 1),
+            ('AMOUNT', cx_Oracle.NUMBER, 10, 22, 10, 2, 1),
+            ('CREATED', cx_Oracle.DATETIME, 23, 7, None, None, 1),
+            ('NAME', cx_Oracle.STRING, 10, 10, None, None, 1),
+        ]
+        rows = [
+            (1, 1.5, datetime.datetime(1970, 1, 2), 'a'),
+            (2, None, None, None),
+            (3, 2.25, datetime.datetime(1970, 1, 1, 0, 0, 1), 'c'),
+        ]
+        return Cursor(FakeCursor(description, rows), 2)
+
+    def test_fetch_columns(self):
+        cursor = self._columnar_cursor()
+        cursor.next()
+
+        columns, masks = cursor.fetch_columns()
+
+        self.assertEqual(list(columns['id']), [2, 3])
+        self.assertEqual(list(columns['amount']), [0.0, 2.25])
+        self.assertEqual(list(columns['created']), [0, 1000000])
+        self.assertEqual(columns['name'], [None, 'c'])
+        self.assertEqual(list(masks['amount']), [1, 0])
+        self.assertEqual(list(masks['id']), [0, 0])
+        self.assertTrue(cursor.closed)
+
+    def test_fetch_columns_wide_integers(self):
+        description = [('ID', cx_Oracle.NUMBER, 21, 22, 20, 0, 1)]
+        cursor = Cursor(FakeCursor(description, [(10 ** 19,), (None,)]), 2)
+
+        columns, masks = cursor.fetch_columns()
+
+        self.assertEqual(columns['id'], [10 ** 19, None])
+        self.assertEqual(list(masks['id']), [0, 1])
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_fetch_columns_numpy(self):
+        columns, masks = self._columnar_cursor().fetch_columns(numpy=True)
+
+        self.assertEqual(columns['id'].dtype, numpy.int64)
+        self.assertEqual(columns['created'].dtype, numpy.dtype('datetime64[us]'))
+        self.assertEqual(list(masks['amount']), [False, True, False])
+        self.assertEqual(columns['amount'][2], 2.25)
+
+
+class FakeLob(object):
+    """
+    Class implements cx_Oracle LOB over data kept in memory
+    """
+    def __init__(self, data, type=cx_Oracle.CLOB):
+        self.data = data
+        self.type = type
+        self.reads = 0
+
+    def size(self):
+        return len(self.data)
+
+    def getchunksize(self):
+        return 4
+
+    def read(self, offset=1, amount=None):
+        self.reads += 1
+        if amount is None:
+            return self.data[offset - 1:]
+        return self.data[offset - 1:offset - 1 + amount]
+
+
+class TestLobStream(unittest.TestCase):
+    """
+    Class implements tests for lazy reading of LOB values
+    """
+    def test_read(self):
+        stream = LobStream(FakeLob(u'abcdefghij'))
+
+        self.assertEqual(stream.read(3), u'abc')
+        self.assertEqual(stream.read(), u'defghij')
+        self.assertEqual(stream.read(), u'')
+
+    def test_iteration_is_chunk_aligned(self):
+        stream = LobStream(FakeLob(u'abcdefghij'), chunk_size=5)
+
+        self.assertEqual(stream.chunk_size, 8)
+        self.assertEqual(list(stream), [u'abcdefgh', u'ij'])
+
+    def test_readinto(self):
+        stream = LobStream(FakeLob(b'0123456789', cx_Oracle.BLOB))
+        buffer = bytearray(4)
+
+        self.assertEqual(stream.readinto(buffer), 4)
+        self.assertEqual(bytes(buffer), b'0123')
+
+    def test_readinto_encodes_characters(self):
+        stream = LobStream(FakeLob(u'\u0444\u0444\u0444'))
+        buffer = bytearray(3)
+
+        self.assertEqual(stream.readinto(buffer), 3)
+        self.assertEqual(stream.readinto(buffer), 3)
+        self.assertEqual(bytes(buffer), u'\u0444\u0444\u0444'.encode('utf-8')[3:])
+
+    def test_lob_value(self):
+        self.assertEqual(lob_value(FakeLob(u'small'), 10), u'small')
+        self.assertEqual(lob_value(FakeLob(u'small')), u'small')
+        self.assertIsNone(lob_value(None, 10))
+
+        lob = FakeLob(u'x' * 100)
+        stream = lob_value(lob, 10)
+        self.assertIsInstance(stream, LobStream)
+        self.assertEqual(lob.reads, 0)
+
+    def test_stream_keeps_connection(self):
+        pool = ConnectionPool(fakeora.connect, min_size=0, max_size=1)
+
+        for release in (lambda stream: stream.read(), lambda stream: stream.close()):
+            with plsql.runtime.Checkout(PoolPackage(pool)) as checkout:
+                stream = lob_value(FakeLob(u'x' * 100), 10, checkout=checkout)
+            self.assertEqual(pool.idle(), 0)
+
+            self.assertEqual(stream.read(60), u'x' * 60)
+            self.assertEqual(pool.idle(), 0)
+            release(stream)
+            self.assertEqual(pool.idle(), 1)
+
+        # small LOBs are read at once and don't keep the connection
+        with plsql.runtime.Checkout(PoolPackage(pool)) as checkout:
+            self.assertEqual(lob_value(FakeLob(u'small'), 10, checkout=checkout), u'small')
+        self.assertEqual(pool.idle(), 1)
+
+
+def fake_connection(functions=None, rows=None):
+    """
+    Function to connect to database of fake driver. Package functions are
+    python callables, queries are answered by rows: list of rows or callable
+    getting statement and returning rows
+    """
+    def queries(statement, parameters):
+        return None, rows(statement) if callable(rows) else rows or []
+    return fakeora.Database(functions, queries).connect()
+
+
+class SwitchingCondition(object):
+    """
+    Class implements condition switching threads after every critical section
+    """
+    def __init__(self):
+        self.condition = threading.Condition()
+
+    def __enter__(self):
+        return self.condition.__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.condition.__exit__(exc_type, exc_value, traceback)
+        time.sleep(0.001)
+        return False
+
+    def wait(self, timeout=None):
+        self.condition.wait(timeout)
+
+    def notify(self):
+        self.condition.notify()
+
+
+class TestConnectionPool(unittest.TestCase):
+    """
+    Class implements tests for pool of connections
+    """
+    def test_release_reuses_connection(self):
+        pool = ConnectionPool(fakeora.connect, min_size=1, max_size=2)
+
+        connection = pool.acquire()
+        pool.release(connection)
+
+        self.assertIs(pool.acquire(), connection)
+        self.assertEqual(pool.size(), 1)
+
+    def test_timeout(self):
+        pool = ConnectionPool(fakeora.connect, min_size=0, max_size=1, timeout=0.01)
+
+        pool.acquire()
+
+        self.assertRaises(PoolTimeout, pool.acquire)
+
+    def test_waits_for_released_connection(self):
+        pool = ConnectionPool(fakeora.connect, min_size=0, max_size=1, timeout=5)
+        connection = pool.acquire()
+
+        timer = threading.Timer(0.01, pool.release, [connection])
+        timer.start()
+
+        self.assertIs(pool.acquire(), connection)
+        timer.join()
+
+    def test_concurrent_acquire_respects_max_size(self):
+        pool = ConnectionPool(fakeora.connect, min_size=0, max_size=2, timeout=5)
+        pool._lock = SwitchingCondition()
+        connections = []
+
+        def worker():
+            connection = pool.acquire()
+            connections.append(connection)
+            time.sleep(0.01)
+            pool.release(connection)
+
+        threads = [threading.Thread(target=worker) for index in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(connections), 16)
+        self.assertEqual(pool.size(), 2)
+        self.assertEqual(len(set(id(connection) for connection in connections)), 2)
+
+    def test_failed_connect_frees_slot(self):
+        def connect():
+            raise cx_Oracle.DatabaseError('ORA-12541: TNS:no listener')
+        pool = ConnectionPool(connect, min_size=0, max_size=1, timeout=0.01)
+
+        self.assertRaises(cx_Oracle.DatabaseError, pool.acquire)
+        self.assertEqual(pool.size(), 0)
+        self.assertRaises(cx_Oracle.DatabaseError, pool.acquire)
+
+    def test_health_check(self):
+        pool = ConnectionPool(fakeora.connect, min_size=1, max_size=1, ping_interval=0)
+        dead = pool.acquire()
+        dead.alive = False
+        pool.release(dead)
+
+        connection = pool.acquire()
+
+        self.assertIsNot(connection, dead)
+        self.assertTrue(dead.closed)
+        self.assertEqual(pool.size(), 1)
+
+    def test_per_thread(self):
+        pool = ConnectionPool(fakeora.connect, min_size=0, max_size=2, per_thread=True)
+        connection = pool.acquire()
+        pool.release(connection)
+
+        other = []
+        thread = threading.Thread(target=lambda: other.append(pool.acquire()))
+        thread.start()
+        thread.join()
+
+        self.assertIs(pool.acquire(), connection)
+        self.assertIsNot(other[0], connection)
+        pool.release(connection)
+
+        pool.release_thread()
+        self.assertEqual(pool.idle(), 1)
+
+    def test_connection_block(self):
+        pool = ConnectionPool(fakeora.connect, min_size=0, max_size=2)
+
+        with pool.connection() as connection:
+            self.assertIs(pool.acquire(), connection)
+            pool.release(connection)
+            self.assertEqual(pool.idle(), 0)
+
+        self.assertEqual(pool.idle(), 1)
+
+    def test_cursor_outlives_connection_block(self):
+        pool = ConnectionPool(fakeora.connect, min_size=0, max_size=2)
+
+        with pool.connection() as connection:
+            checkout = plsql.runtime.Checkout(PoolPackage(pool))
+            checkout.__enter__()
+            # cursor returned by the call keeps the connection
+            checkout.hold()
+            checkout.__exit__(None, None, None)
+
+        self.assertEqual(pool.idle(), 0)
+        checkout.done()
+        # connection released already is not returned twice
+        pool.release(connection)
+
+        self.assertEqual(pool.idle(), 1)
+        self.assertEqual(pool.size(), 1)
+
+
+class PoolPackage(object):
+    """
+    Class implements package class using pool of connections
+    """
+    def __init__(self, pool):
+        self.pool = pool
+
+
+class TestTnsOra(unittest.TestCase):
+    """
+    Class implements tests of tnsnames.ora resolution and connect-time failover
+    """
+    TNSNAMES = """
+# production
+PROD, prod.world =
+  (DESCRIPTION =
+    (ADDRESS_LIST =
+      (FAILOVER = on)
+      (ADDRESS = (PROTOCOL = TCP)(HOST = db1)(PORT = 1521))
+      (ADDRESS = (PROTOCOL = TCP)(HOST = db2)(PORT = 1521))
+    )
+    (CONNECT_DATA = (SERVICE_NAME = prod))
+  )
+TEST = (DESCRIPTION = (ADDRESS = (PROTOCOL = TCP)(HOST = test)(PORT = 1521))(CONNECT_DATA = (SID = test)))
+"""
+
+    def setUp(self):
+        self.home = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.home, 'network', 'admin'))
+        self.path = os.path.join(self.home, 'network', 'admin', 'tnsnames.ora')
+        self._write(self.TNSNAMES)
+        self.environ = dict(os.environ)
+        os.environ.pop('TNS_ADMIN', None)
+        os.environ['ORACLE_HOME'] = self.home
+        dbgate._preferred.clear()
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self.environ)
+        shutil.rmtree(self.home)
+
+    def _write(self, text):
+        f = open(self.path, 'w')
+        f.write(text)
+        f.close()
+
+    def test_descriptors(self):
+        tns = TnsOra()
+
+        self.assertEqual(tns.get('test'), '(DESCRIPTION=(ADDRESS=(PROTOCOL=TCP)(HOST=test)(PORT=1521))'
+                                          '(CONNECT_DATA=(SID=test)))')
+        self.assertEqual(tns.get('PROD.WORLD'), tns.get('prod'))
+        self.assertTrue('(ADDRESS_LIST=(FAILOVER=on)(ADDRESS=' in tns.get('prod'))
+        self.assertEqual(tns.addresses('prod'), [
+            '(DESCRIPTION=(ADDRESS=(PROTOCOL=TCP)(HOST=db1)(PORT=1521))(CONNECT_DATA=(SERVICE_NAME=prod)))',
+            '(DESCRIPTION=(ADDRESS=(PROTOCOL=TCP)(HOST=db2)(PORT=1521))(CONNECT_DATA=(SERVICE_NAME=prod)))',
+        ])
+        self.assertRaises(dbgate.SIDNotFound, tns.get, 'missing')
+
+    def test_cache(self):
+        services = TnsOra().services
+        self.assertTrue(TnsOra().services is services)
+
+        self._write(self.TNSNAMES + 'OTHER = (DESCRIPTION = (ADDRESS = (HOST = other)))\n')
+        self.assertTrue('OTHER' in TnsOra().services)
+
+    def test_failover(self):
+        addresses = TnsOra().addresses('prod')
+        attempts = []
+
+        def connect(address):
+            attempts.append(address)
+            if 'db1' in address:
+                raise cx_Oracle.DatabaseError('ORA-12541: TNS:no listener')
+            return fakeora.connect()
+
+        dbgate.connect_addresses('PROD', addresses, connect)
+        self.assertEqual(attempts, addresses)
+
+        # address connected last time is tried first
+        attempts[:] = []
+        dbgate.connect_addresses('PROD', addresses, connect)
+        self.assertEqual(attempts, addresses[1:])
+
+    def test_parallel_failover(self):
+        addresses = TnsOra().addresses('prod')
+        connections = {}
+
+        def connect(address):
+            if 'db1' in address:
+                time.sleep(0.05)
+            connections[address] = fakeora.connect()
+            return connections[address]
+
+        connection = dbgate.connect_addresses('PROD', addresses, connect, dbgate.FAILOVER_PARALLEL)
+
+        self.assertTrue(connection is connections[addresses[1]])
+        time.sleep(0.1)
+        self.assertTrue(connections[addresses[0]].closed)
+
+
+class TestGeneratedPackage(unittest.TestCase):
+    """
+    Class implements tests to call generated package with fake driver
+    """
+    def setUp(self):
+        self.package = self._generate()
+
+    def _generate(self):
+        # Function to generate test package class
+        f = open(os.path.dirname(__file__) + '/fixture/' + TEST_PACKAGE + '.pkg')
+        spec = f.read()
+        f.close()
+
+        schema = Schema(fake_connection(rows=[(TEST_PACKAGE.upper(), spec)]))
+        package = Package((TEST_PACKAGE.upper(),))
+        self.members = schema._get_package_members(package)
+        package.set_members(self.members)
+
+        namespace = {}
+        exec(package.get_py_source(), namespace)
+        return namespace[TEST_PACKAGE]
+
+    def test_call_with_pool(self):
+        functions = {TEST_PACKAGE + '.in_number_return_number': lambda number: number.getvalue() + 1}
+        self.package.pool = ConnectionPool(lambda: fake_connection(functions), min_size=0)
+
+        self.assertEqual(self.package.In_Number_Return_Number(1), 2)
+        self.assertEqual(self.package.pool.idle(), 1)
+
+    def test_prepared_call_is_reused(self):
+        functions = {TEST_PACKAGE + '.in_number_return_number': lambda number: number.getvalue() * 2}
+        connection = self.package.connection = fake_connection(functions)
+
+        self.assertEqual(self.package.In_Number_Return_Number(1), 2)
+        self.assertEqual(self.package.In_Number_Return_Number(i_number=2), 4)
+
+        self.assertEqual(connection.cursors, 1)
+        self.assertEqual(connection.statements, [
+            "begin :r := {0}.In_Number_Return_Number(:1); end;".format(TEST_PACKAGE)
+        ] * 2)
+
+    def test_out_arguments(self):
+        def out_number(number):
+            number.setvalue(0, 7)
+            return 5
+        functions = {TEST_PACKAGE + '.out_number_return_number': out_number}
+        self.package.connection = fake_connection(functions)
+
+        self.assertEqual(self.package.Out_Number_Return_Number(), (5, 7))
+        self.assertRaises(TypeError, self.package.In_Number_Return_Number)
+
+    def test_bulk_call(self):
+        functions = {TEST_PACKAGE + '.in_number_return_number': lambda number: number.getvalue() * 2}
+        connection = self.package.connection = fake_connection(functions)
+
+        result = self.package.In_Number_Return_Number.many([(1,), (2,), {'i_number': 3}], batch_size=2)
+
+        self.assertEqual(list(result), [2, 4, 6])
+        self.assertEqual(result.errors, [])
+        self.assertEqual(connection.cursors, 1)
+
+    def test_bulk_call_reports_failed_rows(self):
+        def in_number(number):
+            if number.getvalue() < 0:
+                raise cx_Oracle.DatabaseError('negative number')
+            return number.getvalue()
+        functions = {TEST_PACKAGE + '.in_number_return_number': in_number}
+        self.package.connection = fake_connection(functions)
+
+        result = self.package.In_Number_Return_Number.many([(1,), (-1,), (3,), (-4,), (5,)])
+
+        self.assertEqual(list(result), [1, None, 3, None, 5])
+        self.assertEqual(result.failed(), [1, 3])
+        self.assertRaises(TypeError, self.package.Return_Big_Cursor.many, [()])
+
+    def test_bulk_call_unknown_rowcount(self):
+        calls = []
+
+        def in_number(number):
+            calls.append(number.getvalue())
+            if number.getvalue() < 0:
+                raise cx_Oracle.DatabaseError('negative number')
+            return number.getvalue()
+        connection = self.package.connection = fake_connection({TEST_PACKAGE + '.in_number_return_number': in_number})
+        cursors = []
+
+        def cursor():
+            cursors.append(fakeora.Cursor(connection))
+            executemany = cursors[-1].executemany
+
+            def unknown_rowcount(statement, parameters):
+                try:
+                    executemany(statement, parameters)
+                finally:
+                    cursors[-1].rowcount = -1
+            cursors[-1].executemany = unknown_rowcount
+            return cursors[-1]
+        connection.cursor = cursor
+
+        result = self.package.In_Number_Return_Number.many([(1,), (-1,), (3,)], batch_size=2)
+
+        # rows of the failed batch are not executed again
+        self.assertEqual(calls, [1, -1, 3])
+        self.assertEqual(list(result), [None, None, 3])
+        self.assertEqual(result.failed(), [0, 1])
+        self.assertTrue(cursors[0].closed)
+
+        in_number = lambda number: 1 // 0
+        connection.database.functions[TEST_PACKAGE + '.in_number_return_number'] = in_number
+        self.assertRaises(ZeroDivisionError, self.package.In_Number_Return_Number.many, [(1,)])
+        self.assertTrue(cursors[1].closed)
+
+    def test_batch(self):
+        functions = {
+            TEST_PACKAGE + '.in_number_return_number': lambda number: number.getvalue() * 2,
+            TEST_PACKAGE + '.out_number_return_number': lambda number: number.setvalue(0, 7) or 5,
+        }
+        connection = fake_connection(functions)
+        self.package.pool = ConnectionPool(lambda: connection, min_size=0)
+
+        with plsql.batch() as batch:
+            first = self.package.In_Number_Return_Number(1)
+            second = self.package.Out_Number_Return_Number()
+            third = self.package.In_Number_Return_Number(i_number=3)
+            self.assertFalse(first.done())
+
+        self.assertEqual((first.result(), second.result(), third.result()), (2, (5, 7), 6))
+        self.assertEqual(connection.statements, [
+            "begin\n"
+            "    :1 := {0}.In_Number_Return_Number(:2);\n"
+            "    :3 := {0}.Out_Number_Return_Number(:4);\n"
+            "    :5 := {0}.In_Number_Return_Number(:6);\n"
+            "end;".format(TEST_PACKAGE)
+        ])
+        self.assertEqual(self.package.pool.idle(), 1)
+
+    def test_batch_error(self):
+        def in_number(number):
+            raise cx_Oracle.DatabaseError('failed')
+        self.package.connection = fake_connection({TEST_PACKAGE + '.in_number_return_number': in_number})
+
+        def run():
+            with plsql.batch():
+                return self.package.In_Number_Return_Number(1)
+        self.assertRaises(cx_Oracle.DatabaseError, run)
+
+    def test_async_source(self):
+        package = Package((TEST_PACKAGE.upper(),))
+        package.set_members(self.members)
+        source = package.get_async_py_source()
+
+        self.assertTrue("In_Number_Return_Number = AsyncCall('In_Number_Return_Number')" in source)
+        self.assertTrue("GC_VARCHAR2_FOR_RETURN = _{0}.GC_VARCHAR2_FOR_RETURN".format(TEST_PACKAGE) in source)
+        compile(source, TEST_PACKAGE + '_async', 'exec')
+
+    @unittest.skipIf(aio is None, "asyncio is not available")
+    def test_async_calls(self):
+        rows = FakeCursor([('VAL_NUMBER', None, None, None, None, None, 1)], [(1,), (2,)])
+        functions = {
+            TEST_PACKAGE + '.in_number_return_number': lambda number: number.getvalue() + 1,
+            TEST_PACKAGE + '.return_big_cursor': lambda: rows,
+        }
+        self.package.pool = ConnectionPool(lambda: fake_connection(functions), min_size=0, max_size=2)
+        package = type(TEST_PACKAGE, (aio.AsyncPackage,), {
+            'package': self.package,
+            'In_Number_Return_Number': aio.AsyncCall('In_Number_Return_Number'),
+            'Return_Big_Cursor': aio.AsyncCall('Return_Big_Cursor'),
+        })
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        try:
+            calls = asyncio.gather(*[package.In_Number_Return_Number(i) for i in range(4)])
+            self.assertEqual(loop.run_until_complete(calls), [1, 2, 3, 4])
+
+            cursor = loop.run_until_complete(package.Return_Big_Cursor())
+            self.assertTrue(isinstance(cursor, aio.AsyncCursor))
+            self.assertEqual(loop.run_until_complete(cursor.fetch_all()), [{'val_number': 1}, {'val_number': 2}])
+        finally:
+            asyncio.set_event_loop(None)
+            loop.close()
+            package.shutdown()
+
+    def test_result_cache(self):
+        settings.PLSQL_OPTIONS = {
+            TEST_PACKAGE.upper(): {'cache': {'ttl': 60}},
+            TEST_PACKAGE.upper() + '.IN_NUMBER_RETURN_NUMBER': {'cache': {'ttl': 60, 'size': 2}},
+        }
+        try:
+            package = self._generate()
+        finally:
+            settings.PLSQL_OPTIONS = {}
+
+        functions = {TEST_PACKAGE + '.in_number_return_number': lambda number: number.getvalue() * 2}
+        connection = package.connection = fake_connection(functions)
+
+        for number in [1, 1, 2, 3, 1]:
+            self.assertEqual(package.In_Number_Return_Number(number), number * 2)
+        self.assertEqual(len(connection.statements), 4)
+
+        statistics = plsql.cache.statistics(package)
+        self.assertEqual(statistics['In_Number_Return_Number'],
+                         {'hits': 1, 'misses': 4, 'evictions': 2, 'size': 2})
+        # functions with OUT arguments or returning cursors are never cached
+        self.assertFalse('Out_Number_Return_Number' in statistics)
+        self.assertFalse('Return_Big_Cursor' in statistics)
+
+        plsql.cache.invalidate(package)
+        package.In_Number_Return_Number(1)
+        self.assertEqual(len(connection.statements), 5)
+
+    def test_dynamic_packages(self):
+        f = open(os.path.dirname(__file__) + '/fixture/' + TEST_PACKAGE + '.pkg')
+        spec = f.read()
+        f.close()
+
+        def rows(statement):
+            if 'last_ddl_time' in statement:
+                return [('2012-01-01 00:00:00',)]
+            return [(line,) for line in spec.splitlines(True)]
+
+        functions = {TEST_PACKAGE + '.in_number_return_number': lambda number: number.getvalue() * 2}
+        connection = fake_connection(functions, rows)
+        cache_dir = tempfile.mkdtemp()
+        try:
+            packages = Packages(connection, cache_dir=cache_dir)
+            package = packages.plsqlparsertestpackage
+
+            self.assertTrue(packages.PLSQLPARSERTESTPACKAGE is package)
+            self.assertEqual(package.In_Number_Return_Number(2), 4)
+            self.assertEqual(package.GC_VARCHAR2_FOR_RETURN, 'varchar2')
+            for member in [member for member in self.members if isinstance(member, Function)]:
+                generated = getattr(self.package, member.name).call
+                dynamic = getattr(package, member.name).call
+                self.assertEqual((dynamic.statement, dynamic.args, dynamic.cursor_options),
+                                 (generated.statement, generated.args, generated.cursor_options))
+            self.assertEqual(len([statement for statement in connection.statements
+                                  if not statement.startswith('begin')]), 2)
+
+            # parsed specification is taken from cache_dir by other processes
+            package = Packages(connection, cache_dir=cache_dir).plsqlparsertestpackage
+            self.assertEqual(package.In_Number_Return_Number(3), 6)
+            self.assertEqual(len([statement for statement in connection.statements
+                                  if not statement.startswith('begin')]), 3)
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_lazy_plsql_import(self):
+        # import of plsql doesn't load runtime and cx_Oracle until they are used
+        import subprocess
+        code = "import sys, plsql; print([name for name in ('cx_Oracle', 'plsql.runtime', " \
+               "'plsql.dynamic') if name in sys.modules])"
+        process = subprocess.Popen([sys.executable, '-c', code], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                   cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual(process.communicate(), (b'[]\n', b''))
+
+        # packages are created on first use
+        plsql.packages.clear()
+        self.assertTrue(isinstance(plsql.packages._packages, Packages))
+
+    def test_collection_arguments(self):
+        package, source, async_source = generate_package((('IDS', None), COLLECTION_SPEC, False, None))
+        namespace = {}
+        exec(source, namespace)
+        ids = namespace['ids']
+
+        def save(p_ids, p_names, p_count):
+            p_names.setvalue(0, [name.upper() for name in p_names.getvalue()])
+            p_count.setvalue(0, len(p_ids.getvalue()))
+
+        def codes(p_codes):
+            p_codes.setvalue(0, fakeora.Object(p_codes.type, ['A', 'B']))
+
+        database = fakeora.Database({
+            'ids.save' : save,
+            'ids.codes' : codes,
+            'ids.top' : lambda p_limit: fakeora.Object(None, range(p_limit.getvalue())),
+        })
+        ids.connection = database.connect()
+
+        # whole lists are sent and received in one round trip each
+        size = settings.PLSQL_ARRAY_SIZE
+        self.assertEqual(ids.save(list(range(size)), ['a', 'b']), (['A', 'B'], size))
+        self.assertEqual(ids.codes(), ['A', 'B'])
+        self.assertEqual(ids.top(3), [0, 1, 2])
+        self.assertEqual(database.round_trips, 3)
+
+        self.assertEqual(ids.codes.call.args[0][2].type_name, 'IDS.T_CODES')
+        self.assertRaises(ValueError, ids.save, list(range(size + 1)), [])
+        self.assertRaises(TypeError, ids.save.many, [([1], ['a'])])
+
+    def test_string_indexed_arrays(self):
+        spec = COLLECTION_SPEC.replace('index by pls_integer', 'index by varchar2(10)')
+        self.assertEqual(PlSqlParser().get_package_members(spec)[1][0]['args'][0]['collection']['index'], 'varchar2')
+
+        # only the member with the array is skipped
+        package, source, async_source = generate_package((('IDS', None), spec, False, None))
+        self.assertEqual(package.get_member_names(), ['codes', 'top', 'pipe'])
+        ids = build_package('IDS', PlSqlParser().get_package_members(spec))
+        self.assertEqual([hasattr(ids, name) for name in ('save', 'codes', 'top', 'pipe')],
+                         [False, True, True, True])
+
+        # index types are not in user_arguments, they are taken from the specification
+        arguments = PlSqlParser().get_package_members(spec)
+        for arg in arguments[1][0]['args']:
+            if 'collection' in arg:
+                arg['collection'] = dict(arg['collection'], name=arg['collection']['name'].upper(), index=None)
+        package = generate_package((('IDS', None), spec, False, arguments))[0]
+        self.assertEqual(package.get_member_names(), ['codes', 'top', 'pipe'])
+
+        # element type of arrays is unknown without rows of the next data level in user_arguments
+        arguments = PlSqlParser().get_package_members(COLLECTION_SPEC)
+        names = arguments[1][0]['args'][1]
+        names['collection'] = dict(names['collection'], element=None)
+        package = generate_package((('IDS', None), COLLECTION_SPEC, False, arguments))[0]
+        self.assertEqual(package.get_member_names(), ['codes', 'top', 'pipe'])
+
+    def test_sql_collections(self):
+        spec = """
+            create or replace package nums as
+                function total(p_numbers t_numbers) return number;
+                function evens(p_limit number) return t_numbers;
+            end nums;
+        """
+        settings.PLSQL_SQL_COLLECTIONS = ['T_NUMBERS']
+        try:
+            package, source, async_source = generate_package((('NUMS', None), spec, False, None))
+            dynamic = build_package('NUMS', PlSqlParser().get_package_members(spec))
+        finally:
+            settings.PLSQL_SQL_COLLECTIONS = []
+        namespace = {}
+        exec(source, namespace)
+
+        for nums in (namespace['nums'], dynamic):
+            self.assertEqual(nums.total.call.args[0][2].type_name, 'T_NUMBERS')
+            self.assertEqual(nums.evens.call.return_type.type_name, 'T_NUMBERS')
+            self.assertEqual(nums.evens.call.cursor_options, namespace['nums'].evens.call.cursor_options)
+
+    def test_table_functions(self):
+        package, source, async_source = generate_package((('IDS', None), COLLECTION_SPEC, False, None))
+        namespace = {}
+        exec(source, namespace)
+        ids = namespace['ids']
+
+        description = [('COLUMN_VALUE', cx_Oracle.NUMBER, 10, 22, 10, 0, 1)]
+        piped = []
+
+        def pipe(p_limit):
+            # rows are piped while they are fetched
+            for index in range(p_limit.getvalue()):
+                piped.append(index)
+                yield (index,)
+
+        database = fakeora.Database({
+            'ids.pipe' : lambda p_limit: database.result(description, pipe(p_limit)),
+            'ids.top' : lambda p_limit: database.result(description, [(1,), (2,)]),
+        })
+        ids.connection = database.connect()
+
+        rows = ids.pipe(1000)
+        self.assertEqual(rows.next(), {'column_value': 0})
+        self.assertEqual(len(piped), rows.arraysize)
+        self.assertEqual(len(list(rows)), 999)
+        self.assertTrue(rows.closed)
+
+        self.assertEqual(ids.top.rows(2).fetch_all(), [{'column_value': 1}, {'column_value': 2}])
+        self.assertEqual(ids.pipe.call.statement, 'select * from table(ids.pipe(:1))')
+        self.assertRaises(TypeError, ids.codes.rows)
+        with plsql.batch():
+            self.assertRaises(TypeError, ids.pipe, 1)
+
+    def test_cursor_keeps_connection(self):
+        rows = FakeCursor([('VAL_NUMBER', None, None, None, None, None, 1)], [(1,), (2,)])
+        functions = {TEST_PACKAGE + '.return_big_cursor': lambda: rows}
+        self.package.pool = ConnectionPool(lambda: fake_connection(functions), min_size=0)
+
+        cursor = self.package.Return_Big_Cursor()
+        self.assertEqual(self.package.pool.idle(), 0)
+
+        self.assertEqual(len(cursor.fetch_all()), 2)
+        self.assertEqual(self.package.pool.idle(), 1)
+
+    def test_dropped_cursor_releases_connection(self):
+        description = [('VAL_NUMBER', None, None, None, None, None, 1)]
+        functions = {TEST_PACKAGE + '.return_big_cursor': lambda: FakeCursor(description, [(1,), (2,)])}
+        self.package.pool = ConnectionPool(lambda: fake_connection(functions), min_size=0, max_size=2,
+                                           timeout=0.1)
+
+        for index in range(3):
+            self.assertEqual(self.package.Return_Big_Cursor().next(), {'val_number': 1})
+        self.assertEqual(self.package.pool.idle(), 1)
+
+    def test_failed_conversion_releases_connection(self):
+        class BrokenLob(object):
+            def read(self, *args):
+                raise cx_Oracle.DatabaseError('ORA-22922: nonexistent LOB value')
+
+        description = [('VAL_NUMBER', None, None, None, None, None, 1)]
+
+        def call(o_number, o_varchar2, o_clob, o_cursor):
+            o_clob.setvalue(0, BrokenLob())
+            return FakeCursor(description, [(1,)])
+
+        functions = {TEST_PACKAGE + '.out_arguments_return_cursor': call}
+        self.package.pool = ConnectionPool(lambda: fake_connection(functions), min_size=0, max_size=1)
+
+        self.assertRaises(cx_Oracle.DatabaseError, self.package.Out_Arguments_Return_Cursor)
+        self.assertEqual(self.package.pool.idle(), 1)
+
+    def test_failed_call_closes_cursor(self):
+        def fail():
+            raise cx_Oracle.DatabaseError('ORA-06550: failed')
+        connection = self.package.connection = fake_connection({TEST_PACKAGE + '.return_big_cursor': fail})
+        cursors = []
+        cursor = connection.cursor
+        connection.cursor = lambda: cursors.append(cursor()) or cursors[-1]
+
+        self.assertRaises(cx_Oracle.DatabaseError, self.package.Return_Big_Cursor)
+        self.assertEqual([opened.closed for opened in cursors], [True])
+
+    def test_stats(self):
+        rows = FakeCursor([('VAL_NUMBER', None, None, None, None, None, 1)], [(1,), (2,), (3,)])
+        functions = {
+            TEST_PACKAGE + '.in_number_return_number': lambda number: number.getvalue() * 2,
+            TEST_PACKAGE + '.return_big_cursor': lambda: rows,
+        }
+        self.package.connection = fake_connection(functions)
+        events = []
+
+        self.package.In_Number_Return_Number(1)
+        self.assertEqual(plsql.stats.snapshot(), {})
+
+        plsql.stats.enable(slow_threshold=0)
+        plsql.stats.add_exporter(events.append)
+        try:
+            self.package.In_Number_Return_Number(1)
+            self.package.In_Number_Return_Number.many([(1,), (2,), (3,)], batch_size=2)
+            self.package.Return_Big_Cursor().fetch_all()
+            snapshot = plsql.stats.snapshot()
+        finally:
+            plsql.stats.disable()
+            plsql.stats.remove_exporter(events.append)
+            plsql.stats.reset()
+
+        function = snapshot[TEST_PACKAGE + '.In_Number_Return_Number']
+        self.assertEqual((function['call']['count'], function['bulk']['count']), (1, 1))
+        self.assertEqual((function['round_trips'], function['rows'], function['errors']), (3, 3, 0))
+        self.assertTrue(function['call']['p50'] <= function['call']['p99'] <= function['call']['max'])
+
+        cursor = snapshot[TEST_PACKAGE + '.Return_Big_Cursor']
+        self.assertEqual((cursor['call']['count'], cursor['rows']), (1, 3))
+        self.assertEqual(cursor['round_trips'], 1 + cursor['fetch']['count'])
+        self.assertEqual([event.kind for event in events][:2], ['call', 'bulk'])
+
+    def test_histogram(self):
+        histogram = plsql.stats.Histogram()
+        for index in range(100):
+            histogram.add(0.001 if index < 90 else 1.0)
+
+        self.assertEqual(histogram.percentile(0.5), 0.0016)
+        self.assertEqual(histogram.percentile(0.99), 1.0)
+        self.assertEqual(histogram.summary()['count'], 100)
+
+
+class FakeDBA(object):
+    """
+    Class implements database access to package specifications kept in memory
+    """
+    def __init__(self, sources):
+        self.sources = sources
+        self.ddl_times = dict((name, datetime.datetime(2012, 1, 1)) for name in sources)
+        self.queries = 0
+
+    def get_packages(self, names=None):
+        return [(name, self.ddl_times[name]) for name in sorted(self.sources) if names is None or name in names]
+
+    def get_spec_sources(self, names):
+        self.queries += 1
+        return dict((name, self.sources[name]) for name in names)
+
+
+class FakeSchemaIO(object):
+    """
+    Class implements storage of generated modules in memory
+    """
+    def __init__(self):
+        self.modules = []
+        self.removed = []
+        self.manifest = {}
+
+    def check_packages_storage(self):
+        pass
+
+    def save_package(self, fname, content):
+        self.modules.append((fname, content))
+
+    def remove_package(self, fname):
+        self.removed.append(fname)
+
+    def load_manifest(self):
+        return self.manifest
+
+    def save_manifest(self, manifest):
+        self.manifest = manifest
+
+
+class TestSchema(unittest.TestCase):
+    """
+    Class implements tests of schema generation
+    """
+    def setUp(self):
+        f = open(os.path.dirname(__file__) + '/fixture/' + TEST_PACKAGE + '.pkg')
+        spec = f.read()
+        f.close()
+
+        self.sources = {}
+        for index in range(5):
+            name = 'PACKAGE_{0}'.format(index)
+            self.sources[name] = spec.replace(TEST_PACKAGE.upper(), name)
+
+        self.packages = settings.PLSQL_PACKAGES
+        settings.PLSQL_PACKAGES = list(self.sources)
+
+    def tearDown(self):
+        settings.PLSQL_PACKAGES = self.packages
+
+    def _generate(self, workers, schema=None, **kwargs):
+        if schema is None:
+            schema = Schema(None)
+            schema.dba = FakeDBA(self.sources)
+            schema.fs = FakeSchemaIO()
+        schema.fs.modules = []
+        schema.generate_packages(async_stubs=True, workers=workers, **kwargs)
+        return schema
+
+    def test_parallel_generation(self):
+        serial = self._generate(1)
+        parallel = self._generate(3)
+
+        self.assertEqual(parallel.fs.modules, serial.fs.modules)
+        self.assertEqual([name for name, content in parallel.fs.modules][:2], ['package_0', 'package_0_async'])
+        self.assertEqual([package.name for package in parallel.packages], sorted(self.sources))
+        self.assertEqual(len(parallel.packages[0].members), 16)
+        self.assertEqual(parallel.dba.queries, 1)
+
+    def test_pooled_schema(self):
+        # pool of plsql.dbgate is recognized, modules are imported once
+        pool = ConnectionPool(fakeora.connect, min_size=0, max_size=2)
+        self.assertTrue(Schema(pool).pool is pool)
+        self.assertTrue(sys.modules.get('dbgate') is None or sys.modules['dbgate'] is dbgate)
+
+    def test_native_emitter(self):
+        django = self._generate(1)
+
+        settings.PLSQL_EMITTER = 'native'
+        try:
+            native = self._generate(1)
+        finally:
+            settings.PLSQL_EMITTER = 'django'
+
+        self.assertEqual(native.fs.modules, django.fs.modules)
+
+    def test_django_setup_once(self):
+        import django
+        if not hasattr(django, 'setup'):
+            self.skipTest("Django before 1.7 has no app registry")
+
+        calls = []
+        setup = django.setup
+        django.setup = lambda *args: calls.append(args) or setup(*args)
+        base._django_ready = False
+        base._templates.clear()
+        try:
+            self._generate(1)
+            self._generate(1)
+        finally:
+            django.setup = setup
+
+        self.assertEqual(len(calls), 1)
+
+    def test_incremental_generation(self):
+        schema = self._generate(1, incremental=True)
+        self.assertEqual(len(schema.fs.modules), 10)
+
+        # recompilation without changes of specification
+        schema.dba.ddl_times['PACKAGE_0'] = datetime.datetime(2012, 1, 2)
+        self._generate(1, schema, incremental=True)
+        self.assertEqual(schema.fs.modules, [])
+        self.assertEqual(schema.dba.queries, 2)
+        self.assertEqual(len(schema.fs.manifest['packages']['PACKAGE_0']['members']), 16)
+
+        self.sources['PACKAGE_1'] += '\n'
+        schema.dba.ddl_times['PACKAGE_1'] = datetime.datetime(2012, 1, 2)
+        del self.sources['PACKAGE_2']
+        self._generate(1, schema, incremental=True)
+        self.assertEqual([name for name, content in schema.fs.modules], ['package_1', 'package_1_async'])
+        self.assertEqual(schema.fs.removed, ['package_2', 'package_2_async'])
+        self.assertEqual(sorted(schema.fs.manifest['packages']), ['PACKAGE_0', 'PACKAGE_1', 'PACKAGE_3', 'PACKAGE_4'])
+
+        self._generate(1, schema, incremental=True, force=True)
+        self.assertEqual(len(schema.fs.modules), 8)
+
+    def test_type_names(self):
+        """
+        Tests to generate package with every type name of parser and user_arguments
+        """
+        types = ['timestamp(6) with time zone', 'timestamp with local time zone', 'interval day(2) to second(6)',
+                 'interval year(4) to month', 'long raw', 'long', 'binary_double', 'float(10)', 'varchar(10)',
+                 'urowid'] + sorted(set(ORATYPES) | set(dbgate.ARGUMENT_TYPES.values()))
+        lines = ['create or replace package types as']
+        for index, name in enumerate(types):
+            lines.append('    function f_{0}(p_value {1}) return {1};'.format(index, name))
+        lines.append('end types;')
+        spec = '\n'.join(lines)
+        functions = PlSqlParser().get_package_members(spec)[0]
+
+        package, source, async_source = generate_package((('TYPES', None), spec, False, None))
+        namespace = {}
+        exec(source, namespace)
+        dynamic = build_package('TYPES', PlSqlParser().get_package_members(spec))
+
+        for index, function in enumerate(functions):
+            return_type = getattr(namespace['types'], 'f_{0}'.format(index)).call.return_type
+            self.assertEqual(return_type, getattr(cx_Oracle, ORATYPES[function['oratype']].split('.')[1]))
+            self.assertEqual(getattr(dynamic, 'f_{0}'.format(index)).call.return_type, return_type)
+
+    def test_anchored_types(self):
+        spec = """
+            create or replace package emps as
+                function get_name(p_id emp.id%type, p_name out scott.emp.name%TYPE) return emp.name%type;
+            end emps;
+        """
+        package, source, async_source = generate_package((('EMPS', None), spec, False, None))
+        namespace = {}
+        exec(source, namespace)
+        dynamic = build_package('EMPS', PlSqlParser().get_package_members(spec))
+
+        for emps in (namespace['emps'], dynamic):
+            call = emps.get_name.call
+            self.assertEqual(call.return_type, cx_Oracle.STRING)
+            self.assertEqual([arg[2] for arg in call.args], [cx_Oracle.STRING, cx_Oracle.STRING])
+
+    def test_arguments_metadata(self):
+        f = open(os.path.dirname(__file__) + '/fixture/' + TEST_PACKAGE + '.arguments')
+        rows = json.load(f)
+        f.close()
+        spec = self.sources['PACKAGE_0'].replace('PACKAGE_0', TEST_PACKAGE.upper())
+        info = (TEST_PACKAGE.upper(), None)
+
+        arguments = DBA(fake_connection(rows=rows)).get_arguments([TEST_PACKAGE.upper()])
+        functions, procedures, constants = arguments[TEST_PACKAGE.upper()]
+        self.assertEqual((len(functions), len(procedures), len(constants)), (12, 1, 0))
+        self.assertEqual(functions[-1]['args'][0]['type'], 'in out')
+
+        # generated module is the same as the one from parsed specification
+        parsed = generate_package((info, spec, False, None))
+        dictionary = generate_package((info, spec, False, arguments[TEST_PACKAGE.upper()]))
+        self.assertEqual(dictionary[1], parsed[1])
+
+        # members without rows in user_arguments keep parsed signatures
+        missing = (functions[:-1], [], constants)
+        self.assertEqual(generate_package((info, spec, False, missing))[1], parsed[1])
+
+        # dynamic packages take signatures from user_arguments too
+        def queries(statement):
+            if 'user_arguments' in statement:
+                return rows
+            return [(line,) for line in spec.splitlines(True)]
+
+        connection = fake_connection(rows=queries)
+        settings.PLSQL_METADATA = 'arguments'
+        try:
+            package = Packages(connection).get(TEST_PACKAGE)
+        finally:
+            settings.PLSQL_METADATA = 'parser'
+        namespace = {}
+        exec(dictionary[1], namespace)
+
+        self.assertEqual(len([statement for statement in connection.statements if 'user_arguments' in statement]), 1)
+        for member in [member for member in parsed[0].members if isinstance(member, Function)]:
+            self.assertEqual(getattr(package, member.name).call.args,
+                             getattr(namespace[TEST_PACKAGE], member.name).call.args)
+
+    def test_arguments_metadata_chunks(self):
+        rows = {
+            'A': [('A', 'SAVE', None, 1, 1, 'P_IDS', 'IN', 'PL/SQL TABLE', None, None, None, 'N',
+                   0, 'SA', 'A', 'T_IDS'),
+                  ('A', 'SAVE', None, 1, 1, None, 'IN', 'NUMBER', 22, None, None, 'N', 1, None, None, None)],
+            'B': [('B', 'GET', None, 1, 0, None, 'OUT', 'NUMBER', 22, None, None, 'N', 0, None, None, None)],
+        }
+
+        def queries(statement, parameters):
+            return None, sum([rows[name] for name in sorted(parameters.values())], [])
+
+        dba = DBA(fakeora.Database(queries=queries).connect())
+        dba.IN_LIST_SIZE = 1
+        arguments = dba.get_arguments(['A', 'B'])
+
+        self.assertEqual(arguments['A'][1][0]['args'][0]['collection']['name'], 'A.T_IDS')
+        self.assertEqual([function['name'] for function in arguments['B'][0]], ['GET'])
+
+    def test_lazy_import(self):
+        schema = self._generate(1)
+        root = tempfile.mkdtemp()
+        directory = os.path.join(root, 'lazyschema')
+        os.mkdir(directory)
+        for name, content in [('__init__', '')] + schema.fs.modules:
+            f = open(os.path.join(directory, name + '.py'), 'w')
+            f.write(content)
+            f.close()
+        f = open(os.path.join(directory, 'plsql_manifest.json'), 'w')
+        json.dump(schema.fs.manifest, f)
+        f.close()
+
+        sys.path.insert(0, root)
+        finder = plsql.importer.install(directory)
+        try:
+            module = import_module('lazyschema.package_0')
+            self.assertFalse('package_0' in vars(module))
+            self.assertEqual(module.__all__, ['package_0'])
+            self.assertEqual(module.__plsql_members__, finder.index()['package_0'])
+            self.assertTrue('In_Number_Return_Number' in module.__plsql_members__)
+            self.assertFalse('members' in vars(module))
+
+            # the module is executed on first access
+            self.assertEqual(module.package_0.GC_VARCHAR2_FOR_RETURN, 'varchar2')
+            self.assertTrue('package_0' in vars(module))
+
+            # async module has constants of the package too
+            if aio is not None:
+                module = import_module('lazyschema.package_0_async')
+                self.assertEqual(module.package_0.GC_VARCHAR2_FOR_RETURN, 'varchar2')
+
+            # index of modules generated without manifest
+            os.remove(os.path.join(directory, 'plsql_manifest.json'))
+            self.assertEqual(plsql.importer.SchemaFinder(directory).index(), finder.index())
+        finally:
+            plsql.importer.uninstall(finder)
+            sys.path.remove(root)
+            for name in [name for name in sys.modules if name.startswith('lazyschema')]:
+                del sys.modules[name]
+            shutil.rmtree(root)
+
+    def test_spec_sources(self):
+        rows = [('A', 'package A as\n'), ('A', 'end A;'), ('B', 'package B as\n'), ('B', 'end B;')]
+        connection = fake_connection(rows=rows)
+
+        sources = DBA(connection).get_spec_sources(['A', 'B'])
+
+        self.assertEqual(sources, {'A': 'package A as\nend A;', 'B': 'package B as\nend B;'})
+        self.assertEqual(len(connection.statements), 1)
+
+
+class TestBench(unittest.TestCase):
+    """
+    Class implements tests of benchmarks with fake driver
+    """
+    def test_fake_driver(self):
+        database = fakeora.Database({'refs.get_code': lambda code: code.getvalue() * 2})
+        cursor = database.connect().cursor()
+        result = cursor.var(fakeora.NUMBER)
+        code = cursor.var(fakeora.NUMBER)
+        code.setvalue(0, 21)
+
+        cursor.execute('begin :r := refs.get_code(:1); end;', [result, code])
+
+        self.assertEqual(result.getvalue(), 42)
+        self.assertEqual(database.round_trips, 1)
+        self.assertRaises(fakeora.DatabaseError, cursor.execute, 'begin refs.missing(); end;')
+
+    def test_run(self):
+        sizes = {'parse_members': 8, 'packages': 2, 'package_members': 8, 'calls': 100, 'rows': 50}
+
+        results = bench.run(sizes, latency=0.0001)
+
+        self.assertEqual(results['results']['call']['function']['round_trips'], 100)
+        self.assertEqual(results['results']['call']['bulk']['round_trips'], 1)
+        self.assertEqual(results['results']['fetch']['tuple']['round_trips'], 2)
+        self.assertEqual(bench.compare(results, results), [])
+
+        slower = json.loads(json.dumps(results))
+        slower['results']['parse']['seconds'] *= 2
+        self.assertEqual([name for name, before, after in bench.compare(slower, results)], ['parse.seconds'])
+
+    def test_load(self):
+        self.assertEqual(load.schedule({'function': 1, 'cursor': 1}, 50, seed=1),
+                         load.schedule({'function': 1, 'cursor': 1}, 50, seed=1))
+
+        single = load.run('threads', [4], calls=40, latency=0.002, rows=3)
+        pooled = load.run('threads', [4], calls=40, latency=0.002, rows=3, connections=4)
+
+        self.assertEqual([(level['calls'], level['errors']) for level in single['levels']], [(40, 0)])
+        self.assertEqual([(level['calls'], level['errors']) for level in pooled['levels']], [(40, 0)])
+        self.assertTrue(pooled['levels'][0]['calls_per_second'] > single['levels'][0]['calls_per_second'])
+        self.assertTrue('concurrency' in load.report(pooled))
 
 
 class TestCreator(unittest.TestCase):